@@ -1,10 +1,28 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import io
 import warnings
-import itertools
-from datetime import date, datetime
-import calendar
+import os
+from pathlib import Path
+from collections import OrderedDict
+from engine import kantor_list, libur_nasional, frame_memory_mb
+from kalender import HolidayCalendar
+from lokasi import KantorRegistry
+from slicer import SlicerIndex, sort_for_slicer
+from appraisal import system_scores, hitung_final_score, grade_of, appraisal_ranking, load_manual_scores, ranking_to_xlsx
+from charts import MODE_GRAFIK, daily_hours_figure, monthly_hours_figure, radar_figure, status_pie_figure, top3_figure
+from detail import PAGE_SIZES, detail_columns, detail_order, detail_page, detail_total, n_pages, style_page
+from cube import build_cube, slice_cube, cube_kpi, cube_status_counts, cube_monthly_avg, cube_per_nama
+from loader import file_digest, source_signature, load_data_smart, load_many, scan_columns, load_masa_kerja
+from pipeline import ingest_activity, process_activity, build_views, tahap_proses
+from arrow_backend import BACKENDS, BACKEND_DEFAULT
+from incremental import ProcessedBasis, apply_delta, ingest_files, plan_delta, tahap_delta
+from batch import read_manifest, load_batch_result
+from result_cache import CACHE_DIR, ResultCache, result_key
+from profiling import PipelineProfiler
+from jobs import JobManager, SELESAI, GAGAL, BATAL
+from store import STORE_PATH, AttendanceStore, StoreSlicer
+from export import EXPORT_BG_ROWS, FORMAT_EXPORT, ExportSheet, export_bytes, export_path, ringkasan_karyawan, write_export
 
 # --- 1. CONFIG & STYLE ---
 warnings.filterwarnings('ignore')
@@ -21,72 +39,189 @@ st.markdown("""
 st.title("📊 HR Analytics: Performance & Appraisal System")
 st.markdown("---")
 
-# --- 2. DATA LIBUR NASIONAL & KANTOR (2025) ---
-libur_nasional = {
-    date(2025, 1, 1): "Tahun Baru Masehi",
-    date(2025, 1, 27): "Isra Mikraj Nabi Muhammad SAW",
-    date(2025, 1, 28): "Cuti Bersama Imlek", 
-    date(2025, 1, 29): "Tahun Baru Imlek 2576 Kongzili",
-    date(2025, 3, 29): "Hari Suci Nyepi",
-    date(2025, 3, 31): "Idul Fitri 1446H",
-    date(2025, 4, 1): "Idul Fitri 1446H",
-    date(2025, 4, 2): "Cuti Bersama Idul Fitri",
-    date(2025, 4, 3): "Cuti Bersama Idul Fitri",
-    date(2025, 4, 4): "Cuti Bersama Idul Fitri",
-    date(2025, 4, 18): "Wafat Yesus Kristus (Jumat Agung)",
-    date(2025, 4, 20): "Kebangkitan Yesus Kristus (Paskah)",
-    date(2025, 5, 1): "Hari Buruh Internasional",
-    date(2025, 5, 12): "Hari Raya Waisak",
-    date(2025, 5, 29): "Kenaikan Yesus Kristus",
-    date(2025, 6, 1): "Hari Lahir Pancasila",
-    date(2025, 6, 6): "Hari Raya Idul Adha 1446H",
-    date(2025, 6, 27): "Tahun Baru Islam 1447H",
-    date(2025, 8, 17): "Hari Kemerdekaan RI",
-    date(2025, 9, 5): "Maulid Nabi Muhammad SAW",
-    date(2025, 12, 25): "Hari Raya Natal",
-    date(2025, 12, 26): "Cuti Bersama Natal"
-}
-
-kantor_list = [
-    "SCIENTIA", "GADING SERPONG", "CURUG SANGERENG", "KELAPA DUA", 
-    "PAGEDANGAN", "MEDANG", "BINONG", "CISAUK", "LEGOK", "BSD", "SERPONG",
-    "PT ITOKO SANNIN ABADI", "GLOBAL KONSULTAN", "PT. PRATAMA SOLUTION", "REGUS", 
-    "PT. PARAMADAKSA TEKNOLOGI NUSANTARA", "AIMAN - ANUGERAH INOVASI MANUNGGAL", 
-    "PT GANITRI NITSAYA HARITA", "PT VALUTAC INOVASI KREASI",
-    "PRIME GLOBAL (KAP KANEL & REKAN)", "SANJAYA SOLUSINDO (PT SANJAYA SOLUSI DIGITAL INDONESIA)",
-    "PT. SARAHMA GLOBAL INFORMATIKA", "TRIPROCKETS TRAVEL INDONESIA", "THE MAP CONSULTANT",
-    "KESSLER EXECUTIVE SEARCH", "APP INTERNATIONAL INDONESIA", "PT WIAGA INTECH NUSANTARA",
-    "PARAMADAKSA TEKNOLOGI NUSANTARA NEXSOFT"
-]
-
 # --- 3. FUNGSI SMART LOAD ---
-@st.cache_data
-def load_data_smart(file):
-    try:
-        df_scan = pd.read_excel(file, header=None, nrows=10)
-    except:
-        file.seek(0)
-        df_scan = pd.read_csv(file, header=None, nrows=10, encoding='utf-8', sep=None, engine='python')
-    
-    header_idx = 0
-    found = False
-    for i, row in df_scan.iterrows():
-        txt = " ".join(row.astype(str).str.upper().tolist())
-        if "NAMA" in txt and ("MASUK" in txt or "ABSEN" in txt):
-            header_idx = i
-            found = True
-            break
-            
-    file.seek(0)
-    if not found:
-        header_idx = 0
-        
-    try:
-        df = pd.read_excel(file, header=header_idx)
-    except:
-        file.seek(0)
-        df = pd.read_csv(file, header=header_idx, encoding='utf-8', sep=None, engine='python')
-    return df
+MAX_CACHED_FILTERS = 8
+PARSE_CACHE_MB = float(os.environ.get("HRIS_PARSE_CACHE_MB", 512))
+DATA_DIR = os.environ.get("HRIS_DATA_DIR")
+BATCH_DIR = os.environ.get("HRIS_BATCH_DIR")  # output batch.py (cron malam)
+
+@st.cache_resource
+def parsed_file_cache():
+    # digest isi file -> DataFrame hasil parse (dipakai bareng semua sesi, tanpa spill:
+    # file mentah cukup di-parse ulang)
+    return ResultCache(budget_mb=PARSE_CACHE_MB)
+
+@st.cache_resource
+def shared_result_cache():
+    # key input + pengaturan -> hasil proses (df_full + cube), dipakai bareng semua sesi
+    return ResultCache(spill_dir=CACHE_DIR)
+
+def read_uploads(uploaded_files):
+    # (digest, nama, bytes) per file; dibaca di script run supaya thread job tidak menyentuh UploadedFile
+    files = []
+    for file in uploaded_files:
+        data = file.getvalue()
+        files.append((file_digest(data), file.name, data))
+    return files
+
+def stream_sources(uploaded_files):
+    # Path server dipakai apa adanya, upload disalin ke buffer sendiri (posisi seek tidak bentrok dengan rerun)
+    sources = []
+    for file in uploaded_files:
+        if isinstance(file, str):
+            sources.append(file)
+        else:
+            buffer = io.BytesIO(file.getvalue())
+            buffer.name = file.name
+            sources.append(buffer)
+    return sources
+
+def load_uploads(files, cache, job=None):
+    # File yang belum pernah di-parse dibaca paralel di process pool. Tiap file yang selesai
+    # langsung masuk cache, jadi job yang dibatalkan / diulang tidak parse ulang file itu
+    missing = list({f[0]: f for f in files if f[0] not in cache}.values())
+
+    def simpan(key, df):
+        cache.put(key, df)
+        if job is not None:
+            job.partial['file_ter_load'] = job.partial.get('file_ter_load', 0) + 1
+            job.check_cancel()
+
+    loaded, errors = load_many(missing, on_result=simpan)
+
+    # Sejajar dengan files (None = gagal load). File yang lebih besar dari budget langsung
+    # tergusur dari cache, jadi pakai hasil load-nya
+    dfs = [loaded[key] if key in loaded else cache.get(key) for key, _, _ in files]
+    return dfs, errors
+
+@st.cache_resource
+def attendance_store():
+    # File SQLite riwayat absensi (HRIS_STORE); hanya dipanggil kalau STORE_PATH diset
+    return AttendanceStore(STORE_PATH)
+
+# --- HASIL PROSES (SESSION STATE) ---
+def simpan_hasil(df_final, profiler, cube=None, slicer=None):
+    # df_final & cube boleh dipakai bareng sesi lain (cache hasil), jadi tidak dimutasi
+    if slicer is None:
+        cube, slicer = build_views(df_final, profiler, cube)
+    st.session_state['df_full'] = df_final
+    st.session_state['df_full_mb'] = frame_memory_mb(df_final)
+    st.session_state['cube'], st.session_state['slicer'] = cube, slicer
+    reset_view_cache()
+    st.session_state['profil_proses'] = profiler.frame()
+
+def buka_riwayat(slicer_store):
+    # Data harian tidak dimuat penuh (df_full None): tiap filter & agregat Tab 1 dijawab store
+    st.session_state['df_full'] = None
+    st.session_state.pop('df_full_mb', None)
+    st.session_state['cube'], st.session_state['slicer'] = None, slicer_store
+    reset_view_cache()
+
+# --- JOB PROSES (BACKGROUND) ---
+@st.cache_resource
+def job_manager():
+    # Satu pool untuk semua sesi; job tetap jalan walau script di-rerun / tab browser ditutup
+    return JobManager()
+
+def proses_job(job, file_ids, files, sources, mapping, punch, masa_kerja, kalender, kantor, target_jam, hemat_memori,
+               parse_cache, hasil_cache, cache_key, settings_key, basis=None, store=None, backend=BACKEND_DEFAULT):
+    # Jalan di thread job (tanpa konteks Streamlit): jangan panggil st.* di sini.
+    # file_ids: id isi tiap file (urut upload); files (mode standar) / sources (streaming) sejajar
+    proses = dict(libur=kalender, kantor=kantor, target_jam=target_jam)
+    if masa_kerja is not None:
+        masa_kerja = load_masa_kerja(*masa_kerja)
+
+    def ingest(pilih):
+        # Activity file terpilih -> (activity gabungan, dict id -> activity, id yang berhasil)
+        idx = [file_ids.index(i) for i in pilih]
+        if sources is not None:
+            src = [sources[k] for k in idx]
+            if punch:
+                return ingest_activity(mapping, sources=src, punch=True, profiler=job.profiler), None, pilih
+            return (*ingest_files(pilih, mapping, sources=src, profiler=job.profiler), pilih)
+        with job.profiler.stage('file_load') as s:
+            dfs, errors = load_uploads([files[k] for k in idx], parse_cache, job)
+            job.partial['errors'] = errors
+            ok = [i for i, df in zip(pilih, dfs) if df is not None]
+            dfs = [df for df in dfs if df is not None]
+            if pilih and not dfs:
+                raise ValueError("Tidak ada file yang berhasil dibaca.")
+            s['baris_keluar'] = sum(len(df) for df in dfs)
+        if punch:
+            return ingest_activity(mapping, df_raw=pd.concat(dfs, ignore_index=True, sort=False), punch=True,
+                                   profiler=job.profiler), None, ok
+        if not dfs:
+            return None, {}, ok
+        return (*ingest_files(ok, mapping, dfs=dfs, profiler=job.profiler), ok)
+
+    # Upload = upload sebelumnya + file baru / file yang diganti -> cuma sel yang berubah dihitung ulang
+    delta = None if punch else plan_delta(basis, settings_key, file_ids)
+    if delta is not None:
+        job.tahap = tahap_delta(sources is not None, hemat_memori)
+        _, acts_baru, ok = ingest(delta[0])
+        ids = [i for i in file_ids if i in basis.file_ids or i in ok]
+        hasil = apply_delta(basis, ids, acts_baru, masa_kerja, proses, hemat_memori, job.profiler)
+        if hasil is not None:
+            df_final, cube, baris_berubah, basis = hasil
+            _, slicer = build_views(df_final, job.profiler, cube)
+        else:
+            delta = None
+
+    if delta is None:
+        job.tahap = tahap_proses(sources is not None, punch, hemat_memori, backend)
+        df_act, acts, ok = ingest(file_ids)
+        if df_act is None or df_act.empty:
+            raise ValueError("Format Tanggal/Waktu tidak terdeteksi. Pastikan format Excel seragam.")
+        df_final = process_activity(df_act, masa_kerja, hemat_memori=hemat_memori, profiler=job.profiler,
+                                    backend=backend, **proses)
+        del df_act
+        cube, slicer = build_views(df_final, job.profiler)
+        baris_berubah = df_final
+        basis = None if punch else ProcessedBasis(settings_key, ok, acts, df_final, cube)
+
+    if store is not None:
+        job.tahap.append('simpan_store')
+    hasil_cache.put(cache_key, {'df': df_final, 'cube': cube})
+    if store is not None:
+        # Inkremental: cukup upsert baris yang berubah
+        with job.profiler.stage('simpan_store', len(baris_berubah)):
+            store.append(baris_berubah, cache_key)
+    return {'df': df_final, 'cube': cube, 'slicer': slicer, 'basis': basis,
+            'inkremental': delta is not None, 'baris_berubah': len(baris_berubah),
+            'tahun_kosong': kalender.tahun_belum_ada(df_final['Tanggal'])}
+
+@st.fragment(run_every=1.0)
+def panel_job(job_id):
+    # Di-refresh tiap detik tanpa rerun seluruh app; begitu job berhenti -> rerun penuh untuk pakai hasilnya
+    job = job_manager().get(job_id)
+    if job is None:
+        return
+    if not job.aktif:
+        st.rerun()
+    st.progress(job.progress, text=f"Memproses ({job.id}): {job.stage or 'antri'} - {job.detik():.0f} detik")
+    if 'file_ter_load' in job.partial:
+        st.caption(f"{job.partial['file_ter_load']} file selesai di-parse (tersimpan, tidak di-parse ulang kalau diproses lagi)")
+    if st.button("Batalkan Proses ✋", key=f"batal_{job.id}"):
+        job.cancel()
+        st.caption("Membatalkan di akhir langkah yang sedang jalan...")
+
+# --- KALENDER LIBUR ---
+@st.cache_resource
+def load_kalender(libur_file=None):
+    # Kompilasi sekali per file; tabel file digabung dengan libur nasional bawaan (2025)
+    base = HolidayCalendar.from_dict(libur_nasional)
+    if libur_file is None:
+        return base
+    return HolidayCalendar.from_file(libur_file, base=base)
+
+# --- REGISTRY KANTOR (WFO) ---
+@st.cache_resource
+def load_kantor_registry(kantor_text, geofence_file=None):
+    # Di-cache per konfigurasi, jadi memo klasifikasi Lokasi ikut awet antar rerun
+    nama_kantor = [k for k in kantor_text.splitlines() if k.strip()]
+    if geofence_file is not None:
+        return KantorRegistry.from_file(geofence_file, nama_kantor)
+    return KantorRegistry(nama_kantor)
 
 # --- HELPER: SYNC SLIDER & INPUT ---
 def make_synced_input(label, key_prefix, default_val=80):
@@ -120,173 +255,457 @@ def make_synced_input(label, key_prefix, default_val=80):
     
     return st.session_state[key_val]
 
+# --- CACHE TAMPILAN PER FILTER ---
+# Agregat & figure tiap section di-cache per (nama section, kombinasi filter [+ opsi section]).
+# Rerun yang tidak mengubah input section itu (slider appraisal, ganti halaman detail, filter
+# kembali ke kombinasi sebelumnya) tidak membangun ulang. Isi cache tidak dimutasi.
+MAX_CACHED_VIEWS = 64
+
+def reset_view_cache():
+    st.session_state['filter_cache'] = OrderedDict()
+    st.session_state['view_cache'] = OrderedDict()
+
+def memo_view(name, key, build, baris_masuk=None):
+    cache = st.session_state.setdefault('view_cache', OrderedDict())
+    k = (name, key)
+    if k not in cache:
+        with profiler.stage(name, baris_masuk) as s:
+            cache[k] = build()
+            if isinstance(cache[k], pd.DataFrame):
+                s['baris_keluar'] = len(cache[k])
+        while len(cache) > MAX_CACHED_VIEWS:
+            cache.popitem(last=False)
+    cache.move_to_end(k)
+    return cache[k]
+
+# --- PANEL YANG BISA RERUN SENDIRI (FRAGMENT) ---
+# Widget di dalam fragment cuma menjalankan ulang fragment itu, bukan seluruh app.py.
+# Argumen (filter_key, df_filtered, ...) ikut tersimpan dari run penuh terakhir.
+@st.fragment
+def panel_grafik_harian(filter_key, df_filtered):
+    mode_grafik = st.radio("Tampilan", MODE_GRAFIK, horizontal=True, key="mode_grafik_harian")
+
+    def build():
+        df_hadir = df_filtered[df_filtered['Durasi'] > 0]
+        return daily_hours_figure(df_hadir, target_jam=8.5, mode=mode_grafik) if not df_hadir.empty else None
+
+    hasil = memo_view('chart_harian', (filter_key, mode_grafik), build, len(df_filtered))
+    if hasil is not None:
+        fig_line, info_grafik = hasil
+        st.caption(info_grafik)
+        st.plotly_chart(fig_line, use_container_width=True)
+    else:
+        st.info("Belum ada data kehadiran harian.")
+
+@st.fragment
+def panel_detail(filter_key, df_filtered, cube_filtered):
+    cols_view = detail_columns(df_filtered)
+    # df_full urut per minggu (untuk slicer); detail ditampilkan urut per karyawan.
+    # Urutan disimpan per kombinasi filter, yang dirender cuma halaman aktif.
+    order = memo_view('detail_order', filter_key, lambda: detail_order(df_filtered), len(df_filtered))
+
+    p1, p2, p3 = st.columns([1, 1, 2])
+    page_size = p1.selectbox("Baris per halaman", PAGE_SIZES, index=1, key="detail_page_size")
+    total_pages = n_pages(len(order), page_size)
+    page = p2.number_input(f"Halaman (1-{total_pages})", min_value=1, max_value=total_pages,
+                           value=1, step=1, key=f"detail_page_{total_pages}")
+    df_page = detail_page(df_filtered, order, page, page_size, cols_view)
+    p3.caption(f"Baris {df_page.index.min() + 1:,}-{df_page.index.max() + 1:,} dari {len(order):,}")
+
+    st.dataframe(style_page(df_page), use_container_width=True)
+    st.dataframe(detail_total(cube_filtered, cols_view), use_container_width=True, hide_index=True)
+
+@st.fragment
+def panel_appraisal(filter_key, df_filtered, list_karyawan_app):
+    col_sel_emp, col_dummy = st.columns([1, 2])
+    with col_sel_emp:
+        target_emp = st.selectbox("Pilih Karyawan:", list_karyawan_app) if list_karyawan_app else None
+
+    if not target_emp:
+        return
+    # Skor system (KPI, Project, Absensi, WFO) pakai engine yang sama dengan Ranking Appraisal;
+    # disimpan per (filter, karyawan), jadi geser slider manual tidak menghitung ulang
+    def build():
+        df_emp = df_filtered[df_filtered['Nama'] == target_emp]
+        return system_scores(df_emp).iloc[0] if not df_emp.empty else None
+
+    sys_score = memo_view('appraisal_system', (filter_key, target_emp), build)
+    if sys_score is None:
+        st.warning("Tidak ada data untuk karyawan ini di periode yang dipilih.")
+        return
+
+    st.markdown("### A. Penilaian by System (Bobot 65%)")
+    total_hari_hadir = int(sys_score['Hari Hadir'])
+    alpha_count = int(sys_score['Alpha'])
+    actual_wfo = int(sys_score['Hari WFO'])
+    target_wfo_total = int(sys_score['Target WFO'])
+    score_kpi = sys_score['KPI']
+    score_project = sys_score['Project']
+    score_absensi = sys_score['Absensi']
+    score_wfo = sys_score['WFO']
+
+    # TAMPILAN SYSTEM SCORE
+    c_sys1, c_sys2, c_sys3, c_sys4 = st.columns(4)
+    c_sys1.metric("2. KPI (20%)", f"{score_kpi:.1f}", f"{total_hari_hadir}/20 Hari")
+    # Update tampilan metrik Project
+    c_sys2.metric("7. Project (15%)", f"{score_project:.1f}", "Rata-rata Skor")
+    c_sys3.metric("3. Absensi (10%)", f"{score_absensi:.1f}", f"Alpha: {alpha_count}")
+    c_sys4.metric("5. WFO (20%)", f"{score_wfo:.1f}", f"{actual_wfo}/{target_wfo_total} Hari")
+
+    st.markdown("---")
+    st.markdown("### B. Penilaian Manual (Bobot 35%)")
+    st.caption("Geser slider atau ketik angka (0-100). Keduanya sinkron.")
+
+    # INPUT MANUAL DENGAN FUNGSI SYNC
+    # 1. Komunikasi (10%)
+    st.markdown("**1. Komunikasi (10%)**")
+    val_komunikasi = make_synced_input("Skor Komunikasi", "komunikasi", 80)
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    # 4. Problem Solving (10%)
+    st.markdown("**4. Keahlian / Problem Solving (10%)**")
+    val_problem_solving = make_synced_input("Skor Problem Solving", "problem", 75)
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    # 6. Kualitas Kerja (15%)
+    st.markdown("**6. Kualitas Kerja (15%)** - Inisiatif, laporan, diskusi, responsive")
+    val_kualitas = make_synced_input("Skor Kualitas", "kualitas", 80)
+
+    # --- FINAL CALCULATION ---
+    scores = {
+        'Komunikasi': val_komunikasi, 'KPI': score_kpi, 'Absensi': score_absensi,
+        'Problem Solving': val_problem_solving, 'WFO': score_wfo,
+        'Kualitas': val_kualitas, 'Project': score_project,
+    }
+    final_score = hitung_final_score(scores)
+
+    # Grade Logic
+    grade = grade_of(final_score)
+
+    st.markdown("---")
+    st.subheader(f"🏆 TOTAL SCORE: {final_score:.2f}")
+    st.info(f"Grade: **{grade}**")
+
+    # RADAR CHART
+    st.plotly_chart(radar_figure(scores), use_container_width=True)
+
+def ranking_filter(filter_key, df_filtered, manual_key=None, manual_scores=None):
+    return memo_view('appraisal_ranking', (filter_key, manual_key),
+                     lambda: appraisal_ranking(df_filtered, manual_scores), len(df_filtered))
+
+@st.fragment
+def panel_ranking(filter_key, df_filtered):
+    manual_file = st.file_uploader("Sheet Nilai Manual (Opsional)", type=["xlsx", "csv"], key="manual_scores")
+    manual_scores, manual_key = None, None
+    if manual_file is not None:
+        try:
+            manual_key = file_digest(manual_file.getvalue())
+            manual_scores = memo_view('nilai_manual', manual_key,
+                                      lambda: load_manual_scores(load_data_smart(manual_file.getvalue(), manual_file.name)))
+        except Exception as e:
+            manual_key = None
+            st.error(f"Gagal membaca nilai manual: {e}")
+    # Dipakai juga oleh Export Data (hasil appraisal dengan nilai manual yang sama)
+    st.session_state['nilai_manual'] = (manual_key, manual_scores)
+
+    if df_filtered.empty:
+        st.warning("Data kosong dengan filter ini.")
+        return
+    df_ranking = ranking_filter(filter_key, df_filtered, manual_key, manual_scores)
+
+    g1, g2 = st.columns(2)
+    g1.metric("Jumlah Karyawan Dinilai", len(df_ranking))
+    g2.metric("Rata-rata Final Score", f"{df_ranking['Final Score'].mean():.2f}")
+
+    st.dataframe(df_ranking.style.format(precision=2), use_container_width=True, hide_index=True)
+    st.download_button(
+        "⬇️ Download Ranking (Excel)",
+        data=memo_view('ranking_xlsx', (filter_key, manual_key), lambda: ranking_to_xlsx(df_ranking)),
+        file_name="ranking_appraisal.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+# --- EXPORT DATA ---
+# Export kecil dibuat saat tombol download diklik (tanpa rerun); export besar ditulis ke file
+# di job background per chunk, lalu tombol download membaca file itu.
+EXPORT_ISI = {"Detail Harian": "detail_harian", "Ringkasan per Karyawan": "ringkasan_karyawan", "Hasil Appraisal": "appraisal"}
+
+def export_sheet(isi, filter_key, df_filtered, cube_filtered):
+    if isi == "Detail Harian":
+        cols = detail_columns(df_filtered)
+        order = memo_view('detail_order', filter_key, lambda: detail_order(df_filtered), len(df_filtered))
+        return ExportSheet("Harian", df_filtered, cols, order, highlight=True, total=detail_total(cube_filtered, cols).data)
+    if isi == "Ringkasan per Karyawan":
+        return ExportSheet("Ringkasan", memo_view('ringkasan_karyawan', filter_key, lambda: ringkasan_karyawan(cube_filtered)))
+    manual_key, manual_scores = st.session_state.get('nilai_manual', (None, None))
+    return ExportSheet("Appraisal", ranking_filter(filter_key, df_filtered, manual_key, manual_scores))
+
+def export_job(job, sheet, fmt, path):
+    # Thread job: progress & pembatalan dicek tiap chunk; file setengah jadi dihapus kalau gagal / batal
+    def progress(ditulis):
+        job.partial['progress'] = ditulis / max(len(sheet), 1)
+        job.stage = f"{ditulis:,}/{len(sheet):,} baris"
+        job.check_cancel()
+
+    try:
+        write_export(path, sheet, fmt, progress)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+@st.fragment(run_every=1.0)
+def panel_export_job(job_id):
+    job = job_manager().get(job_id)
+    if job is None:
+        return
+    if not job.aktif:
+        st.rerun()
+    st.progress(job.progress, text=f"Menyiapkan {job.label}: {job.stage or 'antri'} - {job.detik():.0f} detik")
+    if st.button("Batalkan Export ✋", key=f"batal_{job.id}"):
+        job.cancel()
+
+@st.fragment
+def panel_export(filter_key, df_filtered, cube_filtered):
+    e1, e2 = st.columns(2)
+    isi = e1.selectbox("Data", list(EXPORT_ISI), key="export_isi")
+    fmt = e2.selectbox("Format", list(FORMAT_EXPORT), key="export_format")
+    sheet = export_sheet(isi, filter_key, df_filtered, cube_filtered)
+    file_name = f"{EXPORT_ISI[isi]}.{fmt}"
+
+    if len(sheet) <= EXPORT_BG_ROWS:
+        st.download_button(f"⬇️ Download {isi} ({len(sheet):,} baris)", data=lambda: export_bytes(sheet, fmt),
+                           file_name=file_name, mime=FORMAT_EXPORT[fmt], on_click="ignore", key="export_download")
+        return
+
+    # Export besar: satu job per (filter, isi, format), hasilnya dipakai ulang selama file masih ada
+    export_jobs = st.session_state.setdefault('export_jobs', {})
+    job = job_manager().get(export_jobs.get((filter_key, isi, fmt)))
+    if job is not None and job.status == SELESAI and (job.result is None or not os.path.exists(job.result)):
+        job = None
+    if job is None or job.status in (GAGAL, BATAL):
+        if job is not None and job.status == GAGAL:
+            st.error(f"Export gagal: {job.error}")
+        st.caption(f"{len(sheet):,} baris: file disiapkan di background, tombol download muncul setelah selesai.")
+        if st.button(f"Siapkan {isi} ({fmt})", key="export_siapkan"):
+            job = job_manager().submit(export_job, sheet, fmt, export_path(EXPORT_ISI[isi], fmt), label=file_name,
+                                       antrian='export')
+            export_jobs[(filter_key, isi, fmt)] = job.id
+    if job is not None and job.aktif:
+        panel_export_job(job.id)
+    elif job is not None and job.status == SELESAI:
+        st.download_button(f"⬇️ Download {isi} ({len(sheet):,} baris)", data=Path(job.result).read_bytes,
+                           file_name=file_name, mime=FORMAT_EXPORT[fmt], on_click="ignore", key="export_download")
+
 # --- 4. SIDEBAR CONTROLS ---
+# Profiler per rerun: load file, proses, filter & tiap chart tercatat di sini
+profiler = PipelineProfiler()
+
 st.sidebar.header("1. Data Source")
-uploaded_files = st.sidebar.file_uploader("Upload Report (Bisa Pilih Banyak File)", type=["xlsx", "csv"], accept_multiple_files=True)
+mode_list = ["Standar", "Streaming CSV (File Besar)"] + (["Hasil Batch"] if BATCH_DIR else []) + (["Riwayat"] if STORE_PATH else [])
+mode_ingest = st.sidebar.radio("Mode Ingest", mode_list, horizontal=True)
+mode_streaming = mode_ingest.startswith("Streaming")
+mode_batch = mode_ingest == "Hasil Batch"
+mode_riwayat = mode_ingest == "Riwayat"
+
+if mode_batch:
+    # Hasil batch.py sudah diproses penuh: dashboard cukup membaca data harian per job
+    uploaded_files = None
+    manifest = read_manifest(BATCH_DIR)
+    jobs = [j['job'] for j in manifest['jobs'] if j['status'] == 'ok'] if manifest else []
+    if not jobs:
+        st.sidebar.warning(f"Belum ada hasil batch di {BATCH_DIR}.")
+    else:
+        st.sidebar.caption(f"Batch selesai: {manifest['selesai']}")
+        sel_job = st.sidebar.selectbox("Job / Cabang", jobs)
+        if st.sidebar.button("Buka Hasil Batch 📦"):
+            with profiler.stage('baca_batch') as s:
+                df_batch = load_batch_result(BATCH_DIR, sel_job)
+                s['baris_keluar'] = len(df_batch)
+            simpan_hasil(df_batch, profiler)
+            st.success(f"Hasil batch '{sel_job}' dimuat ({len(df_batch):,} baris).")
+elif mode_riwayat:
+    # Riwayat semua upload sebelumnya (store SQLite): tanpa upload & parse ulang file lama
+    uploaded_files = None
+    info_store = attendance_store().info()
+    if not info_store['baris']:
+        st.sidebar.warning("Riwayat masih kosong. Proses file dengan opsi 'Simpan ke Riwayat' dulu.")
+    else:
+        st.sidebar.caption(f"Riwayat {info_store['awal']} s/d {info_store['akhir']}: {info_store['karyawan']:,} karyawan, "
+                           f"{info_store['baris']:,} baris ({info_store['mb']:.0f} MB)")
+        if st.sidebar.button("Buka Riwayat 🗄️"):
+            with profiler.stage('buka_riwayat') as s:
+                slicer_store = StoreSlicer(attendance_store())
+                s['baris_keluar'] = len(slicer_store)
+            buka_riwayat(slicer_store)
+else:
+    uploaded_files = st.sidebar.file_uploader("Upload Report (Bisa Pilih Banyak File)", type=["csv"] if mode_streaming else ["xlsx", "csv"], accept_multiple_files=True)
+
+if mode_streaming and DATA_DIR:
+    # Dump mesin absen yang terlalu besar untuk di-upload bisa dibaca langsung dari folder server
+    server_files = sorted(f for f in os.listdir(DATA_DIR) if f.lower().endswith('.csv'))
+    sel_server = st.sidebar.multiselect(f"CSV di Server ({DATA_DIR})", server_files)
+    uploaded_files = list(uploaded_files or []) + [os.path.join(DATA_DIR, f) for f in sel_server]
 
 if uploaded_files:
     # A. LOAD & MAPPING (MULTI-FILE LOGIC)
-    all_dfs = []
-    
-    for file in uploaded_files:
-        try:
-            df_temp = load_data_smart(file)
-            df_temp.columns = [str(c).strip() for c in df_temp.columns]
-            all_dfs.append(df_temp)
-        except Exception as e:
-            st.sidebar.error(f"Gagal load file: {file.name}. Error: {e}")
+    # Sekarang cuma header yang dibaca (untuk mapping); isi file di-parse / di-stream di job proses
+    with profiler.stage('scan_header'):
+        cols, load_errors = scan_columns(uploaded_files)
 
-    if all_dfs:
-        df_raw = pd.concat(all_dfs, ignore_index=True)
-        df_raw.columns = [str(c).strip() for c in df_raw.columns]
-        cols = df_raw.columns.tolist()
+    for name, msg in load_errors:
+        st.sidebar.error(f"Gagal load file: {name}. Error: {msg}")
 
+    if cols:
         st.sidebar.header("2. Mapping Kolom")
         def find(k): 
             for i,c in enumerate(cols): 
                 if any(x in c.upper() for x in k): return i
             return 0
 
+        format_data = st.sidebar.radio("Format Data", ["Harian (Masuk/Keluar)", "Raw Punch Log"], horizontal=True)
+        mode_punch = format_data == "Raw Punch Log"
+
         c_nama = st.sidebar.selectbox("Nama", cols, index=find(['NAMA','NAME']))
-        c_masuk = st.sidebar.selectbox("Absen Masuk", cols, index=find(['MASUK','IN']))
-        c_keluar = st.sidebar.selectbox("Absen Keluar", cols, index=find(['KELUAR','OUT']))
-        c_lokasi = st.sidebar.selectbox("Lokasi", cols, index=find(['LOKASI','LOC']))
-        c_catatan = st.sidebar.selectbox("Catatan", cols, index=find(['CATATAN','KET']))
+        if mode_punch:
+            # Log mesin fingerprint: 1 baris per punch, direduksi jadi masuk paling awal / keluar paling akhir
+            c_waktu = st.sidebar.selectbox("Waktu Punch", cols, index=find(['WAKTU','TIME','JAM','TANGGAL']))
+            c_lokasi = st.sidebar.selectbox("Lokasi / Device", cols, index=find(['LOKASI','LOC','DEVICE','MESIN']))
+        else:
+            c_masuk = st.sidebar.selectbox("Absen Masuk", cols, index=find(['MASUK','IN']))
+            c_keluar = st.sidebar.selectbox("Absen Keluar", cols, index=find(['KELUAR','OUT']))
+            c_lokasi = st.sidebar.selectbox("Lokasi", cols, index=find(['LOKASI','LOC']))
+            c_catatan = st.sidebar.selectbox("Catatan", cols, index=find(['CATATAN','KET']))
 
         # B. SETTINGS
         st.sidebar.header("3. Pengaturan")
         target_jam = 8.5
+
+        with st.sidebar.expander("Daftar Kantor (WFO)"):
+            kantor_text = st.text_area("Nama Kantor (1 per baris)", "\n".join(kantor_list), height=200)
+            geofence_file = st.file_uploader("Geofence Kantor (Kantor, Lat, Long, Radius)", type=["xlsx", "csv"])
+        kantor_registry = load_kantor_registry(kantor_text, geofence_file)
+        with st.sidebar.expander("Kalender Libur"):
+            libur_file = st.file_uploader("Libur Nasional / Cuti Bersama / Perusahaan (Tanggal, Keterangan, Jenis, Cabang)", type=["xlsx", "csv"])
+        try:
+            kalender = load_kalender(libur_file)
+        except Exception as e:
+            st.sidebar.error(f"Kalender libur gagal dibaca: {e}")
+            kalender = load_kalender()
+        masa_kerja_file = st.sidebar.file_uploader("Data Karyawan: Tgl Join / Resign (Opsional)", type=["xlsx", "csv"])
+        hemat_memori = st.sidebar.checkbox("Mode Hemat Memori", value=True, help="Simpan hasil proses dengan dtype ringkas (category/int kecil/float32) dan tanpa kolom teks mentah.")
+        # Hasil kedua backend identik, jadi backend tidak ikut cache key
+        backend = st.sidebar.selectbox("Backend Proses", BACKENDS, index=BACKENDS.index(BACKEND_DEFAULT), help="pandas = proses per langkah. arrow = join grid, status & kolom slicer sebagai satu query plan Arrow (multi-thread).")
+        simpan_riwayat = bool(STORE_PATH) and st.sidebar.checkbox("Simpan ke Riwayat", value=True, help="Hasil proses di-upsert ke store riwayat (per Nama & Tanggal), bisa dibuka lagi lewat mode Riwayat tanpa upload ulang.")
         
         if st.sidebar.button("Proses Dashboard 🚀"):
             st.session_state['processed'] = True 
             
             # --- 5. DATA PROCESSING ---
-            with st.spinner("Menggabungkan Data & Kalkulasi..."):
-                
-                # 1. Cleaning Basic
-                df_act = df_raw[[c_nama, c_masuk, c_keluar, c_lokasi, c_catatan]].copy()
-                df_act.columns = ['Nama', 'Masuk_Raw', 'Keluar_Raw', 'Lokasi', 'Catatan']
-
-                # 2. Parsing Date
-                df_act['Masuk_Obj'] = pd.to_datetime(df_act['Masuk_Raw'], errors='coerce')
-                df_act = df_act.dropna(subset=['Masuk_Obj']) 
-                
-                if df_act.empty:
-                    st.error("Format Tanggal/Waktu tidak terdeteksi. Pastikan format Excel seragam.")
-                    st.stop()
-
-                df_act['Tanggal'] = df_act['Masuk_Obj'].dt.date
-                df_act['Absen Masuk'] = df_act['Masuk_Obj']
-                df_act['Absen Keluar'] = pd.to_datetime(df_act['Keluar_Raw'], errors='coerce')
-
-                # ============================================================
-                # UPDATE: AUTO CHECKOUT 20:00 JIKA KOSONG
-                # ============================================================
-                def set_auto_checkout(row):
-                    # Jika Masuk ada, tapi Keluar NaT (Kosong)
-                    if pd.notnull(row['Absen Masuk']) and pd.isnull(row['Absen Keluar']):
-                        # Set keluar jam 20:00:00 pada hari yang sama dengan Masuk
-                        return row['Absen Masuk'].replace(hour=20, minute=0, second=0)
-                    return row['Absen Keluar']
-
-                df_act['Absen Keluar'] = df_act.apply(set_auto_checkout, axis=1)
-                # ============================================================
-
-                df_act['Lokasi'] = df_act['Lokasi'].fillna("").astype(str).str.upper()
-                df_act['Catatan'] = df_act['Catatan'].fillna("").astype(str).str.upper()
-
-                # 3. Cross Join (Master Data)
-                unique_names = df_act['Nama'].unique()
-                min_date = df_act['Tanggal'].min()
-                max_date = df_act['Tanggal'].max()
-                all_dates = pd.date_range(start=min_date, end=max_date)
-                
-                grid = list(itertools.product(unique_names, all_dates.date))
-                df_master = pd.DataFrame(grid, columns=['Nama', 'Tanggal'])
-                
-                df_act = df_act.drop_duplicates(subset=['Nama', 'Tanggal'], keep='last')
-                
-                df_final = pd.merge(df_master, df_act, on=['Nama', 'Tanggal'], how='left')
-
-                # --- 4. LOGIKA STATUS ---
-                def get_status(row):
-                    tgl = row['Tanggal']
-                    cat = str(row['Catatan']).strip().upper() if pd.notnull(row['Catatan']) else ""
-                    lok = str(row['Lokasi']).strip().upper() if pd.notnull(row['Lokasi']) else ""
-                    ada_absen = pd.notnull(row['Absen Masuk'])
-                    
-                    is_weekend = tgl.weekday() >= 5 
-
-                    # A. CEK HARI LIBUR NASIONAL
-                    if tgl in libur_nasional:
-                        if ada_absen:
-                            is_wfo = any(k in lok for k in kantor_list)
-                            return "Lembur Libur (WFO)" if is_wfo else "Lembur Libur (WFH)"
-                        return "Libur Nasional"
-
-                    # B. CEK SABTU / MINGGU
-                    if is_weekend:
-                        if ada_absen:
-                            is_wfo = any(k in lok for k in kantor_list)
-                            return "Lembur Weekend (WFO)" if is_wfo else "Lembur Weekend (WFH)"
-                        return "Libur Akhir Pekan"
-
-                    # C. HARI BIASA
-                    keywords_kerja = ['WFH', 'WFO', 'MASUK', 'WORK', '-', 'NAN', 'HADIR', '']
-                    is_catatan_kerja = any(k == cat or k in cat for k in keywords_kerja)
-                    
-                    if cat != "" and not is_catatan_kerja:
-                        return "Cuti" 
-
-                    if ada_absen:
-                        is_wfo = any(k in lok for k in kantor_list)
-                        return "WFO" if is_wfo else "WFH"
-                    
-                    return "Alpha"
-
-                df_final['Status'] = df_final.apply(get_status, axis=1)
-                
-                # Hitung Durasi & Performa
-                df_final['Durasi'] = (df_final['Absen Keluar'] - df_final['Absen Masuk']).dt.total_seconds() / 3600
-                df_final['Durasi'] = df_final['Durasi'].fillna(0).round(2)
-                
-                def cek_performa(val):
-                    if val == 0: return "-"
-                    return "Under" if val < target_jam else "On Track"
-                df_final['Performa'] = df_final['Durasi'].apply(cek_performa)
-
-                # --- EKSTRAKSI WAKTU UNTUK SLICER ---
-                df_final['Tanggal_DT'] = pd.to_datetime(df_final['Tanggal'])
-                df_final['Tahun'] = df_final['Tanggal_DT'].dt.year
-                df_final['Bulan'] = df_final['Tanggal_DT'].dt.month_name()
-                df_final['Bulan_Angka'] = df_final['Tanggal_DT'].dt.month
-                df_final['Minggu_Ke'] = df_final['Tanggal_DT'].dt.isocalendar().week
-
-                st.session_state['df_full'] = df_final
-                st.success(f"Berhasil menggabungkan {len(uploaded_files)} file !")
+            mapping = [c_nama, c_waktu, c_lokasi] if mode_punch else [c_nama, c_masuk, c_keluar, c_lokasi, c_catatan]
+
+            # Cache hasil lintas sesi: file yang sama + mapping + pengaturan -> langsung pakai hasil jadi
+            with profiler.stage('cache_key'):
+                pengaturan = [mapping, mode_punch, target_jam, hemat_memori, kantor_text, source_signature(geofence_file),
+                              source_signature(libur_file), source_signature(masa_kerja_file)]
+                file_sigs = [source_signature(f) for f in uploaded_files]
+                cache_key = result_key(file_sigs, *pengaturan)
+            hasil = shared_result_cache().get(cache_key)
+
+            # Job lama sesi ini yang masih jalan dibatalkan (digantikan hasil cache / job baru),
+            # supaya hasilnya tidak menimpa data yang dimuat sekarang saat job itu selesai
+            job_lama = job_manager().get(st.session_state.pop('job_id', None))
+            if job_lama is not None and job_lama.aktif:
+                job_lama.cancel()
+
+            if hasil is not None:
+                simpan_hasil(hasil['df'], profiler, hasil['cube'])
+                if simpan_riwayat and not attendance_store().has_sumber(cache_key):
+                    with profiler.stage('simpan_store', len(hasil['df'])):
+                        attendance_store().append(hasil['df'], cache_key)
+                tahun_kosong = kalender.tahun_belum_ada(hasil['df']['Tanggal'])
+                if tahun_kosong:
+                    st.warning(f"Kalender libur belum berisi tahun {', '.join(map(str, tahun_kosong))}: hari libur di tahun itu dianggap hari kerja.")
+                st.success(f"Berhasil menggabungkan {len(uploaded_files)} file ! (hasil dari cache bersama)")
+            else:
+                # Proses berat jalan sebagai job background (progress & tombol batal di halaman utama)
+                job = job_manager().submit(
+                    proses_job,
+                    [result_key(sig) for sig in file_sigs],
+                    None if mode_streaming else read_uploads(uploaded_files),
+                    stream_sources(uploaded_files) if mode_streaming else None,
+                    mapping, mode_punch,
+                    (masa_kerja_file.getvalue(), masa_kerja_file.name) if masa_kerja_file else None,
+                    kalender, kantor_registry, target_jam, hemat_memori,
+                    parsed_file_cache(), shared_result_cache(), cache_key, result_key(*pengaturan),
+                    st.session_state.get('basis'),
+                    attendance_store() if simpan_riwayat else None,
+                    backend=backend,
+                    label=f"{len(uploaded_files)} file",
+                )
+                st.session_state['job_id'] = job.id
 
     else:
         st.sidebar.warning("File kosong atau format tidak didukung.")
 
+# --- STATUS JOB PROSES ---
+# Job berjalan: tampilkan progress. Job berhenti: hasil / error dipakai sekali di rerun berikutnya.
+job = job_manager().get(st.session_state.get('job_id'))
+if job is not None and job.aktif:
+    panel_job(job.id)
+elif job is not None and st.session_state.get('job_selesai') != job.id:
+    st.session_state['job_selesai'] = job.id
+    for name, msg in job.partial.get('errors', []):
+        st.sidebar.error(f"Gagal load file: {name}. Error: {msg}")
+    if job.status == SELESAI and job.result is not None:
+        simpan_hasil(job.result['df'], job.profiler, job.result['cube'], job.result['slicer'])
+        # Basis upload berikutnya (activity per file + hasil), supaya tambah file cukup inkremental
+        st.session_state['basis'] = job.result['basis']
+        # Hasil sudah dipegang sesi: job tidak ikut menahan df / cube / basis di memori
+        hasil, job.result = job.result, None
+        tahun_kosong = hasil['tahun_kosong']
+        if tahun_kosong:
+            st.warning(f"Kalender libur belum berisi tahun {', '.join(map(str, tahun_kosong))}: hari libur di tahun itu dianggap hari kerja.")
+        if hasil['inkremental']:
+            st.success(f"Berhasil menggabungkan {job.label} ! Inkremental: {hasil['baris_berubah']:,} baris dihitung ulang ({job.detik():.1f} detik)")
+        else:
+            st.success(f"Berhasil menggabungkan {job.label} ! ({job.detik():.1f} detik)")
+    elif job.status == GAGAL:
+        st.error(f"Proses gagal: {job.error}")
+    elif job.status == BATAL:
+        st.info("Proses dibatalkan.")
+
 # --- 6. VISUALISASI & SLICER ---
 if 'df_full' in st.session_state:
+    if 'slicer' not in st.session_state:
+        st.session_state['df_full'] = sort_for_slicer(st.session_state['df_full'])
+        st.session_state['slicer'] = SlicerIndex(st.session_state['df_full'])
+        reset_view_cache()
+    if 'cube' not in st.session_state:
+        st.session_state['cube'] = build_cube(st.session_state['df_full'])
     df = st.session_state['df_full']
+    slicer = st.session_state['slicer']
+    cube = st.session_state['cube']
     
     # --- SLICER (SIDEBAR) ---
     st.sidebar.markdown("---")
     st.sidebar.header("4. Filter Data")
+    if 'df_full_mb' in st.session_state:
+        st.sidebar.caption(f"Memori data: {st.session_state['df_full_mb']:.1f} MB ({len(df):,} baris)")
+    elif df is None:
+        st.sidebar.caption(f"Sumber: riwayat ({len(slicer):,} baris di store, dimuat per filter)")
     
-    # 1. Tahun
-    sel_tahun = st.sidebar.multiselect("Tahun", sorted(df['Tahun'].unique()), default=sorted(df['Tahun'].unique()))
+    # 1. Tahun (riwayat multi-tahun: default tahun terakhir saja supaya slice yang dimuat kecil)
+    sel_tahun = st.sidebar.multiselect("Tahun", slicer.tahun_list, default=slicer.tahun_list if df is not None else slicer.tahun_list[-1:])
     
     # 2. Bulan
-    df_bulan_unik = df[['Bulan', 'Bulan_Angka']].drop_duplicates().sort_values('Bulan_Angka')
-    sel_bulan = st.sidebar.multiselect("Bulan", df_bulan_unik['Bulan'].tolist(), default=df_bulan_unik['Bulan'].tolist())
+    sel_bulan = st.sidebar.multiselect("Bulan", slicer.bulan_list, default=slicer.bulan_list)
     
     # 3. Minggu
-    if not df.empty:
-        min_week = int(df['Minggu_Ke'].min())
-        max_week = int(df['Minggu_Ke'].max())
+    if len(slicer):
+        min_week, max_week = slicer.minggu_range
         if min_week == max_week:
             sel_minggu = (min_week, max_week)
         else:
@@ -295,40 +714,54 @@ if 'df_full' in st.session_state:
         sel_minggu = (0,0)
         
     # 4. Karyawan
-    sel_karyawan = st.sidebar.multiselect("List Karyawan", sorted(df['Nama'].unique()), default=sorted(df['Nama'].unique()))
+    sel_karyawan = st.sidebar.multiselect("List Karyawan", slicer.nama_list, default=slicer.nama_list)
 
     # --- FILTERING ---
-    if not sel_tahun: sel_tahun = df['Tahun'].unique()
-    if not sel_bulan: sel_bulan = df['Bulan'].unique()
-    if not sel_karyawan: sel_karyawan = df['Nama'].unique()
-    
-    mask = (df['Tahun'].isin(sel_tahun) & 
-            df['Bulan'].isin(sel_bulan) & 
-            (df['Minggu_Ke'] >= sel_minggu[0]) & (df['Minggu_Ke'] <= sel_minggu[1]) & 
-            df['Nama'].isin(sel_karyawan))
+    if not sel_tahun: sel_tahun = slicer.tahun_list
+    if not sel_bulan: sel_bulan = slicer.bulan_list
+    if not sel_karyawan: sel_karyawan = slicer.nama_list
     
-    df_filtered = df[mask].copy()
+    # Hasil filter di-cache per kombinasi slicer; rerun dari widget lain (slider appraisal dll)
+    # tidak menghitung ulang. df_filtered tidak dimutasi, jadi boleh berupa view.
+    filter_key = (tuple(sel_tahun), tuple(sel_bulan), tuple(sel_minggu), tuple(sel_karyawan))
+    filter_cache = st.session_state['filter_cache']
+    if filter_key not in filter_cache:
+        with profiler.stage('filter', len(slicer)) as s:
+            filter_cache[filter_key] = slicer.filter(sel_tahun, sel_bulan, sel_minggu, sel_karyawan)
+            s['baris_keluar'] = len(filter_cache[filter_key])
+        while len(filter_cache) > MAX_CACHED_FILTERS:
+            filter_cache.popitem(last=False)
+    filter_cache.move_to_end(filter_key)
+    df_filtered = filter_cache[filter_key]
 
     # --- TAB MENU ---
-    tab1, tab2 = st.tabs(["📈 Dashboard Monitoring", "📝 Kalkulator Appraisal"])
+    tab1, tab2, tab3 = st.tabs(["📈 Dashboard Monitoring", "📝 Kalkulator Appraisal", "🏅 Ranking Appraisal"])
     
     # === TAB 1: DASHBOARD UTAMA ===
     with tab1:
         if df_filtered.empty:
             st.warning("Data kosong dengan filter ini.")
         else:
-            total_karyawan = df_filtered['Nama'].nunique()
-            avg_jam_global = df_filtered[df_filtered['Durasi']>0]['Durasi'].mean()
-            if pd.isna(avg_jam_global): avg_jam_global = 0
-            
-            total_under = len(df_filtered[df_filtered['Performa'] == 'Under'])
+            # KPI, pie, trend bulanan & ranking dijawab dari cube agregat (bukan scan data harian)
+            def build_kpi():
+                if cube is None:
+                    # Mode riwayat: agregat dihitung di store, yang dimuat cuma bucket hasil filter
+                    return slicer.cube(sel_tahun, sel_bulan, sel_minggu, sel_karyawan)
+                return slice_cube(cube, sel_tahun, sel_bulan, sel_minggu, sel_karyawan)
+
+            cube_filtered = memo_view('tab1_kpi', filter_key, build_kpi, len(cube) if cube is not None else None)
+            kpi = cube_kpi(cube_filtered)
+            df_per_nama = memo_view('per_nama', filter_key, lambda: cube_per_nama(cube_filtered), len(cube_filtered))
+            total_karyawan = kpi['total_karyawan']
+            avg_jam_global = kpi['avg_jam']
+            total_under = kpi['under']
             
             k1, k2, k3, k4, k5, k6 = st.columns(6)
             k1.metric("Total Karyawan", total_karyawan)
             k2.metric("Avg Jam Kerja", f"{avg_jam_global:.2f} Jam")
-            k3.metric("WFO Total", len(df_filtered[df_filtered['Status'].str.contains('WFO', na=False)]))
-            k4.metric("WFH Total", len(df_filtered[df_filtered['Status'].str.contains('WFH', na=False)]))
-            k5.metric("Alpha", len(df_filtered[df_filtered['Status'] == 'Alpha']), delta_color="inverse")
+            k3.metric("WFO Total", kpi['wfo'])
+            k4.metric("WFH Total", kpi['wfh'])
+            k5.metric("Alpha", kpi['alpha'], delta_color="inverse")
             k6.metric("Underperformance", f"{total_under}", delta="< 8.5 Jam", delta_color="inverse")
 
             st.markdown("---")
@@ -336,25 +769,15 @@ if 'df_full' in st.session_state:
             c1, c2 = st.columns(2)
             with c1:
                 st.subheader("Pie Chart Kehadiran")
-                color_map = {
-                    "Alpha": "#FF5252", "WFH": "#2196F3", "WFO": "#4CAF50", 
-                    "Cuti": "#FFC107", "Libur Nasional": "#9E9E9E",
-                    "Libur Akhir Pekan": "#BDBDBD", "Lembur Weekend (WFO)": "#1B5E20",
-                    "Lembur Weekend (WFH)": "#0D47A1", "Lembur Libur (WFO)": "#1B5E20",
-                    "Lembur Libur (WFH)": "#0D47A1"
-                }
-                df_pie = df_filtered['Status'].value_counts().reset_index()
-                df_pie.columns = ['Status', 'Jumlah']
-                fig_pie = px.pie(df_pie, values='Jumlah', names='Status', color='Status', color_discrete_map=color_map, hole=0.4)
+                fig_pie = memo_view('chart_pie', filter_key,
+                                    lambda: status_pie_figure(cube_status_counts(cube_filtered)), len(cube_filtered))
                 st.plotly_chart(fig_pie, use_container_width=True)
 
             with c2:
                 st.subheader("Monitoring Kepatuhan Bulanan")
-                df_monthly = df_filtered[df_filtered['Durasi']>0].groupby('Bulan_Angka')['Durasi'].mean().reset_index()
-                if not df_monthly.empty:
-                    df_monthly['Bulan'] = df_monthly['Bulan_Angka'].apply(lambda x: calendar.month_name[x])
-                    fig_monthly = px.line(df_monthly, x='Bulan', y='Durasi', markers=True, title="Trend Rata-rata Jam Kerja per Bulan")
-                    fig_monthly.add_hline(y=8.5, line_width=2, line_dash="dash", line_color="red")
+                fig_monthly = memo_view('chart_bulanan', filter_key,
+                                        lambda: monthly_hours_figure(cube_monthly_avg(cube_filtered)), len(cube_filtered))
+                if fig_monthly is not None:
                     st.plotly_chart(fig_monthly, use_container_width=True)
                 else:
                     st.info("Belum ada data durasi untuk grafik bulanan.")
@@ -362,13 +785,8 @@ if 'df_full' in st.session_state:
             c3, c4 = st.columns(2)
             with c3:
                 st.subheader("Monitoring Jam Kerja Harian")
-                df_hadir = df_filtered[df_filtered['Durasi'] > 0].sort_values('Tanggal')
-                if not df_hadir.empty:
-                    fig_line = px.line(df_hadir, x='Tanggal', y='Durasi', color='Nama', markers=True)
-                    fig_line.add_hline(y=8.5, line_width=2, line_dash="dash", line_color="red")
-                    st.plotly_chart(fig_line, use_container_width=True)
-                else:
-                    st.info("Belum ada data kehadiran harian.")
+                # Ganti mode tampilan cuma menjalankan ulang panel ini
+                panel_grafik_harian(filter_key, df_filtered)
             
             with c4:
                 st.subheader("Top Ranking")
@@ -378,12 +796,12 @@ if 'df_full' in st.session_state:
                 # --- TAB 1: JUMLAH KEHADIRAN ---
                 with tab_rank1:
                     # Sort Descending (Terbanyak ke Sedikit)
-                    df_present = df_filtered[df_filtered['Status'].str.contains('WF|Lembur', na=False)].groupby('Nama').size().reset_index(name='Jumlah Hadir')
+                    df_present = df_per_nama.loc[df_per_nama['Jumlah Hadir'] > 0, ['Nama', 'Jumlah Hadir']]
                     df_present = df_present.sort_values('Jumlah Hadir', ascending=False).head(3)
                     
                     if not df_present.empty:
-                        fig_top3_hadir = px.bar(df_present, x='Jumlah Hadir', y='Nama', orientation='h', text_auto=True, color_discrete_sequence=['#4CAF50'])
-                        fig_top3_hadir.update_layout(yaxis={'categoryorder':'total ascending'}) 
+                        fig_top3_hadir = memo_view('chart_top_hadir', filter_key,
+                                                   lambda: top3_figure(df_present, 'Jumlah Hadir', '#4CAF50'), len(df_per_nama))
                         st.plotly_chart(fig_top3_hadir, use_container_width=True)
                     else:
                         st.write("-")
@@ -391,12 +809,12 @@ if 'df_full' in st.session_state:
                 # --- TAB 2: JUMLAH ABSEN (ALPHA/CUTI) ---
                 with tab_rank2:
                     # Sort Descending (Terbanyak ke Sedikit)
-                    df_absent = df_filtered[df_filtered['Status'].isin(['Alpha', 'Cuti'])].groupby('Nama').size().reset_index(name='Jumlah Absen')
+                    df_absent = df_per_nama.loc[df_per_nama['Jumlah Absen'] > 0, ['Nama', 'Jumlah Absen']]
                     df_absent = df_absent.sort_values('Jumlah Absen', ascending=False).head(3)
                     
                     if not df_absent.empty:
-                        fig_top3_absen = px.bar(df_absent, x='Jumlah Absen', y='Nama', orientation='h', text_auto=True, color_discrete_sequence=['#FF5252'])
-                        fig_top3_absen.update_layout(yaxis={'categoryorder':'total ascending'})
+                        fig_top3_absen = memo_view('chart_top_absen', filter_key,
+                                                   lambda: top3_figure(df_absent, 'Jumlah Absen', '#FF5252'), len(df_per_nama))
                         st.plotly_chart(fig_top3_absen, use_container_width=True)
                     else:
                         st.success("Tidak ada ketidakhadiran (Alpha/Cuti).")
@@ -404,198 +822,50 @@ if 'df_full' in st.session_state:
                 # --- TAB 3: TOTAL JAM KERJA (BARU) ---
                 with tab_rank3:
                     # Hitung total durasi per nama
-                    df_hours = df_filtered.groupby('Nama')['Durasi'].sum().reset_index()
+                    df_hours = df_per_nama[['Nama', 'Durasi']]
                     df_hours = df_hours.sort_values('Durasi', ascending=False).head(3)
 
                     if not df_hours.empty:
-                        # Menggunakan warna Biru (#2196F3) untuk membedakan
-                        fig_top3_hours = px.bar(df_hours, x='Durasi', y='Nama', orientation='h', 
-                                                text_auto='.1f',  # Menampilkan angka desimal 1 digit di bar
-                                                color_discrete_sequence=['#2196F3'])
-                        
-                        fig_top3_hours.update_layout(
-                            yaxis={'categoryorder':'total ascending'},
-                            xaxis_title="Total Jam Kerja"
-                        )
+                        # Menggunakan warna Biru (#2196F3) untuk membedakan, angka desimal 1 digit di bar
+                        fig_top3_hours = memo_view('chart_top_jam', filter_key,
+                                                   lambda: top3_figure(df_hours, 'Durasi', '#2196F3', text_auto='.1f',
+                                                                       xaxis_title="Total Jam Kerja"), len(df_per_nama))
                         st.plotly_chart(fig_top3_hours, use_container_width=True)
                     else:
                         st.write("-")
 
             st.markdown("---")
             with st.expander("📂 Detail Data Karyawan", expanded=False):
-                cols_view = ['Tanggal', 'Nama', 'Status', 'Durasi', 'Performa', 'Masuk_Raw', 'Keluar_Raw']
-                df_detail = df_filtered[cols_view].copy()
-                df_detail['Tanggal'] = df_detail['Tanggal'].astype(str)
-
-                total_durasi = df_detail['Durasi'].sum()
-                total_hadir = len(df_detail[df_detail['Status'].str.contains('WFO|WFH|Lembur', na=False)])
-                
-                row_total = pd.DataFrame({
-                    'Tanggal': ['TOTAL KESELURUHAN'],
-                    'Nama': ['-'], 
-                    'Status': [f"Hadir: {total_hadir} Hari"], 
-                    'Durasi': [total_durasi], 
-                    'Performa': ['-'],
-                    'Masuk_Raw': ['-'],
-                    'Keluar_Raw': ['-']
-                })
-
-                df_final_view = pd.concat([df_detail, row_total], ignore_index=True)
-
-                def highlight_style(row):
-                    if row['Tanggal'] == 'TOTAL KESELURUHAN':
-                        return ['font-weight: bold; background-color: #cfd8dc; color: black'] * len(row)
-                    styles = [''] * len(row)
-                    if row['Durasi'] > 0 and row['Durasi'] < 8.5:
-                        styles = ['background-color: #ffcdd2'] * len(row)
-                    elif row['Status'] == 'Alpha':
-                        styles = ['background-color: #ffebee'] * len(row)
-                    return styles
-                
-                try:
-                    st.dataframe(df_final_view.style.apply(highlight_style, axis=1).format({'Durasi': '{:.2f}'}), use_container_width=True)
-                except:
-                    st.dataframe(df_final_view)
+                # Ganti halaman / ukuran halaman cuma menjalankan ulang tabel detail
+                panel_detail(filter_key, df_filtered, cube_filtered)
+            with st.expander("⬇️ Export Data (Excel / Parquet / CSV)", expanded=False):
+                panel_export(filter_key, df_filtered, cube_filtered)
 
     # === TAB 2: UPDATE APPRAISAL CALCULATOR===
     with tab2:
         st.header("🧮 Penilaian Kinerja Appraisal")
         st.info("Pilih karyawan untuk menghitung skor appraisal secara otomatis dan manual.")
-        
-        list_karyawan_app = sorted(df['Nama'].unique())
-        
-        col_sel_emp, col_dummy = st.columns([1, 2])
-        with col_sel_emp:
-            target_emp = st.selectbox("Pilih Karyawan:", list_karyawan_app) if list_karyawan_app else None
-        
-        if target_emp:
-            # Filter Data Khusus Karyawan Terpilih
-            df_emp = df_filtered[df_filtered['Nama'] == target_emp].copy()
-            
-            if df_emp.empty:
-                st.warning("Tidak ada data untuk karyawan ini di periode yang dipilih.")
-            else:
-                st.markdown("### A. Penilaian by System (Bobot 65%)")
-                
-                # --- 1. KPI ACHIEVEMENT (20%) ---
-                total_hari_hadir = len(df_emp[df_emp['Durasi'] > 0])
-                score_kpi_raw = (total_hari_hadir / 20) * 100
-                score_kpi = 100 if score_kpi_raw > 100 else score_kpi_raw
-                
-                # --- 2. PROJECT DEVELOPMENT (15%) [LOGIC BARU] ---
-                # Logic: Hitung nilai harian. Jika absen di hari kerja = 0.
-                list_skor_project = []
-                
-                for idx, row in df_emp.iterrows():
-                    durasi = row['Durasi']
-                    status = row['Status']
-                    
-                    # Cek apakah hari ini "Countable" (Wajib dinilai)
-                    # Hari yang TIDAK dinilai: Libur/Weekend TAPI tidak masuk (Durasi 0)
-                    is_holiday_weekend = any(x in status for x in ["Libur", "Akhir Pekan"])
-                    
-                    if is_holiday_weekend and durasi == 0:
-                        continue # Skip, jangan masukkan ke rata-rata (Exempt)
-                    
-                    # Hitung skor harian
-                    if durasi >= 8.5:
-                        skor_harian = 100
-                    else:
-                        skor_harian = (durasi / 8.5) * 100
-                    
-                    # Note: Jika Alpha (Status bukan Libur tapi Durasi 0), skor_harian otomatis 0
-                    list_skor_project.append(skor_harian)
-                
-                if len(list_skor_project) > 0:
-                    score_project = sum(list_skor_project) / len(list_skor_project)
-                else:
-                    score_project = 0
-                    
-                # Pembulatan agar rapi
-                score_project = round(score_project, 2)
-
-                # --- 3. KELENGKAPAN ABSENSI (10%) ---
-                total_days = len(df_emp)
-                libur_count = len(df_emp[df_emp['Status'].isin(['Libur Nasional', 'Libur Akhir Pekan'])])
-                wajib_kerja = total_days - libur_count
-                if wajib_kerja < 1: wajib_kerja = 1
-                
-                alpha_count = len(df_emp[df_emp['Status'] == 'Alpha'])
-                score_absensi = ((wajib_kerja - alpha_count) / wajib_kerja) * 100
-                if score_absensi < 0: score_absensi = 0
-
-                # --- 4. WFO Presence (20%) ---
-                jumlah_minggu = df_emp['Minggu_Ke'].nunique()
-                if jumlah_minggu < 1: jumlah_minggu = 1
-                
-                target_wfo_total = jumlah_minggu * 4
-                actual_wfo = len(df_emp[df_emp['Status'].str.contains('WFO', na=False)])
-                
-                score_wfo_raw = (actual_wfo / target_wfo_total) * 100
-                score_wfo = 100 if score_wfo_raw > 100 else score_wfo_raw
-
-                # TAMPILAN SYSTEM SCORE
-                c_sys1, c_sys2, c_sys3, c_sys4 = st.columns(4)
-                c_sys1.metric("2. KPI (20%)", f"{score_kpi:.1f}", f"{total_hari_hadir}/20 Hari")
-                # Update tampilan metrik Project
-                c_sys2.metric("7. Project (15%)", f"{score_project:.1f}", "Rata-rata Skor")
-                c_sys3.metric("3. Absensi (10%)", f"{score_absensi:.1f}", f"Alpha: {alpha_count}")
-                c_sys4.metric("5. WFO (20%)", f"{score_wfo:.1f}", f"{actual_wfo}/{target_wfo_total} Hari")
-
-                st.markdown("---")
-                st.markdown("### B. Penilaian Manual (Bobot 35%)")
-                st.caption("Geser slider atau ketik angka (0-100). Keduanya sinkron.")
-
-                # INPUT MANUAL DENGAN FUNGSI SYNC
-                # 1. Komunikasi (10%)
-                st.markdown("**1. Komunikasi (10%)**")
-                val_komunikasi = make_synced_input("Skor Komunikasi", "komunikasi", 80)
-                
-                st.markdown("<br>", unsafe_allow_html=True)
-                
-                # 4. Problem Solving (10%)
-                st.markdown("**4. Keahlian / Problem Solving (10%)**")
-                val_problem_solving = make_synced_input("Skor Problem Solving", "problem", 75)
-
-                st.markdown("<br>", unsafe_allow_html=True)
-
-                # 6. Kualitas Kerja (15%)
-                st.markdown("**6. Kualitas Kerja (15%)** - Inisiatif, laporan, diskusi, responsive")
-                val_kualitas = make_synced_input("Skor Kualitas", "kualitas", 80)
-
-                # --- FINAL CALCULATION ---
-                final_score = (
-                    (val_komunikasi * 0.10) +       # Manual 1
-                    (score_kpi * 0.20) +            # System 2
-                    (score_absensi * 0.10) +        # System 3
-                    (val_problem_solving * 0.10) +  # Manual 4
-                    (score_wfo * 0.20) +            # System 5
-                    (val_kualitas * 0.15) +         # Manual 6
-                    (score_project * 0.15)          # System 7
-                )
+        # Slider nilai manual cuma menjalankan ulang panel ini (final score, grade, radar)
+        panel_appraisal(filter_key, df_filtered, slicer.nama_list)
 
-                # Grade Logic
-                if final_score >= 90: grade = "A (Outstanding)"
-                elif final_score >= 80: grade = "B (Exceeds)"
-                elif final_score >= 70: grade = "C (Meets)"
-                elif final_score >= 50: grade = "D (Improvement)"
-                else: grade = "E (Unsatisfactory)"
-
-                st.markdown("---")
-                st.subheader(f"🏆 TOTAL SCORE: {final_score:.2f}")
-                st.info(f"Grade: **{grade}**")
-
-                # RADAR CHART
-                df_radar = pd.DataFrame({
-                    'Kategori': ['Komunikasi (10%)', 'KPI (20%)', 'Absensi (10%)', 'Prob. Solving (10%)', 'WFO (20%)', 'Kualitas (15%)', 'Project (15%)'],
-                    'Nilai': [val_komunikasi, score_kpi, score_absensi, val_problem_solving, score_wfo, val_kualitas, score_project]
-                })
-                
-                fig_radar = px.line_polar(df_radar, r='Nilai', theta='Kategori', line_close=True)
-                fig_radar.update_traces(fill='toself', line_color='#4CAF50')
-                fig_radar.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 100])))
-                st.plotly_chart(fig_radar, use_container_width=True)
+    # === TAB 3: RANKING APPRAISAL (SEMUA KARYAWAN) ===
+    with tab3:
+        st.header("🏅 Ranking Appraisal Semua Karyawan")
+        st.info("Skor system dihitung untuk semua karyawan di periode filter. Nilai manual diambil dari sheet (Nama, Komunikasi, Problem Solving, Kualitas); yang kosong memakai nilai default.")
+        panel_ranking(filter_key, df_filtered)
 
 else:
 
     st.info("👈 Silakan upload file Excel absensi Anda.")
+
+# --- 7. DIAGNOSTIK PIPELINE ---
+if st.sidebar.checkbox("Diagnostik Pipeline", value=False, help="Waktu, baris masuk/keluar & delta memori per stage. Log JSON yang sama ditulis ke logger 'hris.pipeline'."):
+    with st.sidebar.expander("⏱️ Diagnostik Pipeline", expanded=True):
+        if 'profil_proses' in st.session_state:
+            profil = st.session_state['profil_proses']
+            st.caption(f"Proses Dashboard terakhir: {profil['detik'].sum():.2f} detik")
+            st.dataframe(profil, use_container_width=True, hide_index=True)
+        st.caption(f"Rerun ini: {profiler.total_detik():.2f} detik (run {profiler.run_id})")
+        st.dataframe(profiler.frame(), use_container_width=True, hide_index=True)
+        st.caption("Cache hasil bersama (semua sesi)")
+        st.json(shared_result_cache().stats())
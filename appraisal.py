@@ -0,0 +1,152 @@
+import io
+import numpy as np
+import pandas as pd
+from engine import STATUS_LIST
+
+# --- APPRAISAL (SEMUA KARYAWAN SEKALIGUS) ---
+TARGET_HARI_KPI = 20
+TARGET_JAM = 8.5
+TARGET_WFO_PER_MINGGU = 4
+
+BOBOT = {
+    'Komunikasi': 0.10,       # Manual 1
+    'KPI': 0.20,              # System 2
+    'Absensi': 0.10,          # System 3
+    'Problem Solving': 0.10,  # Manual 4
+    'WFO': 0.20,              # System 5
+    'Kualitas': 0.15,         # Manual 6
+    'Project': 0.15,          # System 7
+}
+
+# Nilai default slider manual di Kalkulator Appraisal
+MANUAL_DEFAULT = {'Komunikasi': 80, 'Problem Solving': 75, 'Kualitas': 80}
+MANUAL_KEYWORDS = {
+    'Komunikasi': ['KOMUNIKASI'],
+    'Problem Solving': ['PROBLEM', 'KEAHLIAN'],
+    'Kualitas': ['KUALITAS'],
+}
+
+GRADES = [(90, "A (Outstanding)"), (80, "B (Exceeds)"), (70, "C (Meets)"), (50, "D (Improvement)")]
+GRADE_TERENDAH = "E (Unsatisfactory)"
+
+# Flag per status, dicek sekali per kategori (bukan per baris)
+STATUS_LIBUR = ['Libur Nasional', 'Libur Akhir Pekan']
+STATUS_TIDAK_DINILAI = [s for s in STATUS_LIST if "Libur" in s or "Akhir Pekan" in s]
+STATUS_WFO = [s for s in STATUS_LIST if 'WFO' in s]
+
+
+def system_scores(df):
+    # Skor system (KPI, Project, Absensi, WFO) per Nama dalam satu groupby
+    durasi = df['Durasi'].astype('float64').to_numpy()
+    status = df['Status'].astype(str)
+
+    # Hari wajib kerja dari kalender libur (kolom Hari_Kerja); data lama tanpa kolom itu
+    # pakai cara lama: semua baris selain status Libur
+    if 'Hari_Kerja' in df:
+        hari_kerja = df['Hari_Kerja'].to_numpy(dtype=bool)
+    else:
+        hari_kerja = ~status.isin(STATUS_LIBUR).to_numpy()
+
+    # Project: hari Libur/Weekend yang tidak masuk (Durasi 0) tidak ikut dirata-rata
+    dinilai = ~(status.isin(STATUS_TIDAK_DINILAI).to_numpy() & (durasi == 0))
+    skor_harian = np.where(durasi >= TARGET_JAM, 100.0, durasi / TARGET_JAM * 100)
+
+    parts = pd.DataFrame({
+        'Nama': df['Nama'].to_numpy(),
+        'Minggu_Ke': df['Minggu_Ke'].to_numpy(),
+        'hadir': durasi > 0,
+        'proj_sum': np.where(dinilai, skor_harian, 0.0),
+        'proj_n': dinilai,
+        'hari_kerja': hari_kerja,
+        'alpha': (status == 'Alpha').to_numpy(),
+        'wfo': status.isin(STATUS_WFO).to_numpy(),
+    })
+    g = parts.groupby('Nama', sort=True).agg(
+        hari_hadir=('hadir', 'sum'),
+        proj_sum=('proj_sum', 'sum'),
+        proj_n=('proj_n', 'sum'),
+        hari_kerja=('hari_kerja', 'sum'),
+        alpha=('alpha', 'sum'),
+        wfo=('wfo', 'sum'),
+        minggu=('Minggu_Ke', 'nunique'),
+    )
+
+    # --- 1. KPI ACHIEVEMENT (20%) ---
+    score_kpi = (g['hari_hadir'] / TARGET_HARI_KPI * 100).clip(upper=100)
+
+    # --- 2. PROJECT DEVELOPMENT (15%) ---
+    score_project = (g['proj_sum'] / g['proj_n'].where(g['proj_n'] > 0)).fillna(0).round(2)
+
+    # --- 3. KELENGKAPAN ABSENSI (10%) ---
+    wajib_kerja = g['hari_kerja'].clip(lower=1)
+    score_absensi = ((wajib_kerja - g['alpha']) / wajib_kerja * 100).clip(lower=0)
+
+    # --- 4. WFO Presence (20%) ---
+    target_wfo = g['minggu'].clip(lower=1) * TARGET_WFO_PER_MINGGU
+    score_wfo = (g['wfo'] / target_wfo * 100).clip(upper=100)
+
+    return pd.DataFrame({
+        'Hari Hadir': g['hari_hadir'],
+        'Alpha': g['alpha'],
+        'Hari WFO': g['wfo'],
+        'Target WFO': target_wfo,
+        'KPI': score_kpi,
+        'Project': score_project,
+        'Absensi': score_absensi,
+        'WFO': score_wfo,
+    })
+
+
+def load_manual_scores(df_manual):
+    # Sheet nilai manual: Nama + kolom Komunikasi / Problem Solving / Kualitas
+    cols = {str(c).strip().upper(): c for c in df_manual.columns}
+    c_nama = next((c for k, c in cols.items() if 'NAMA' in k or 'NAME' in k), None)
+    if c_nama is None:
+        raise ValueError("Kolom Nama tidak ditemukan di sheet nilai manual.")
+
+    manual = pd.DataFrame({'Nama': df_manual[c_nama].astype(str).str.strip()})
+    for field, keys in MANUAL_KEYWORDS.items():
+        c = next((c for k, c in cols.items() if any(x in k for x in keys)), None)
+        if c is not None:
+            manual[field] = pd.to_numeric(df_manual[c], errors='coerce').clip(0, 100)
+    return manual.drop_duplicates(subset=['Nama'], keep='last').set_index('Nama')
+
+
+def hitung_final_score(scores):
+    return sum(scores[k] * w for k, w in BOBOT.items())
+
+
+def grade_of(score):
+    for batas, grade in GRADES:
+        if score >= batas:
+            return grade
+    return GRADE_TERENDAH
+
+
+def appraisal_ranking(df, manual=None):
+    ranking = system_scores(df)
+    for field, default in MANUAL_DEFAULT.items():
+        nilai = manual[field] if manual is not None and field in manual else pd.Series(dtype=float)
+        ranking[field] = nilai.reindex(ranking.index).fillna(default)
+
+    skor = hitung_final_score(ranking)
+    ranking['Final Score'] = skor.round(2)
+    ranking['Grade'] = np.select([skor >= b for b, _ in GRADES], [g for _, g in GRADES], default=GRADE_TERENDAH)
+
+    ranking = ranking.sort_values('Final Score', ascending=False, kind='stable')
+    ranking = ranking.rename_axis('Nama').reset_index()
+    ranking.insert(0, 'Rank', np.arange(1, len(ranking) + 1))
+    return ranking
+
+
+def ranking_to_xlsx(ranking):
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        ranking.to_excel(writer, sheet_name='Appraisal', index=False)
+        sheet = writer.sheets['Appraisal']
+        sheet.freeze_panes(1, 2)
+        sheet.autofilter(0, 0, len(ranking), len(ranking.columns) - 1)
+        sheet.set_column(0, 0, 6)
+        sheet.set_column(1, 1, 30)
+        sheet.set_column(2, len(ranking.columns) - 1, 14)
+    return buffer.getvalue()
@@ -0,0 +1,190 @@
+import os
+from functools import reduce
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import acero
+from appraisal import TARGET_JAM
+from engine import cabang_per_baris, kantor_list, keywords_kerja, libur_nasional, master_grid_index
+from kalender import as_calendar
+from lokasi import as_registry, clean_text, contains_any
+from profiling import NULL_PROFILER
+
+# --- BACKEND PROSES ARROW (ACERO) ---
+# Join grid (Nama x Tanggal) dengan activity, Status, Durasi/Performa & kolom slicer
+# dinyatakan sebagai satu query plan Acero di atas memori Arrow. Plan baru jalan saat
+# to_table(), multi-thread (semua core, lihat pa.cpu_count()). Klasifikasi per nilai
+# (Lokasi WFO, Catatan cuti, libur per cabang) tetap pakai fungsi backend pandas, tapi
+# cuma atas nilai unik, lalu masuk plan sebagai value set is_in, jadi hasilnya identik.
+# Cleaning & parsing tanggal tetap di pandas: format tanggal ditebak pd.to_datetime dan
+# tidak ada padanan persisnya di Arrow.
+BACKENDS = ['pandas', 'arrow']
+BACKEND_DEFAULT = os.environ.get('HRIS_BACKEND', 'pandas')
+
+DETIK_PER_UNIT = {'s': 1, 'ms': 10**3, 'us': 10**6, 'ns': 10**9}
+NAMA_BULAN = list(pd.date_range('2000-01-01', periods=12, freq='MS').month_name())
+LABEL_PERFORMA = ["-", "Under", "On Track"]
+# Dtype kolom angka sama dengan backend pandas (dt.year / dt.month int32, isocalendar UInt32);
+# kolom teks (Status, Performa, Bulan) di-assign sebagai array object seperti backend pandas
+KOLOM_HASIL = {'Hari_Kerja': bool, 'Durasi': 'float64', 'Tahun': 'int32', 'Bulan_Angka': 'int32', 'Minggu_Ke': 'UInt32'}
+
+
+def _teks(s):
+    return pa.array(s.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+
+
+def _value_set(nilai, flag):
+    # Nilai unik (termasuk null) yang flag-nya True -> value set is_in
+    return pa.array([v for v, f in zip(nilai, flag) if f], type=pa.string(), from_pandas=True)
+
+
+def _unik(s):
+    return pd.Series(pd.unique(s), dtype=object)
+
+
+def _is_libur(hari, kalender, grid, masa_kerja):
+    # Libur umum, kecuali karyawan yang cabangnya punya override di kalender
+    ekspr = pc.is_in(hari, value_set=pa.array(kalender.holidays, type=pa.date32()))
+    cabang = cabang_per_baris(pd.Series(grid.names, dtype=object), masa_kerja)
+    if cabang is None:
+        return ekspr
+    cabang = clean_text(cabang).to_numpy()
+    for c, holidays in kalender.cabang_holidays.items():
+        kode = np.flatnonzero(cabang == c)
+        if len(kode):
+            ekspr = pc.if_else(pc.is_in(pc.field('_nama'), value_set=pa.array(kode, type=pa.int32())),
+                               pc.is_in(hari, value_set=pa.array(holidays, type=pa.date32())), ekspr)
+    return ekspr
+
+
+def process_grid_arrow(df_act, masa_kerja=None, libur=libur_nasional, kantor=kantor_list,
+                       target_jam=TARGET_JAM, profiler=NULL_PROFILER):
+    # Hasil = build_master_grid + kolom Status s/d Minggu_Ke (sebelum compact_frame / sort)
+    grid = master_grid_index(df_act, masa_kerja, profiler)
+    act = grid.act
+
+    with profiler.stage('arrow_plan', len(act)) as s:
+        kalender = as_calendar(libur)
+        masuk, keluar = act['Absen Masuk'], act['Absen Keluar']
+        # Selisih dihitung di unit yang lebih halus (seperti pandas)
+        unit = max((masuk.dt.unit, keluar.dt.unit), key=DETIK_PER_UNIT.get)
+        ts = pa.timestamp(unit)
+        kiri = pa.table({
+            '_pos': pa.array(grid.grid_pos, type=pa.int64()),
+            '_nama': pa.array(grid.grid_name, type=pa.int32()),
+            'Tanggal': pa.array(grid.dates.take(grid.grid_day)),
+        })
+        kanan = pa.table({
+            '_pos': pa.array(grid.pos, type=pa.int64()),
+            '_baris': pa.array(np.arange(len(act)), type=pa.int64()),
+            'Absen Masuk': pa.array(masuk, type=ts, from_pandas=True),
+            'Absen Keluar': pa.array(keluar, type=ts, from_pandas=True),
+            'Lokasi': _teks(act['Lokasi']),
+            'Catatan': _teks(act['Catatan']),
+        })
+
+        # Flag per nilai unik (+ null = sel grid tanpa absen), sama dengan compute_status
+        lokasi = pd.concat([_unik(act['Lokasi']), pd.Series([None], dtype=object)], ignore_index=True)
+        catatan = pd.concat([_unik(act['Catatan']), pd.Series([None], dtype=object)], ignore_index=True)
+        cat = clean_text(catatan)
+        wfo_set = _value_set(lokasi, as_registry(kantor).classify(lokasi))
+        cuti_set = _value_set(catatan, (cat != "").to_numpy() & ~contains_any(cat, keywords_kerja))
+
+        # Sisi activity: Lokasi/Catatan langsung jadi flag sebelum join (yang lewat join cuma bool)
+        absen = {
+            '_pos': pc.field('_pos'),
+            '_baris': pc.field('_baris'),
+            '_absen': pc.is_valid(pc.field('Absen Masuk')),
+            '_wfo': pc.is_in(pc.field('Lokasi'), value_set=wfo_set, skip_nulls=False),
+            '_cuti': pc.is_in(pc.field('Catatan'), value_set=cuti_set, skip_nulls=False),
+            # Durasi = total_seconds / 3600, fillna(0), round(2) -> urutan operasi float sama dengan pandas
+            '_durasi': pc.divide(pc.divide(
+                pc.subtract(pc.field('Absen Keluar'), pc.field('Absen Masuk')).cast(pa.int64()).cast(pa.float64()),
+                float(DETIK_PER_UNIT[unit])), 3600.0),
+        }
+        tgl = pc.field('Tanggal')
+        libur_hari = [i for i, m in enumerate(kalender.weekmask) if m == '0']
+        # Sel grid tanpa absen = null setelah join -> nilai flag null dari klasifikasi nilai unik
+        kosong = lambda c, nilai: pc.coalesce(pc.field(c), pa.scalar(nilai))
+        flag = {
+            '_pos': pc.field('_pos'),
+            '_baris': pc.coalesce(pc.field('_baris'), pa.scalar(-1, pa.int64())),
+            'libur': _is_libur(tgl.cast(pa.date32()), kalender, grid, masa_kerja),
+            'weekend': pc.is_in(pc.day_of_week(tgl), value_set=pa.array(libur_hari, type=pa.int64())),
+            'absen': kosong('_absen', False),
+            'wfo': kosong('_wfo', None in wfo_set.to_pylist()),
+            'cuti': kosong('_cuti', None in cuti_set.to_pylist()),
+            'Durasi': pc.round(kosong('_durasi', 0.0), 2),
+            'Tahun': pc.year(tgl),
+            'Bulan_Angka': pc.month(tgl),
+            'Minggu_Ke': pc.iso_week(tgl),
+        }
+        is_libur, is_weekend, ada_absen = pc.field('libur'), pc.field('weekend'), pc.field('absen')
+        is_wfo, is_cuti, durasi = pc.field('wfo'), pc.field('cuti'), pc.field('Durasi')
+
+        # Urutan kondisi = compute_status (A -> B -> C), if_else bersarang dari kondisi terakhir.
+        # Plan menghasilkan kode int8 (if_else atas string jauh lebih mahal), label dipasang di merge
+        aturan = [
+            (is_libur & ada_absen & is_wfo, "Lembur Libur (WFO)"),
+            (is_libur & ada_absen, "Lembur Libur (WFH)"),
+            (is_libur, "Libur Nasional"),
+            (is_weekend & ada_absen & is_wfo, "Lembur Weekend (WFO)"),
+            (is_weekend & ada_absen, "Lembur Weekend (WFH)"),
+            (is_weekend, "Libur Akhir Pekan"),
+            (is_cuti, "Cuti"),
+            (ada_absen & is_wfo, "WFO"),
+            (ada_absen, "WFH"),
+        ]
+        label_status = np.array([label for _, label in aturan] + ["Alpha"], dtype=object)
+        kode = lambda k: pa.scalar(k, pa.int8())
+        hasil_kolom = {
+            '_baris': pc.field('_baris'),
+            'Status': reduce(lambda lain, k: pc.if_else(aturan[k][0], kode(k), lain),
+                             reversed(range(len(aturan))), kode(len(aturan))),
+            'Hari_Kerja': pc.invert(is_weekend | is_libur),
+            'Durasi': durasi,
+            'Performa': pc.if_else(pc.equal(durasi, 0.0), kode(0),
+                                   pc.if_else(pc.less(durasi, float(target_jam)), kode(1), kode(2))),
+            'Tahun': pc.field('Tahun'),
+            'Bulan_Angka': pc.field('Bulan_Angka'),
+            'Minggu_Ke': pc.field('Minggu_Ke'),
+            '_pos': pc.field('_pos'),
+        }
+
+        sumber = lambda t: acero.Declaration('table_source', acero.TableSourceNodeOptions(t))
+        proyeksi = lambda kolom: acero.Declaration('project', acero.ProjectNodeOptions(list(kolom.values()), list(kolom)))
+        sisi_absen = acero.Declaration.from_sequence([sumber(kanan), proyeksi(absen)])
+        plan = acero.Declaration('hashjoin', acero.HashJoinNodeOptions(
+            'left outer', left_keys=['_pos'], right_keys=['_pos'],
+            left_output=['_pos', '_nama', 'Tanggal'],
+            right_output=['_baris', '_absen', '_wfo', '_cuti', '_durasi'],
+        ), inputs=[sumber(kiri), sisi_absen])
+        plan = acero.Declaration.from_sequence([
+            plan, proyeksi(flag), proyeksi(hasil_kolom),
+            acero.Declaration('order_by', acero.OrderByNodeOptions([('_pos', 'ascending')])),
+        ])
+        s['baris_keluar'] = len(kiri)
+
+    with profiler.stage('arrow_exec', len(kiri)) as s:
+        hasil = plan.to_table(use_threads=True)
+        s['baris_keluar'] = hasil.num_rows
+
+    with profiler.stage('merge', len(act)) as s:
+        # Kolom activity (termasuk teks mentah) diambil lewat posisi baris, sama dengan reindex build_master_grid
+        baris = hasil['_baris'].to_numpy()
+        df_final = act.drop(columns=['Nama', 'Tanggal']).reset_index(drop=True).reindex(baris).reset_index(drop=True)
+        df_final.insert(0, 'Nama', grid.names.take(grid.grid_name).to_numpy())
+        df_final.insert(1, 'Tanggal', grid.dates.take(grid.grid_day))
+        df_final['Status'] = label_status[hasil['Status'].to_numpy()]
+        for c in ['Hari_Kerja', 'Durasi']:
+            df_final[c] = hasil[c].to_numpy(zero_copy_only=False)
+        df_final['Performa'] = np.array(LABEL_PERFORMA, dtype=object)[hasil['Performa'].to_numpy()]
+        df_final['Tahun'] = hasil['Tahun'].to_numpy()
+        bulan = hasil['Bulan_Angka'].to_numpy()
+        df_final['Bulan'] = np.array(NAMA_BULAN, dtype=object)[bulan - 1]
+        df_final['Bulan_Angka'] = bulan
+        df_final['Minggu_Ke'] = hasil['Minggu_Ke'].to_numpy()
+        df_final = df_final.astype(KOLOM_HASIL)
+        s['baris_keluar'] = len(df_final)
+    return df_final
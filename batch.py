@@ -0,0 +1,238 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import pandas as pd
+from appraisal import appraisal_ranking, ranking_to_xlsx, TARGET_JAM
+from arrow_backend import BACKEND_DEFAULT
+from engine import kantor_list, libur_nasional
+from kalender import HolidayCalendar
+from loader import load_many, load_masa_kerja, read_bytes, write_parquet
+from lokasi import KantorRegistry
+from pipeline import build_views, ingest_activity, process_activity
+from profiling import PipelineProfiler, logger
+
+# --- BATCH CLI (TANPA STREAMLIT) ---
+# python batch.py EXPORT_DIR --config mapping.json --output hasil/ --format parquet excel
+# File langsung di EXPORT_DIR = satu job, tiap sub-folder (mis. per cabang) = satu job.
+# Job diproses paralel antar core; dashboard cukup membaca hasilnya (mode "Hasil Batch").
+EKSTENSI = ('.csv', '.xlsx', '.xlsm')
+FORMAT_OUTPUT = ['parquet', 'excel']
+EXCEL_MAX_ROWS = 1_048_575
+JOB_ROOT = '_semua'
+MANIFEST = 'manifest.json'
+ARTEFAK = ['harian', 'agregat', 'appraisal']  # <output>/<job>/<artefak>.parquet|.xlsx
+
+# Keyword auto-detect kolom (sama dengan sidebar app) kalau config tidak menyebut nama kolom
+KOLOM_KEYWORDS = {
+    'nama': ['NAMA', 'NAME'],
+    'masuk': ['MASUK', 'IN'],
+    'keluar': ['KELUAR', 'OUT'],
+    'lokasi': ['LOKASI', 'LOC'],
+    'catatan': ['CATATAN', 'KET'],
+    'waktu': ['WAKTU', 'TIME', 'JAM', 'TANGGAL'],
+}
+KOLOM_HARIAN = ['nama', 'masuk', 'keluar', 'lokasi', 'catatan']
+KOLOM_PUNCH = ['nama', 'waktu', 'lokasi']
+
+
+def load_config(path):
+    # {"format": "harian" | "punch", "kolom": {"nama": ..., ...}, "target_jam": 8.5,
+    #  "kantor": [...], "geofence": path, "kalender_libur": path, "masa_kerja": path, "hemat_memori": true,
+    #  "backend": "pandas" | "arrow"}
+    if not path:
+        return {}
+    with open(path) as f:
+        config = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    for key in ('geofence', 'kalender_libur', 'masa_kerja'):
+        if config.get(key) and not os.path.isabs(config[key]):
+            config[key] = os.path.join(base, config[key])
+    return config
+
+
+def resolve_mapping(columns, config):
+    fields = KOLOM_PUNCH if config.get('format') == 'punch' else KOLOM_HARIAN
+    kolom = config.get('kolom', {})
+    mapping = []
+    for field in fields:
+        if field in kolom:
+            if kolom[field] not in columns:
+                raise ValueError(f"Kolom '{kolom[field]}' ({field}) tidak ada. Kolom tersedia: {columns}")
+            mapping.append(kolom[field])
+        else:
+            # Tanpa UI untuk koreksi mapping: kolom yang tidak ketemu = error, bukan tebak kolom pertama
+            c = next((c for c in columns if any(k in c.upper() for k in KOLOM_KEYWORDS[field])), None)
+            if c is None:
+                raise ValueError(f"Kolom {field} tidak terdeteksi, isi 'kolom.{field}' di config. Kolom tersedia: {columns}")
+            mapping.append(c)
+    return mapping
+
+
+def discover_jobs(input_dir):
+    # Return list (nama_job, [path file])
+    jobs = []
+    entries = sorted(os.listdir(input_dir))
+    root = [os.path.join(input_dir, f) for f in entries if f.lower().endswith(EKSTENSI)]
+    if root:
+        jobs.append((JOB_ROOT, root))
+    for d in entries:
+        path = os.path.join(input_dir, d)
+        if os.path.isdir(path):
+            files = [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.lower().endswith(EKSTENSI)]
+            if files:
+                jobs.append((d, files))
+    return jobs
+
+
+def _write(df, path_base, formats, xlsx_bytes=None):
+    written = []
+    if 'parquet' in formats:
+        write_parquet(df, path_base + '.parquet')
+        written.append(path_base + '.parquet')
+    if 'excel' in formats:
+        if len(df) > EXCEL_MAX_ROWS:
+            logger.warning(json.dumps({'event': 'batch_skip_excel', 'file': path_base, 'baris': len(df)}))
+        else:
+            with open(path_base + '.xlsx', 'wb') as f:
+                if xlsx_bytes is not None:
+                    f.write(xlsx_bytes)
+                else:
+                    df.to_excel(f, index=False, engine='xlsxwriter')
+            written.append(path_base + '.xlsx')
+    return written
+
+
+def run_job(name, paths, config, output_dir, formats, load_workers=1):
+    t0 = time.perf_counter()
+    profiler = PipelineProfiler(job=name)
+
+    with profiler.stage('file_load') as s:
+        files = [(p, os.path.basename(p), read_bytes(p)) for p in paths]
+        dfs, errors = load_many(files, max_workers=load_workers)
+        if errors:
+            raise ValueError("; ".join(f"{n}: {m}" for n, m in errors))
+        df_raw = pd.concat([dfs[p] for p in paths], ignore_index=True, sort=False)
+        s['baris_keluar'] = len(df_raw)
+
+    punch = config.get('format') == 'punch'
+    mapping = resolve_mapping(df_raw.columns.tolist(), config)
+    df_act = ingest_activity(mapping, df_raw=df_raw, punch=punch, profiler=profiler)
+    del df_raw
+    if df_act.empty:
+        raise ValueError("Format Tanggal/Waktu tidak terdeteksi.")
+
+    kantor = config.get('kantor') or kantor_list
+    registry = KantorRegistry.from_file(config['geofence'], kantor) if config.get('geofence') else KantorRegistry(kantor)
+    kalender = HolidayCalendar.from_dict(libur_nasional)
+    if config.get('kalender_libur'):
+        kalender = HolidayCalendar.from_file(config['kalender_libur'], base=kalender)
+    masa_kerja = load_masa_kerja(config['masa_kerja']) if config.get('masa_kerja') else None
+
+    df_final = process_activity(df_act, masa_kerja, libur=kalender, kantor=registry,
+                                target_jam=config.get('target_jam', TARGET_JAM),
+                                hemat_memori=config.get('hemat_memori', True), profiler=profiler,
+                                backend=config.get('backend', BACKEND_DEFAULT))
+    cube, _ = build_views(df_final, profiler)
+    with profiler.stage('appraisal', len(df_final)) as s:
+        ranking = appraisal_ranking(df_final)
+        s['baris_keluar'] = len(ranking)
+
+    # Ditulis ke folder sementara lalu di-rename, jadi dashboard tidak pernah baca hasil setengah jadi
+    job_dir = os.path.join(output_dir, name)
+    tmp_dir = job_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    with profiler.stage('tulis_output', len(df_final)):
+        written = _write(df_final, os.path.join(tmp_dir, 'harian'), formats)
+        written += _write(cube, os.path.join(tmp_dir, 'agregat'), formats)
+        written += _write(ranking, os.path.join(tmp_dir, 'appraisal'), formats,
+                          xlsx_bytes=ranking_to_xlsx(ranking) if 'excel' in formats else None)
+        shutil.rmtree(job_dir, ignore_errors=True)
+        os.replace(tmp_dir, job_dir)
+    written = [os.path.join(job_dir, os.path.basename(p)) for p in written]
+
+    return {
+        'job': name, 'status': 'ok', 'file_input': len(paths), 'baris': len(df_final),
+        'karyawan': int(df_final['Nama'].nunique()),
+        'periode': [str(df_final['Tanggal'].min().date()), str(df_final['Tanggal'].max().date())],
+        'detik': round(time.perf_counter() - t0, 2), 'output': written,
+        'tahun_tanpa_libur': kalender.tahun_belum_ada(df_final['Tanggal']),
+    }
+
+
+def _run_job_safe(*args, **kwargs):
+    # Di worker: error satu job tidak menghentikan job lain
+    try:
+        return run_job(*args, **kwargs)
+    except Exception as e:
+        return {'job': args[0], 'status': 'gagal', 'error': f"{type(e).__name__}: {e}"}
+
+
+def run_batch(input_dir, config, output_dir, formats, workers=None):
+    jobs = discover_jobs(input_dir)
+    if not jobs:
+        raise SystemExit(f"Tidak ada file {EKSTENSI} di {input_dir}")
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    os.makedirs(output_dir, exist_ok=True)
+
+    hasil = []
+    if workers <= 1:
+        # Satu job (atau satu core): paralelnya di load file
+        for name, paths in jobs:
+            hasil.append(_run_job_safe(name, paths, config, output_dir, formats, load_workers=os.cpu_count()))
+    else:
+        ctx = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            futures = [pool.submit(_run_job_safe, name, paths, config, output_dir, formats) for name, paths in jobs]
+            for fut in as_completed(futures):
+                hasil.append(fut.result())
+
+    hasil.sort(key=lambda r: r['job'])
+    manifest = {'selesai': datetime.now().isoformat(timespec='seconds'), 'input': os.path.abspath(input_dir),
+                'config': config, 'format': formats, 'jobs': hasil}
+    with open(os.path.join(output_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=1, default=str)
+    return hasil
+
+
+def read_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_batch_result(output_dir, job):
+    # Data harian hasil batch (dtype ringkas ikut tersimpan di metadata parquet)
+    return pd.read_parquet(os.path.join(output_dir, job, 'harian.parquet'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Proses export absensi tanpa Streamlit (untuk cron malam)")
+    parser.add_argument('input_dir', help="folder export; sub-folder = satu job (mis. per cabang)")
+    parser.add_argument('--config', help="JSON mapping kolom & pengaturan")
+    parser.add_argument('--output', default='hasil_batch', help="folder output")
+    parser.add_argument('--format', nargs='+', choices=FORMAT_OUTPUT, default=['parquet'])
+    parser.add_argument('--workers', type=int, help="jumlah proses paralel (default: jumlah core)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    hasil = run_batch(args.input_dir, load_config(args.config), args.output, args.format, args.workers)
+    for r in hasil:
+        if r['status'] == 'ok':
+            print(f"[ok]    {r['job']}: {r['baris']:,} baris, {r['karyawan']:,} karyawan, {r['detik']} detik")
+        else:
+            print(f"[gagal] {r['job']}: {r['error']}", file=sys.stderr)
+    return 0 if all(r['status'] == 'ok' for r in hasil) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,228 @@
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from appraisal import appraisal_ranking, TARGET_JAM
+from arrow_backend import BACKENDS, BACKEND_DEFAULT
+from cube import slice_cube, cube_kpi, cube_status_counts, cube_monthly_avg, cube_per_nama
+from engine import build_master_grid, compute_status, get_status, kantor_list, libur_nasional, prepare_activity
+from kalender import HolidayCalendar
+from loader import load_and_normalize
+from lokasi import KantorRegistry
+from pipeline import build_views, ingest_activity, process_activity
+from profiling import PipelineProfiler
+
+# --- BENCHMARK PIPELINE (DATA SINTETIS) ---
+# Jalankan: python benchmark.py --preset quick
+# Hasil (teks) di-append ke bench_output.txt, hasil JSON (--json) bisa dibandingkan antar
+# commit dengan --compare supaya regresi kelihatan sebelum deploy.
+PRESET = {
+    'quick': {'karyawan': [100, 1000], 'bulan': [1, 3]},
+    'standar': {'karyawan': [100, 1000, 10_000], 'bulan': [1, 3, 12]},
+    'full': {'karyawan': [100, 1000, 10_000, 50_000], 'bulan': [1, 3, 6, 12]},
+}
+OUTPUT_FILE = 'bench_output.txt'
+MAPPING = ['Nama', 'Absen Masuk', 'Absen Keluar', 'Lokasi', 'Catatan']
+REGRESI_PERSEN = 20  # --compare: tandai stage yang lebih lambat dari ini
+
+LOKASI_NON_KANTOR = ["RUMAH", "CAFE", "CO-WORKING", "-6.2001, 106.8166", ""]
+CATATAN_KERJA = ["", "", "", "WFH", "HADIR"]
+CATATAN_CUTI = ["CUTI TAHUNAN", "SAKIT", "IZIN"]
+
+
+# --- GENERATOR EXPORT ABSENSI ---
+def generate_export(n_karyawan, n_bulan, start='2025-01-01', seed=0, header_offset=2):
+    # CSV dengan format export mesin absen: baris judul di atas header, checkout hilang,
+    # catatan cuti, lembur weekend dan lokasi kantor / non-kantor
+    rng = np.random.default_rng(seed)
+    tanggal = pd.date_range(start, pd.Timestamp(start) + pd.DateOffset(months=n_bulan) - pd.Timedelta(days=1))
+    n_hari = len(tanggal)
+
+    nama = np.repeat(np.array([f"Karyawan {i:05d}" for i in range(n_karyawan)], dtype=object), n_hari)
+    hari = np.tile(tanggal.to_numpy(), n_karyawan)
+    weekend = np.tile(tanggal.weekday.to_numpy() >= 5, n_karyawan)
+
+    n = len(nama)
+    u = rng.random(n)
+    cuti = ~weekend & (u < 0.02)
+    masuk_ok = np.where(weekend, u < 0.05, (u >= 0.02) & (u < 0.92))
+    baris = masuk_ok | cuti
+
+    menit_masuk = rng.integers(7 * 60, 10 * 60, n)
+    durasi_menit = rng.normal(TARGET_JAM * 60, 75, n).clip(60, 14 * 60).astype(int)
+    masuk = hari + (menit_masuk * 60).astype('timedelta64[s]')
+    keluar = masuk + (durasi_menit * 60).astype('timedelta64[s]')
+    tanpa_checkout = rng.random(n) < 0.05
+
+    kantor = np.array(kantor_list, dtype=object)
+    non_kantor = np.array(LOKASI_NON_KANTOR, dtype=object)
+    di_kantor = rng.random(n) < 0.65
+    lokasi = np.where(di_kantor, kantor[rng.integers(0, len(kantor), n)],
+                      non_kantor[rng.integers(0, len(non_kantor), n)])
+    catatan = np.where(cuti, np.array(CATATAN_CUTI, dtype=object)[rng.integers(0, len(CATATAN_CUTI), n)],
+                       np.array(CATATAN_KERJA, dtype=object)[rng.integers(0, len(CATATAN_KERJA), n)])
+
+    df = pd.DataFrame({
+        'Nama': nama[baris],
+        # Baris cuti tetap punya jam masuk: prepare_activity membuang baris tanpa Absen Masuk.
+        # Catatan cuti jadi ikut diproses, tapi status "Cuti" sendiri belum pernah keluar selama
+        # keywords_kerja (engine.py) berisi '' -> baris ini tetap berstatus WFO / WFH
+        'Absen Masuk': masuk[baris],
+        'Absen Keluar': pd.Series(keluar[baris]).where(~tanpa_checkout[baris]),
+        'Lokasi': lokasi[baris],
+        'Catatan': catatan[baris],
+    })
+
+    buffer = io.StringIO()
+    for i in range(header_offset):
+        buffer.write("LAPORAN KEHADIRAN KARYAWAN\n" if i == 0 else f"Periode: {tanggal[0].date()} s/d {tanggal[-1].date()}\n")
+    df.to_csv(buffer, index=False, date_format='%Y-%m-%d %H:%M:%S')
+    return buffer.getvalue().encode('utf-8')
+
+
+def run_scenario(n_karyawan, n_bulan, seed=0, track_memory=True, backend=BACKEND_DEFAULT):
+    # Stage sama persis dengan yang dijalankan app (pipeline.py + profiler per stage)
+    data = generate_export(n_karyawan, n_bulan, seed=seed)
+    kalender = HolidayCalendar.from_dict(libur_nasional)
+    registry = KantorRegistry(kantor_list)
+    profiler = PipelineProfiler(memory='tracemalloc' if track_memory else None, log=False)
+
+    if track_memory:
+        tracemalloc.start()
+    try:
+        with profiler.stage('load_data_smart') as s:
+            df_raw = load_and_normalize(data, 'absen.csv')
+            s['baris_keluar'] = len(df_raw)
+        df_act = ingest_activity(MAPPING, df_raw=df_raw, profiler=profiler)
+        del df_raw
+        df = process_activity(df_act, libur=kalender, kantor=registry, profiler=profiler, backend=backend)
+        del df_act
+        cube, slicer = build_views(df, profiler)
+
+        with profiler.stage('filter', len(df)) as s:
+            # Filter khas sidebar: semua, satu bulan, 10 nama, range minggu sempit
+            minggu = slicer.minggu_range
+            hasil = [
+                slicer.filter(slicer.tahun_list, slicer.bulan_list, minggu, slicer.nama_list),
+                slicer.filter(slicer.tahun_list, slicer.bulan_list[:1], minggu, slicer.nama_list),
+                slicer.filter(slicer.tahun_list, slicer.bulan_list, minggu, slicer.nama_list[:10]),
+                slicer.filter(slicer.tahun_list, slicer.bulan_list, (minggu[0], minggu[0] + 1), slicer.nama_list),
+            ]
+            s['baris_keluar'] = sum(len(h) for h in hasil)
+        with profiler.stage('tab1_agregat', len(cube)) as s:
+            cube_f = slice_cube(cube, slicer.tahun_list, slicer.bulan_list, slicer.minggu_range, slicer.nama_list)
+            cube_kpi(cube_f)
+            cube_status_counts(cube_f)
+            cube_monthly_avg(cube_f)
+            cube_per_nama(cube_f)
+            s['baris_keluar'] = len(cube_f)
+        with profiler.stage('appraisal', len(df)) as s:
+            s['baris_keluar'] = len(appraisal_ranking(df))
+    finally:
+        if track_memory:
+            tracemalloc.stop()
+
+    for info in profiler.records:
+        info.update({'karyawan': n_karyawan, 'bulan': n_bulan})
+    return profiler.records
+
+
+def cek_status_parity(n_sample=2000, seed=0):
+    # compute_status (kolomnar) vs get_status (row-wise) di sampel data sintetis
+    df_act = prepare_activity(load_and_normalize(generate_export(50, 3, seed=seed), 'absen.csv'), MAPPING)
+    df = build_master_grid(df_act)
+    df = df.sample(min(n_sample, len(df)), random_state=seed)
+    return int((df.apply(get_status, axis=1).to_numpy() != compute_status(df).to_numpy()).sum())
+
+
+# --- OUTPUT & PERBANDINGAN ---
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or '-'
+    except OSError:
+        return '-'
+
+
+def format_tabel(hasil, pembanding=None):
+    lama = {}
+    for r in pembanding or []:
+        lama[(r['karyawan'], r['bulan'], r['stage'])] = r['detik']
+
+    lines = [f"{'karyawan':>9} {'bulan':>5} {'stage':<16} {'baris':>12} {'detik':>9} {'peak MB':>9} {'vs lama':>9}"]
+    for r in hasil:
+        ref = lama.get((r['karyawan'], r['bulan'], r['stage']))
+        banding = ''
+        if ref:
+            persen = (r['detik'] / ref - 1) * 100
+            banding = f"{persen:+.0f}%" + (' !' if persen > REGRESI_PERSEN else '')
+        peak = f"{r['peak_mb']:.1f}" if 'peak_mb' in r else '-'
+        baris = r.get('baris_keluar') or 0
+        lines.append(f"{r['karyawan']:>9,} {r['bulan']:>5} {r['stage']:<16} {baris:>12,} "
+                     f"{r['detik']:>9.3f} {peak:>9} {banding:>9}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline dashboard HRIS dengan data sintetis")
+    parser.add_argument('--preset', choices=sorted(PRESET), default='quick')
+    parser.add_argument('--karyawan', type=int, nargs='+', help="override jumlah karyawan")
+    parser.add_argument('--bulan', type=int, nargs='+', help="override jumlah bulan")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', choices=BACKENDS, default=BACKEND_DEFAULT, help="backend proses (pipeline.process_activity)")
+    parser.add_argument('--tanpa-memori', action='store_true', help="tanpa tracemalloc (timing lebih murni)")
+    parser.add_argument('--json', help="simpan hasil sebagai JSON (untuk --compare di commit lain)")
+    parser.add_argument('--compare', help="file JSON hasil run sebelumnya")
+    parser.add_argument('--cek-status', action='store_true', help="cek parity compute_status vs get_status")
+    parser.add_argument('--export', help="simpan CSV sintetis ke folder ini lalu keluar")
+    args = parser.parse_args()
+
+    karyawan = args.karyawan or PRESET[args.preset]['karyawan']
+    bulan = args.bulan or PRESET[args.preset]['bulan']
+
+    if args.export:
+        os.makedirs(args.export, exist_ok=True)
+        for k in karyawan:
+            for b in bulan:
+                path = os.path.join(args.export, f"absen_{k}karyawan_{b}bulan.csv")
+                with open(path, 'wb') as f:
+                    f.write(generate_export(k, b, seed=args.seed))
+                print(path)
+        return
+
+    if args.cek_status:
+        print(f"Parity status: {cek_status_parity(seed=args.seed)} baris beda")
+
+    hasil = []
+    for k in karyawan:
+        for b in bulan:
+            hasil.extend(run_scenario(k, b, seed=args.seed, track_memory=not args.tanpa_memori,
+                                       backend=args.backend))
+
+    pembanding = None
+    if args.compare:
+        with open(args.compare) as f:
+            pembanding = json.load(f)['hasil']
+
+    meta = {'commit': git_commit(), 'waktu': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+            'cpu': os.cpu_count(), 'backend': args.backend}
+    teks = (f"# commit {meta['commit']} | {meta['waktu']} | python {meta['python']} | "
+            f"pandas {meta['pandas']} | numpy {meta['numpy']} | cpu {meta['cpu']} | backend {meta['backend']}\n"
+            + format_tabel(hasil, pembanding) + "\n")
+    print(teks)
+    with open(OUTPUT_FILE, 'a') as f:
+        f.write(teks + "\n")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'meta': meta, 'hasil': hasil}, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+import calendar
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# --- GRAFIK "MONITORING JAM KERJA HARIAN" ---
+# Payload plotly dibatasi: sedikit karyawan -> 1 trace per orang (WebGL kalau titiknya banyak),
+# banyak karyawan -> band persentil per hari/minggu + beberapa outlier saja.
+MODE_GRAFIK = ["Auto", "Per Karyawan", "Band Persentil"]
+MAX_TRACE_NAMA = 30          # di atas ini pakai band persentil (juga kalau Per Karyawan dipilih manual)
+WEBGL_MIN_POINTS = 1500      # di atas ini trace per karyawan pakai WebGL (scattergl)
+MAX_POINTS_PER_KARYAWAN = 20_000
+MAX_HARI_HARIAN = 120        # range lebih panjang -> titik diagregasi per minggu
+TOP_OUTLIER = 5
+
+
+def _bucket(tanggal, mingguan):
+    return tanggal.dt.to_period('W').dt.start_time if mingguan else tanggal
+
+
+def _per_karyawan(df_hadir, mingguan):
+    data = pd.DataFrame({
+        'Tanggal': _bucket(df_hadir['Tanggal'], mingguan),
+        'Nama': df_hadir['Nama'].astype(str),
+        'Durasi': df_hadir['Durasi'].astype('float64'),
+    })
+    if mingguan:
+        data = data.groupby(['Nama', 'Tanggal'], as_index=False)['Durasi'].mean()
+        data['Durasi'] = data['Durasi'].round(2)
+    return data.sort_values(['Nama', 'Tanggal'])
+
+
+def _band_persentil(df_hadir, mingguan, top_n):
+    tanggal = _bucket(df_hadir['Tanggal'], mingguan)
+    durasi = df_hadir['Durasi'].astype('float64')
+
+    band = durasi.groupby(tanggal).quantile([0.1, 0.5, 0.9]).unstack()
+    band.columns = ['p10', 'p50', 'p90']
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=band.index, y=band['p90'], mode='lines', line=dict(width=0),
+                             showlegend=False, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=band.index, y=band['p10'], mode='lines', line=dict(width=0),
+                             fill='tonexty', fillcolor='rgba(33,150,243,0.2)', name='P10 - P90'))
+    fig.add_trace(go.Scatter(x=band.index, y=band['p50'], mode='lines+markers',
+                             line=dict(color='#2196F3'), name='Median'))
+
+    # Outlier = karyawan dengan rata-rata jam paling jauh dari median keseluruhan
+    rata2 = durasi.groupby(df_hadir['Nama'].astype(str)).mean()
+    outlier = (rata2 - durasi.median()).abs().nlargest(top_n).index
+    data = _per_karyawan(df_hadir[df_hadir['Nama'].astype(str).isin(outlier)], mingguan)
+    if not mingguan:
+        data = data.groupby(['Nama', 'Tanggal'], as_index=False)['Durasi'].mean()
+    for nama, d in data.groupby('Nama'):
+        fig.add_trace(go.Scattergl(x=d['Tanggal'], y=d['Durasi'], mode='lines+markers',
+                                   name=nama, opacity=0.8))
+    fig.update_layout(xaxis_title='Tanggal', yaxis_title='Durasi')
+    return fig
+
+
+def daily_hours_figure(df_hadir, target_jam=8.5, mode="Auto", top_n=TOP_OUTLIER):
+    # Return (figure, keterangan mode yang dipakai)
+    n_nama = df_hadir['Nama'].nunique()
+    n_hari = df_hadir['Tanggal'].nunique()
+    catatan = ""
+    if mode == "Auto":
+        mode = "Per Karyawan" if n_nama <= MAX_TRACE_NAMA else "Band Persentil"
+    elif mode == "Per Karyawan" and n_nama > MAX_TRACE_NAMA:
+        # Satu trace per orang tidak dibatasi -> payload kembali membengkak
+        mode = "Band Persentil"
+        catatan = f" (Per Karyawan maks. {MAX_TRACE_NAMA} karyawan, filter Nama untuk melihat per orang)"
+
+    mingguan = n_hari > MAX_HARI_HARIAN
+    if mode == "Per Karyawan":
+        mingguan = mingguan and len(df_hadir) > MAX_POINTS_PER_KARYAWAN
+        data = _per_karyawan(df_hadir, mingguan)
+        render_mode = 'webgl' if len(data) > WEBGL_MIN_POINTS else 'svg'
+        fig = px.line(data, x='Tanggal', y='Durasi', color='Nama', markers=True, render_mode=render_mode)
+        info = f"{n_nama} karyawan, {len(data):,} titik ({render_mode.upper()})"
+    else:
+        fig = _band_persentil(df_hadir, mingguan, top_n)
+        info = f"Band P10-P90 dari {n_nama} karyawan + top {top_n} outlier"
+
+    if mingguan:
+        info += ", rata-rata mingguan"
+    info += catatan
+    fig.add_hline(y=target_jam, line_width=2, line_dash="dash", line_color="red")
+    return fig, info
+
+
+# --- GRAFIK TAB 1 & APPRAISAL ---
+# Figure dibangun dari agregat kecil (cube hasil slice / skor satu karyawan); app.py menyimpan
+# hasilnya per kombinasi filter, jadi rerun yang tidak mengubah filter tidak membangun ulang.
+STATUS_COLORS = {
+    "Alpha": "#FF5252", "WFH": "#2196F3", "WFO": "#4CAF50",
+    "Cuti": "#FFC107", "Libur Nasional": "#9E9E9E",
+    "Libur Akhir Pekan": "#BDBDBD", "Lembur Weekend (WFO)": "#1B5E20",
+    "Lembur Weekend (WFH)": "#0D47A1", "Lembur Libur (WFO)": "#1B5E20",
+    "Lembur Libur (WFH)": "#0D47A1"
+}
+RADAR_KATEGORI = {
+    'Komunikasi': 'Komunikasi (10%)', 'KPI': 'KPI (20%)', 'Absensi': 'Absensi (10%)',
+    'Problem Solving': 'Prob. Solving (10%)', 'WFO': 'WFO (20%)', 'Kualitas': 'Kualitas (15%)',
+    'Project': 'Project (15%)',
+}
+
+
+def status_pie_figure(df_pie):
+    return px.pie(df_pie, values='Jumlah', names='Status', color='Status', color_discrete_map=STATUS_COLORS, hole=0.4)
+
+
+def monthly_hours_figure(df_monthly, target_jam=8.5):
+    # None kalau belum ada data durasi
+    if df_monthly.empty:
+        return None
+    df_monthly = df_monthly.assign(Bulan=df_monthly['Bulan_Angka'].map(lambda x: calendar.month_name[x]))
+    fig = px.line(df_monthly, x='Bulan', y='Durasi', markers=True, title="Trend Rata-rata Jam Kerja per Bulan")
+    fig.add_hline(y=target_jam, line_width=2, line_dash="dash", line_color="red")
+    return fig
+
+
+def top3_figure(df_top, kolom, color, text_auto=True, xaxis_title=None):
+    fig = px.bar(df_top, x=kolom, y='Nama', orientation='h', text_auto=text_auto, color_discrete_sequence=[color])
+    fig.update_layout(yaxis={'categoryorder': 'total ascending'})
+    if xaxis_title:
+        fig.update_layout(xaxis_title=xaxis_title)
+    return fig
+
+
+def radar_figure(scores):
+    # scores: dict komponen appraisal (BOBOT) -> nilai 0-100
+    df_radar = pd.DataFrame({'Kategori': list(RADAR_KATEGORI.values()),
+                             'Nilai': [scores[k] for k in RADAR_KATEGORI]})
+    fig = px.line_polar(df_radar, r='Nilai', theta='Kategori', line_close=True)
+    fig.update_traces(fill='toself', line_color='#4CAF50')
+    fig.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 100])))
+    return fig
@@ -0,0 +1 @@
+# Modul app ada di root repo (tanpa package): root masuk sys.path lewat conftest ini
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from engine import STATUS_LIST
+
+# --- CUBE AGREGAT (NAMA x TAHUN/BULAN/MINGGU) ---
+# Satu baris per Nama x bucket waktu. Bucket = kombinasi slicer (Tahun, Bulan, Minggu_Ke),
+# jadi semua filter sidebar bisa dijawab dari cube tanpa scan data harian.
+CUBE_KEYS = ['Nama', 'Tahun', 'Bulan', 'Bulan_Angka', 'Minggu_Ke']
+
+STATUS_WFO = [s for s in STATUS_LIST if 'WFO' in s]
+STATUS_WFH = [s for s in STATUS_LIST if 'WFH' in s]
+STATUS_HADIR = [s for s in STATUS_LIST if 'WF' in s or 'Lembur' in s]
+STATUS_ABSEN = ['Alpha', 'Cuti']
+
+
+def build_cube(df):
+    durasi = df['Durasi'].astype('float64')
+    ada_durasi = durasi > 0
+
+    status = pd.Categorical(df['Status'], categories=STATUS_LIST)
+    parts = pd.get_dummies(status, dtype='int32')
+    parts.index = df.index
+    parts['Baris'] = np.int32(1)
+    parts['Durasi_Total'] = durasi
+    parts['Durasi_Hadir'] = durasi.where(ada_durasi, 0.0)
+    parts['Hari_Durasi'] = ada_durasi.astype('int32')
+    parts['Under'] = (df['Performa'] == 'Under').astype('int32')
+
+    keys = [df[k] for k in CUBE_KEYS]
+    cube = parts.groupby(keys, observed=True, sort=False, dropna=False).sum().reset_index()
+    return cube
+
+
+def slice_cube(cube, tahun, bulan, minggu, nama):
+    mask = (cube['Tahun'].isin(tahun) &
+            cube['Bulan'].isin(bulan) &
+            (cube['Minggu_Ke'] >= minggu[0]) & (cube['Minggu_Ke'] <= minggu[1]) &
+            cube['Nama'].isin(nama))
+    return cube[mask]
+
+
+def cube_kpi(cube):
+    hari_durasi = cube['Hari_Durasi'].sum()
+    return {
+        'total_karyawan': cube.loc[cube['Baris'] > 0, 'Nama'].nunique(),
+        'avg_jam': cube['Durasi_Hadir'].sum() / hari_durasi if hari_durasi else 0,
+        'wfo': int(cube[STATUS_WFO].to_numpy().sum()),
+        'wfh': int(cube[STATUS_WFH].to_numpy().sum()),
+        'alpha': int(cube['Alpha'].sum()),
+        'under': int(cube['Under'].sum()),
+    }
+
+
+def cube_status_counts(cube):
+    counts = cube[STATUS_LIST].sum()
+    counts = counts[counts > 0].sort_values(ascending=False)
+    return counts.rename_axis('Status').reset_index(name='Jumlah')
+
+
+def cube_monthly_avg(cube):
+    monthly = cube.groupby('Bulan_Angka')[['Durasi_Hadir', 'Hari_Durasi']].sum()
+    monthly = monthly[monthly['Hari_Durasi'] > 0]
+    return (monthly['Durasi_Hadir'] / monthly['Hari_Durasi']).rename('Durasi').reset_index()
+
+
+def cube_per_nama(cube):
+    per_nama = cube.groupby('Nama', observed=True)[STATUS_LIST + ['Durasi_Total']].sum()
+    return pd.DataFrame({
+        'Jumlah Hadir': per_nama[STATUS_HADIR].sum(axis=1),
+        'Jumlah Absen': per_nama[STATUS_ABSEN].sum(axis=1),
+        'Durasi': per_nama['Durasi_Total'],
+    }).reset_index().astype({'Nama': str})
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from appraisal import TARGET_JAM
+from cube import STATUS_HADIR
+
+# --- DETAIL DATA KARYAWAN (PAGINASI) ---
+# Cuma halaman yang terlihat yang di-style & dikirim ke browser. Highlight dihitung sebagai
+# mask kolom (bukan fungsi per baris), baris TOTAL diambil dari cube, tidak digabung ke data.
+PAGE_SIZES = [100, 500, 1000]
+LABEL_TOTAL = 'TOTAL KESELURUHAN'
+STYLE_UNDER = 'background-color: #ffcdd2'
+STYLE_ALPHA = 'background-color: #ffebee'
+STYLE_TOTAL = 'font-weight: bold; background-color: #cfd8dc; color: black'
+
+
+def detail_columns(df):
+    # Mode hemat memori tidak menyimpan teks mentah -> tampilkan jam hasil parsing
+    cols_jam = ['Masuk_Raw', 'Keluar_Raw'] if 'Masuk_Raw' in df else ['Absen Masuk', 'Absen Keluar']
+    return ['Tanggal', 'Nama', 'Status', 'Durasi', 'Performa'] + cols_jam
+
+
+def detail_order(df):
+    # Posisi baris urut (Nama, Tanggal); stabil seperti sort_values(kind='stable')
+    nama = pd.factorize(df['Nama'], sort=True)[0]
+    return np.lexsort((df['Tanggal'].to_numpy(), nama))
+
+
+def n_pages(n_rows, page_size):
+    return max(1, -(-n_rows // page_size))
+
+
+def detail_page(df, order, page, page_size, cols_view):
+    start = (page - 1) * page_size
+    pos = order[start:start + page_size]
+    # take dulu: yang disalin cuma baris halaman ini, bukan semua baris hasil filter
+    view = df.take(pos)[cols_view]
+    view['Tanggal'] = view['Tanggal'].astype(str)
+    # Nomor baris lanjut antar halaman
+    view.index = pd.RangeIndex(start, start + len(view))
+    return view
+
+
+def highlight_classes(page):
+    durasi = page['Durasi'].to_numpy(dtype='float64')
+    under = (durasi > 0) & (durasi < TARGET_JAM)
+    alpha = (page['Status'] == 'Alpha').to_numpy()
+    return np.select([under, alpha], [STYLE_UNDER, STYLE_ALPHA], default='')
+
+
+def style_page(page):
+    css = highlight_classes(page)
+    styles = pd.DataFrame(np.repeat(css[:, None], page.shape[1], axis=1),
+                          index=page.index, columns=page.columns)
+    return page.style.apply(lambda _: styles, axis=None).format({'Durasi': '{:.2f}'})
+
+
+def detail_total(cube, cols_view):
+    # Satu baris TOTAL dari cube hasil slice (filter sama dengan tabel detail)
+    total = pd.DataFrame({c: ['-'] for c in cols_view})
+    total['Tanggal'] = LABEL_TOTAL
+    total['Status'] = f"Hadir: {int(cube[STATUS_HADIR].to_numpy().sum())} Hari"
+    total['Durasi'] = f"{cube['Durasi_Total'].sum():.2f}"
+    return total.style.apply(lambda row: [STYLE_TOTAL] * len(row), axis=1)
@@ -0,0 +1,334 @@
+import numpy as np
+import pandas as pd
+from datetime import date
+from kalender import as_calendar
+from lokasi import as_registry, clean_text, contains_any
+from profiling import NULL_PROFILER
+
+# --- DATA LIBUR NASIONAL & KANTOR (2025) ---
+# Default kalender libur kalau file kalender (multi tahun) tidak diupload, lihat kalender.py
+libur_nasional = {
+    date(2025, 1, 1): "Tahun Baru Masehi",
+    date(2025, 1, 27): "Isra Mikraj Nabi Muhammad SAW",
+    date(2025, 1, 28): "Cuti Bersama Imlek",
+    date(2025, 1, 29): "Tahun Baru Imlek 2576 Kongzili",
+    date(2025, 3, 29): "Hari Suci Nyepi",
+    date(2025, 3, 31): "Idul Fitri 1446H",
+    date(2025, 4, 1): "Idul Fitri 1446H",
+    date(2025, 4, 2): "Cuti Bersama Idul Fitri",
+    date(2025, 4, 3): "Cuti Bersama Idul Fitri",
+    date(2025, 4, 4): "Cuti Bersama Idul Fitri",
+    date(2025, 4, 18): "Wafat Yesus Kristus (Jumat Agung)",
+    date(2025, 4, 20): "Kebangkitan Yesus Kristus (Paskah)",
+    date(2025, 5, 1): "Hari Buruh Internasional",
+    date(2025, 5, 12): "Hari Raya Waisak",
+    date(2025, 5, 29): "Kenaikan Yesus Kristus",
+    date(2025, 6, 1): "Hari Lahir Pancasila",
+    date(2025, 6, 6): "Hari Raya Idul Adha 1446H",
+    date(2025, 6, 27): "Tahun Baru Islam 1447H",
+    date(2025, 8, 17): "Hari Kemerdekaan RI",
+    date(2025, 9, 5): "Maulid Nabi Muhammad SAW",
+    date(2025, 12, 25): "Hari Raya Natal",
+    date(2025, 12, 26): "Cuti Bersama Natal"
+}
+
+kantor_list = [
+    "SCIENTIA", "GADING SERPONG", "CURUG SANGERENG", "KELAPA DUA",
+    "PAGEDANGAN", "MEDANG", "BINONG", "CISAUK", "LEGOK", "BSD", "SERPONG",
+    "PT ITOKO SANNIN ABADI", "GLOBAL KONSULTAN", "PT. PRATAMA SOLUTION", "REGUS",
+    "PT. PARAMADAKSA TEKNOLOGI NUSANTARA", "AIMAN - ANUGERAH INOVASI MANUNGGAL",
+    "PT GANITRI NITSAYA HARITA", "PT VALUTAC INOVASI KREASI",
+    "PRIME GLOBAL (KAP KANEL & REKAN)", "SANJAYA SOLUSINDO (PT SANJAYA SOLUSI DIGITAL INDONESIA)",
+    "PT. SARAHMA GLOBAL INFORMATIKA", "TRIPROCKETS TRAVEL INDONESIA", "THE MAP CONSULTANT",
+    "KESSLER EXECUTIVE SEARCH", "APP INTERNATIONAL INDONESIA", "PT WIAGA INTECH NUSANTARA",
+    "PARAMADAKSA TEKNOLOGI NUSANTARA NEXSOFT"
+]
+
+# Catatan yang dianggap "kerja" (bukan cuti).
+# NOTE: '' ikut di list -> `'' in cat` selalu True, jadi saat ini status Cuti tidak pernah keluar.
+keywords_kerja = ['WFH', 'WFO', 'MASUK', 'WORK', '-', 'NAN', 'HADIR', '']
+
+STATUS_LIST = [
+    "Libur Nasional", "Lembur Libur (WFO)", "Lembur Libur (WFH)",
+    "Libur Akhir Pekan", "Lembur Weekend (WFO)", "Lembur Weekend (WFH)",
+    "Cuti", "WFO", "WFH", "Alpha"
+]
+
+
+# --- CLEANING & PARSING ---
+MAPPED_COLUMNS = ['Nama', 'Masuk_Raw', 'Keluar_Raw', 'Lokasi', 'Catatan']
+JAM_AUTO_CHECKOUT = 20
+
+
+def prepare_activity(df_raw, mapping, profiler=NULL_PROFILER):
+    # mapping = [c_nama, c_masuk, c_keluar, c_lokasi, c_catatan] dari sidebar
+    # 1. Cleaning Basic
+    with profiler.stage('cleaning', len(df_raw)) as s:
+        df_act = df_raw[list(mapping)]
+        df_act.columns = MAPPED_COLUMNS
+        df_act['Lokasi'] = df_act['Lokasi'].fillna("").astype(str).str.upper()
+        df_act['Catatan'] = df_act['Catatan'].fillna("").astype(str).str.upper()
+        s['baris_keluar'] = len(df_act)
+
+    # 2. Parsing Date
+    with profiler.stage('parsing_tanggal', len(df_act)) as s:
+        df_act['Masuk_Obj'] = pd.to_datetime(df_act['Masuk_Raw'], errors='coerce')
+        df_act = df_act.dropna(subset=['Masuk_Obj'])
+
+        df_act['Tanggal'] = df_act['Masuk_Obj'].dt.normalize()
+        df_act['Absen Masuk'] = df_act['Masuk_Obj']
+        df_act['Absen Keluar'] = pd.to_datetime(df_act['Keluar_Raw'], errors='coerce')
+        s['baris_keluar'] = len(df_act)
+
+    # AUTO CHECKOUT 20:00 JIKA KOSONG (hari yang sama dengan Masuk, detik ke bawah tetap)
+    with profiler.stage('auto_checkout', len(df_act)) as s:
+        masuk = df_act['Absen Masuk']
+        auto_keluar = masuk.dt.normalize() + pd.Timedelta(hours=JAM_AUTO_CHECKOUT) + (masuk - masuk.dt.floor('s'))
+        df_act['Absen Keluar'] = df_act['Absen Keluar'].fillna(auto_keluar)
+        s['baris_keluar'] = len(df_act)
+    return df_act
+
+
+class DailyLastReducer:
+    # Reducer berjalan untuk mode streaming: sama dengan
+    # drop_duplicates(['Nama', 'Tanggal'], keep='last') atas seluruh file,
+    # tapi dicicil per chunk supaya memori tidak ikut besar file.
+    compact_every = 16
+
+    def __init__(self):
+        self.parts = []
+
+    def _compact(self):
+        gabung = pd.concat(self.parts, ignore_index=True)
+        self.parts = [gabung.drop_duplicates(subset=['Nama', 'Tanggal'], keep='last')]
+
+    def add(self, chunk, mapping):
+        df_act = prepare_activity(chunk, mapping)
+        self.parts.append(df_act.drop_duplicates(subset=['Nama', 'Tanggal'], keep='last'))
+        if len(self.parts) >= self.compact_every:
+            self._compact()
+
+    def result(self):
+        if not self.parts:
+            return pd.DataFrame(columns=MAPPED_COLUMNS + ['Masuk_Obj', 'Tanggal', 'Absen Masuk', 'Absen Keluar'])
+        self._compact()
+        return self.parts[0]
+
+
+# --- RAW PUNCH LOG (BANYAK PUNCH PER ORANG PER HARI) ---
+class PunchReducer(DailyLastReducer):
+    # mapping = [c_nama, c_waktu, c_lokasi]. Tiap punch jadi "ringkasan harian" kecil
+    # (Masuk = Keluar = waktu punch, Jumlah_Punch = 1); ringkasan digabung dengan satu
+    # sort (Nama, Masuk) + groupby: Masuk paling awal, Keluar paling akhir, Lokasi
+    # dari punch pertama. Penggabungannya asosiatif, jadi aman dicicil per chunk.
+
+    def _combine(self, daily):
+        daily = daily.sort_values(['Nama', 'Masuk'], kind='stable')
+        return daily.groupby(['Nama', 'Tanggal'], sort=False, as_index=False).agg(
+            Masuk=('Masuk', 'first'),
+            Keluar=('Keluar', 'max'),
+            Lokasi=('Lokasi', 'first'),
+            Jumlah_Punch=('Jumlah_Punch', 'sum'),
+        )
+
+    def _compact(self):
+        self.parts = [self._combine(pd.concat(self.parts, ignore_index=True))]
+
+    def add(self, chunk, mapping):
+        c_nama, c_waktu, c_lokasi = mapping
+        waktu = pd.to_datetime(chunk[c_waktu], errors='coerce')
+        punches = pd.DataFrame({
+            'Nama': chunk[c_nama],
+            'Tanggal': waktu.dt.normalize(),
+            'Masuk': waktu,
+            'Keluar': waktu,
+            'Lokasi': chunk[c_lokasi],
+            'Jumlah_Punch': 1,
+        }).dropna(subset=['Nama', 'Masuk'])
+        self.parts.append(self._combine(punches))
+        if len(self.parts) >= self.compact_every:
+            self._compact()
+
+    def result(self):
+        if not self.parts:
+            return super().result()
+        self._compact()
+        daily = self.parts[0]
+
+        # Cuma 1 punch = belum checkout -> Keluar kosong, nanti kena auto checkout 20:00
+        daily['Keluar'] = daily['Keluar'].where(daily['Jumlah_Punch'] > 1)
+        daily['Catatan'] = ""
+        df_act = prepare_activity(daily, ['Nama', 'Masuk', 'Keluar', 'Lokasi', 'Catatan'])
+        df_act['Jumlah_Punch'] = daily['Jumlah_Punch'].astype('int32')
+        return df_act
+
+
+def reduce_punch_log(df_raw, mapping):
+    reducer = PunchReducer()
+    reducer.add(df_raw, mapping)
+    return reducer.result()
+
+
+# --- MASTER GRID (NAMA x TANGGAL) ---
+def masa_kerja_bounds(masa_kerja, names, start):
+    # Offset hari (dari start) mulai & selesai kerja per nama; -inf / inf = tidak dibatasi
+    mk = masa_kerja.drop_duplicates(subset=['Nama'], keep='last').set_index('Nama').reindex(names)
+    mulai = ((mk['Mulai'] - start) // pd.Timedelta(days=1)).to_numpy(dtype=float, na_value=-np.inf)
+    selesai = ((mk['Selesai'] - start) // pd.Timedelta(days=1)).to_numpy(dtype=float, na_value=np.inf)
+    return mulai, selesai
+
+
+class MasterGrid:
+    # Posisi grid (Nama x Tanggal) tanpa isi kolom; dipakai backend pandas & arrow
+    def __init__(self, act, pos, names, dates, grid_name, grid_day):
+        self.act = act            # activity setelah dedup (Nama, Tanggal)
+        self.pos = pos            # posisi tiap baris act di grid penuh (nama * n_hari + hari)
+        self.names = names
+        self.dates = dates
+        self.grid_name = grid_name  # kode nama & offset hari per baris grid (sudah difilter masa kerja)
+        self.grid_day = grid_day
+        self.grid_pos = grid_name * len(dates) + grid_day
+
+
+def master_grid_index(df_act, masa_kerja=None, profiler=NULL_PROFILER):
+    # Grid = product (kode nama x offset hari); baris absen diletakkan lewat posisi
+    # integer nama * n_hari + hari. Urutan baris sama dengan itertools.product lama.
+    with profiler.stage('cross_join', len(df_act)) as s:
+        # Urutan nama = urutan kemunculan pertama sebelum dedup (sama dengan unique() lama)
+        names = pd.Index(pd.unique(df_act['Nama']))
+        df_act = df_act.drop_duplicates(subset=['Nama', 'Tanggal'], keep='last')
+        name_codes = names.get_indexer(df_act['Nama'])
+        start = df_act['Tanggal'].min()
+        dates = pd.date_range(start=start, end=df_act['Tanggal'].max())
+        n_names, n_days = len(names), len(dates)
+
+        day = ((df_act['Tanggal'] - start) // pd.Timedelta(days=1)).to_numpy()
+        pos = name_codes * n_days + day
+
+        grid_name = np.repeat(np.arange(n_names), n_days)
+        grid_day = np.tile(np.arange(n_days), n_names)
+        keep = np.ones(n_names * n_days, dtype=bool)
+
+        if masa_kerja is not None and not masa_kerja.empty:
+            # Hari di luar masa kerja (sebelum join / setelah resign) tidak dibuatkan baris,
+            # kecuali memang ada absen di hari itu
+            mulai, selesai = masa_kerja_bounds(masa_kerja, names, start)
+            keep = (grid_day >= mulai[grid_name]) & (grid_day <= selesai[grid_name])
+            keep[pos] = True
+
+        grid_pos = np.flatnonzero(keep)
+        s['baris_keluar'] = len(grid_pos)
+    return MasterGrid(df_act, pos, names, dates, grid_name[grid_pos], grid_day[grid_pos])
+
+
+def build_master_grid(df_act, masa_kerja=None, profiler=NULL_PROFILER):
+    # Isi grid diambil dengan satu reindex (tanpa list tuple & tanpa merge kolom object)
+    grid = master_grid_index(df_act, masa_kerja, profiler)
+    with profiler.stage('merge', len(grid.act)) as s:
+        df_final = grid.act.drop(columns=['Nama', 'Tanggal']).set_axis(grid.pos, axis=0).reindex(grid.grid_pos)
+        df_final.insert(0, 'Nama', grid.names.take(grid.grid_name).to_numpy())
+        df_final.insert(1, 'Tanggal', grid.dates.take(grid.grid_day))
+        df_final = df_final.reset_index(drop=True)
+        s['baris_keluar'] = len(df_final)
+    return df_final
+
+
+# --- LAYOUT HEMAT MEMORI (df_full DI SESSION STATE) ---
+KOLOM_KATEGORI = ['Nama', 'Status', 'Bulan', 'Performa', 'Lokasi', 'Catatan']
+KOLOM_REDUNDAN = ['Masuk_Obj', 'Tanggal_DT']  # salinan Absen Masuk / Tanggal
+KOLOM_RAW = ['Masuk_Raw', 'Keluar_Raw']
+KOLOM_DTYPE = {'Tahun': 'int16', 'Bulan_Angka': 'int8', 'Minggu_Ke': 'int16',
+               'Durasi': 'float32', 'Jumlah_Punch': 'float32'}
+
+
+def compact_frame(df, keep_raw=False):
+    # Label berulang -> category, angka -> dtype kecil, salinan datetime dibuang.
+    # Teks mentah ikut dibuang kecuali keep_raw (detail view pakai Absen Masuk/Keluar).
+    drop = KOLOM_REDUNDAN + ([] if keep_raw else KOLOM_RAW)
+    df = df.drop(columns=[c for c in drop if c in df])
+    df = df.astype({c: 'category' for c in KOLOM_KATEGORI if c in df})
+    return df.astype({c: t for c, t in KOLOM_DTYPE.items() if c in df})
+
+
+def frame_memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+# --- LOGIKA STATUS (VERSI ROW-WISE, DIPAKAI SEBAGAI REFERENSI PARITY) ---
+def get_status(row, libur_nasional=libur_nasional, kantor_list=kantor_list):
+    tgl = pd.Timestamp(row['Tanggal']).date()
+    cat = str(row['Catatan']).strip().upper() if pd.notnull(row['Catatan']) else ""
+    lok = str(row['Lokasi']).strip().upper() if pd.notnull(row['Lokasi']) else ""
+    ada_absen = pd.notnull(row['Absen Masuk'])
+
+    is_weekend = tgl.weekday() >= 5
+
+    # A. CEK HARI LIBUR NASIONAL
+    if tgl in libur_nasional:
+        if ada_absen:
+            is_wfo = any(k in lok for k in kantor_list)
+            return "Lembur Libur (WFO)" if is_wfo else "Lembur Libur (WFH)"
+        return "Libur Nasional"
+
+    # B. CEK SABTU / MINGGU
+    if is_weekend:
+        if ada_absen:
+            is_wfo = any(k in lok for k in kantor_list)
+            return "Lembur Weekend (WFO)" if is_wfo else "Lembur Weekend (WFH)"
+        return "Libur Akhir Pekan"
+
+    # C. HARI BIASA
+    is_catatan_kerja = any(k == cat or k in cat for k in keywords_kerja)
+
+    if cat != "" and not is_catatan_kerja:
+        return "Cuti"
+
+    if ada_absen:
+        is_wfo = any(k in lok for k in kantor_list)
+        return "WFO" if is_wfo else "WFH"
+
+    return "Alpha"
+
+
+# --- LOGIKA STATUS (VERSI KOLOMNAR) ---
+def cabang_per_baris(nama, masa_kerja):
+    # Cabang per baris (dari Data Karyawan) untuk override libur per cabang; None kalau tidak ada
+    if masa_kerja is None or 'Cabang' not in masa_kerja or not (masa_kerja['Cabang'] != "").any():
+        return None
+    mk_cabang = masa_kerja.drop_duplicates(subset=['Nama'], keep='last').set_index('Nama')['Cabang']
+    return nama.map(mk_cabang).fillna("")
+
+
+def compute_status(df, libur_nasional=libur_nasional, kantor_list=kantor_list, cabang=None):
+    # libur_nasional boleh dict {date: nama} atau HolidayCalendar (multi tahun + override cabang);
+    # cabang = Series cabang per baris (opsional) untuk override libur per cabang
+    kalender = as_calendar(libur_nasional)
+    is_libur = kalender.is_holiday(df['Tanggal'], cabang)
+    is_weekend = kalender.is_weekend(df['Tanggal'])
+
+    ada_absen = df['Absen Masuk'].notna().to_numpy()
+    # kantor_list boleh list nama kantor atau KantorRegistry (memo + geofence)
+    is_wfo = as_registry(kantor_list).classify(df['Lokasi'])
+
+    cat = clean_text(df['Catatan'])
+    is_cuti = (cat != "").to_numpy() & ~contains_any(cat, keywords_kerja)
+
+    # Urutan kondisi = urutan if di get_status (A -> B -> C)
+    conditions = [
+        is_libur & ada_absen & is_wfo,
+        is_libur & ada_absen,
+        is_libur,
+        is_weekend & ada_absen & is_wfo,
+        is_weekend & ada_absen,
+        is_weekend,
+        is_cuti,
+        ada_absen & is_wfo,
+        ada_absen,
+    ]
+    choices = [
+        "Lembur Libur (WFO)", "Lembur Libur (WFH)", "Libur Nasional",
+        "Lembur Weekend (WFO)", "Lembur Weekend (WFH)", "Libur Akhir Pekan",
+        "Cuti", "WFO", "WFH",
+    ]
+    status = np.select(conditions, choices, default="Alpha").astype(object)
+    return pd.Series(status, index=df.index, name='Status')
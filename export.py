@@ -0,0 +1,242 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+from cube import STATUS_ABSEN, STATUS_HADIR
+from detail import STYLE_ALPHA, STYLE_UNDER, highlight_classes
+from engine import STATUS_LIST
+
+# --- EXPORT DATA (XLSX / PARQUET / CSV) ---
+# Data ditulis per chunk (generator di atas df hasil filter + urutan baris), jadi export 1 juta
+# baris tidak pernah membuat salinan penuh kedua di memori. XLSX pakai mode constant_memory
+# xlsxwriter (baris langsung di-flush ke file), highlight Under / Alpha sama dengan tabel detail.
+FORMAT_EXPORT = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/octet-stream',
+    'csv': 'text/csv',
+}
+CHUNK_ROWS = 50_000
+EXCEL_MAX_ROWS = 1_048_575  # baris data per sheet (di luar header); sisanya lanjut ke sheet berikutnya
+EXPORT_BG_ROWS = int(os.environ.get('HRIS_EXPORT_BG_ROWS', 200_000))  # di atas ini dibuat di job background
+EXPORT_DIR = os.environ.get('HRIS_EXPORT_DIR') or os.path.join(tempfile.gettempdir(), 'hris_export')
+EXPORT_MAX_AGE = 6 * 3600  # file export lama (detik) dibersihkan saat export baru dibuat
+
+JENIS_SAMPEL = 1000  # baris awal yang dicek untuk memilih format kolom tanggal / waktu
+EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+XLSX_HIGHLIGHT = {'': {}, STYLE_UNDER: {'bg_color': '#ffcdd2'}, STYLE_ALPHA: {'bg_color': '#ffebee'}}
+XLSX_TOTAL = {'bold': True, 'bg_color': '#cfd8dc', 'font_color': 'black'}
+XLSX_ANGKA = {'tanggal': 'yyyy-mm-dd', 'waktu': 'yyyy-mm-dd hh:mm:ss', 'desimal': '0.00', 'bulat': '0', 'teks': None}
+
+
+class ExportSheet:
+    # Satu tabel export: kolom cols dari frame, urut posisi order (None = urutan frame).
+    # highlight=True -> warna baris seperti tabel detail; total = frame satu baris di akhir
+    def __init__(self, nama, frame, cols=None, order=None, highlight=False, total=None):
+        self.nama = nama
+        self.frame = frame
+        self.cols = list(cols) if cols is not None else list(frame.columns)
+        self.order = order
+        self.highlight = highlight
+        self.total = total
+
+    def __len__(self):
+        return len(self.frame) if self.order is None else len(self.order)
+
+
+def ringkasan_karyawan(cube):
+    # Ringkasan per karyawan dari cube hasil slice: jumlah per status (yang muncul saja) + jam kerja
+    per_nama = cube.groupby('Nama', observed=True)[STATUS_LIST + ['Durasi_Total', 'Durasi_Hadir', 'Hari_Durasi', 'Under']].sum()
+    status = [s for s in STATUS_LIST if per_nama[s].any()]
+    hari_durasi = per_nama['Hari_Durasi'].where(per_nama['Hari_Durasi'] > 0)
+    ringkasan = pd.DataFrame({
+        'Jumlah Hadir': per_nama[STATUS_HADIR].sum(axis=1),
+        'Jumlah Absen': per_nama[STATUS_ABSEN].sum(axis=1),
+        'Total Jam': per_nama['Durasi_Total'].round(2),
+        'Rata-rata Jam': (per_nama['Durasi_Hadir'] / hari_durasi).round(2),
+        'Hari Under': per_nama['Under'],
+    })
+    return pd.concat([ringkasan, per_nama[status]], axis=1).reset_index().astype({'Nama': str})
+
+
+def iter_chunks(sheet, chunk_rows=CHUNK_ROWS):
+    # Generator potongan baris (hanya kolom export); tiap potongan = salinan chunk_rows baris saja
+    n = len(sheet)
+    for start in range(0, n, chunk_rows):
+        if sheet.order is None:
+            chunk = sheet.frame.iloc[start:start + chunk_rows]
+        else:
+            chunk = sheet.frame.take(sheet.order[start:start + chunk_rows])
+        yield chunk[sheet.cols]
+
+
+def _jenis(s):
+    if pd.api.types.is_datetime64_any_dtype(s):
+        # Cukup sampel baris awal (bukan normalize satu kolom penuh); sampel kosong -> format jam
+        sampel = s.iloc[:JENIS_SAMPEL].dropna()
+        return 'tanggal' if len(sampel) and (sampel.dt.normalize() == sampel).all() else 'waktu'
+    if pd.api.types.is_bool_dtype(s) or not pd.api.types.is_numeric_dtype(s):
+        return 'teks'
+    return 'bulat' if pd.api.types.is_integer_dtype(s) else 'desimal'
+
+
+def _nilai_xlsx(s, jenis):
+    # Kolom -> array siap tulis: tanggal jadi serial Excel (float), NaN/NaT = kosong
+    if jenis in ('tanggal', 'waktu'):
+        return ((s - EXCEL_EPOCH) / pd.Timedelta(days=1)).to_numpy(dtype='float64', na_value=np.nan)
+    if jenis == 'teks':
+        return s.astype(object).where(s.notna(), None).to_numpy()
+    nilai = s.to_numpy(dtype='float64', na_value=np.nan)
+    # float32 (Durasi mode hemat memori) -> float64 tanpa ekor 7.28000020980835
+    return nilai.round(6) if s.dtype == 'float32' else nilai
+
+
+def write_xlsx(target, sheets, progress=None):
+    # target: path atau buffer. progress(baris_ditulis) dipanggil tiap chunk (boleh raise untuk batal).
+    # constant_memory xlsxwriter mati kalau in_memory, jadi target buffer tetap ditulis lewat file
+    # sementara lalu disalin ke buffer
+    if not isinstance(target, str):
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        try:
+            write_xlsx(path, sheets, progress)
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, target)
+        finally:
+            os.remove(path)
+        return
+    wb = xlsxwriter.Workbook(target, {'constant_memory': True})
+    header = wb.add_format({'bold': True})
+    formats = {}
+
+    def fmt(highlight, jenis, total=False):
+        k = (highlight, jenis, total)
+        if k not in formats:
+            props = dict(XLSX_TOTAL if total else XLSX_HIGHLIGHT[highlight])
+            if XLSX_ANGKA[jenis]:
+                props['num_format'] = XLSX_ANGKA[jenis]
+            formats[k] = wb.add_format(props)
+        return formats[k]
+
+    def sheet_baru(sheet, bagian):
+        # constant_memory: sheet ditulis berurutan, sheet baru setelah yang lama penuh
+        ws = wb.add_worksheet(sheet.nama if bagian == 1 else f"{sheet.nama} ({bagian})")
+        ws.write_row(0, 0, sheet.cols, header)
+        ws.freeze_panes(1, 0)
+        return ws
+
+    ditulis = 0
+    try:
+        for sheet in sheets:
+            jenis = [_jenis(sheet.frame[c]) for c in sheet.cols]
+            ws, row, bagian = None, EXCEL_MAX_ROWS + 1, 0
+            for chunk in iter_chunks(sheet):
+                css = highlight_classes(chunk) if sheet.highlight else np.full(len(chunk), '', dtype=object)
+                kolom = [_nilai_xlsx(chunk[c], j) for c, j in zip(sheet.cols, jenis)]
+                fmt_baris = {h: [fmt(h, j) for j in jenis] for h in np.unique(css)}
+                for i in range(len(chunk)):
+                    if row > EXCEL_MAX_ROWS:
+                        bagian += 1
+                        ws, row = sheet_baru(sheet, bagian), 1
+                    baris_fmt = fmt_baris[css[i]]
+                    for c, (v, j) in enumerate(zip(kolom, jenis)):
+                        x = v[i]
+                        if x is None or (j != 'teks' and x != x):
+                            ws.write_blank(row, c, None, baris_fmt[c])
+                        elif j == 'teks':
+                            ws.write_string(row, c, str(x), baris_fmt[c])
+                        else:
+                            ws.write_number(row, c, x, baris_fmt[c])
+                    row += 1
+                ditulis += len(chunk)
+                if progress is not None:
+                    progress(ditulis)
+            # Sheet kosong, atau sheet terakhir pas penuh: baris TOTAL pindah ke sheet lanjutan
+            if ws is None or (sheet.total is not None and row > EXCEL_MAX_ROWS):
+                bagian += 1
+                ws, row = sheet_baru(sheet, bagian), 1
+            if sheet.total is not None:
+                ws.write_row(row, 0, [str(v) for v in sheet.total.iloc[0][sheet.cols]], fmt('', 'teks', total=True))
+    finally:
+        wb.close()
+
+
+def write_parquet_chunks(target, sheet, progress=None):
+    # Satu file parquet per tabel; schema dari chunk pertama (kolom object campuran -> string)
+    writer = None
+    ditulis = 0
+    try:
+        for chunk in iter_chunks(sheet):
+            chunk = chunk.astype({c: 'string' for c in chunk.columns if chunk[c].dtype == object})
+            if writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(target, table.schema)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+            ditulis += len(chunk)
+            if progress is not None:
+                progress(ditulis)
+        if writer is None:
+            table = pa.Table.from_pandas(sheet.frame.iloc[:0][sheet.cols], preserve_index=False)
+            writer = pq.ParquetWriter(target, table.schema)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_csv_chunks(target, sheet, progress=None):
+    # target: path atau buffer biner. BOM supaya Excel membaca UTF-8 dengan benar
+    f = open(target, 'wb') if isinstance(target, str) else target
+    ditulis = 0
+    try:
+        f.write(b'\xef\xbb\xbf')
+        for k, chunk in enumerate(iter_chunks(sheet)):
+            f.write(chunk.to_csv(index=False, header=k == 0).encode('utf-8'))
+            ditulis += len(chunk)
+            if progress is not None:
+                progress(ditulis)
+        if ditulis == 0:
+            f.write(','.join(sheet.cols).encode('utf-8') + b'\n')
+    finally:
+        if f is not target:
+            f.close()
+
+
+def write_export(target, sheet, fmt, progress=None):
+    if fmt == 'xlsx':
+        write_xlsx(target, [sheet], progress)
+    elif fmt == 'parquet':
+        write_parquet_chunks(target, sheet, progress)
+    elif fmt == 'csv':
+        write_csv_chunks(target, sheet, progress)
+    else:
+        raise ValueError(f"Format export tidak dikenal: {fmt}")
+
+
+def export_bytes(sheet, fmt):
+    # Export kecil: langsung ke buffer (dipanggil saat tombol download diklik)
+    buffer = io.BytesIO()
+    write_export(buffer, sheet, fmt)
+    return buffer.getvalue()
+
+
+def export_path(nama, fmt):
+    # Path file export baru di EXPORT_DIR; file export lama sekalian dibersihkan
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    batas = time.time() - EXPORT_MAX_AGE
+    for f in os.listdir(EXPORT_DIR):
+        p = os.path.join(EXPORT_DIR, f)
+        try:
+            if os.path.getmtime(p) < batas:
+                os.remove(p)
+        except OSError:
+            pass
+    fd, path = tempfile.mkstemp(prefix=f"{nama}_", suffix=f".{fmt}", dir=EXPORT_DIR)
+    os.close(fd)
+    return path
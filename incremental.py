@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+from cube import CUBE_KEYS, build_cube
+from engine import KOLOM_KATEGORI, compact_frame, masa_kerja_bounds
+from pipeline import ingest_activity, process_grid
+from profiling import NULL_PROFILER
+from slicer import sort_for_slicer
+
+# --- PROSES INKREMENTAL (TAMBAH / GANTI FILE) ---
+# Hasil proses sebelumnya disimpan bersama activity per file. Kalau upload berikutnya cuma
+# menambah / mengganti file (mapping & pengaturan sama), yang dihitung ulang hanya sel
+# (Nama, Tanggal) yang disentuh file itu + sel grid baru (karyawan baru / tanggal baru),
+# lalu disambung ke hasil lama. Semua langkah setelah grid per baris, jadi hasilnya sama
+# dengan proses penuh. Format punch log (gabungan punch lintas file) selalu diproses penuh.
+
+
+def ingest_files(ids, mapping, dfs=None, sources=None, profiler=NULL_PROFILER):
+    # Return (activity gabungan, dict id file -> activity file itu). dfs = frame mentah per file
+    # (mode standar), sources = file CSV (mode streaming); urutan sama dengan ids.
+    # Tanpa file (upload yang cuma membuang file) -> (None, {}), sama dengan jalur standar di app
+    if not ids:
+        return None, {}
+    if sources is not None:
+        acts = {i: ingest_activity(mapping, sources=[src], profiler=profiler) for i, src in zip(ids, sources)}
+        return pd.concat(list(acts.values()), ignore_index=True), acts
+    df_act = ingest_activity(mapping, df_raw=pd.concat(dfs, ignore_index=True, sort=False), profiler=profiler)
+    # Index activity = posisi baris di concat mentah -> asal file
+    asal = np.searchsorted(np.cumsum([len(d) for d in dfs]), df_act.index.to_numpy(), side='right')
+    return df_act, {i: df_act[asal == k] for k, i in enumerate(ids)}
+
+
+def _ringkasan(act):
+    # Nama (urut kemunculan) & rentang tanggal satu file
+    return pd.Index(pd.unique(act['Nama'])), act['Tanggal'].min(), act['Tanggal'].max()
+
+
+def _nama_idx(names, nama):
+    # Posisi tiap Nama di names; kolom category cukup lookup kategorinya lalu ambil per kode
+    if isinstance(nama.dtype, pd.CategoricalDtype):
+        return names.get_indexer(nama.cat.categories)[nama.cat.codes.to_numpy()]
+    return names.get_indexer(nama)
+
+
+def _grid_range(file_ids, ringkasan):
+    # Nama & rentang tanggal grid untuk kumpulan file ini (sama dengan build_master_grid)
+    isi = [ringkasan[i] for i in file_ids if i in ringkasan]
+    if not isi:
+        return pd.Index([]), pd.NaT, pd.NaT
+    names = pd.Index(pd.unique(np.concatenate([r[0].to_numpy(dtype=object) for r in isi])))
+    return names, min(r[1] for r in isi), max(r[2] for r in isi)
+
+
+def tahap_delta(streaming=False, hemat_memori=True):
+    # Nama stage jalur inkremental (progress job background)
+    ingest = ['stream_csv'] if streaming else ['file_load', 'cleaning', 'parsing_tanggal', 'auto_checkout']
+    proses = ['status', 'durasi_performa', 'ekstraksi_waktu'] + (['compact_frame'] if hemat_memori else [])
+    return ingest + ['diff_partisi', 'grid_delta'] + proses + ['sort_slicer', 'splice', 'cube_delta', 'slicer_index']
+
+
+class ProcessedBasis:
+    # Hasil proses penuh / inkremental terakhir + activity per file (id file -> frame)
+    def __init__(self, settings_key, file_ids, acts, df, cube):
+        self.settings_key = settings_key
+        self.file_ids = list(file_ids)
+        self.acts = acts
+        self.df = df
+        self.cube = cube
+        self.ringkasan = {i: _ringkasan(a) for i, a in acts.items() if len(a)}
+
+
+def plan_delta(basis, settings_key, file_ids):
+    # Return (id file baru, id file yang hilang) kalau bisa inkremental, None = proses penuh
+    if basis is None or basis.settings_key != settings_key or len(set(file_ids)) != len(file_ids):
+        return None
+    lama, baru = basis.file_ids, list(file_ids)
+    tetap_lama = [i for i in lama if i in baru]
+    # Urutan file menentukan baris mana yang menang (keep='last'), jadi urutan file lama harus sama
+    if not tetap_lama or tetap_lama != [i for i in baru if i in lama]:
+        return None
+    return [i for i in baru if i not in lama], [i for i in lama if i not in baru]
+
+
+def apply_delta(basis, file_ids, acts_baru, masa_kerja=None, proses=None, hemat_memori=True,
+                profiler=NULL_PROFILER):
+    # acts_baru: activity file yang ditambah. proses: kwargs process_grid (libur, kantor, target_jam).
+    # Return (df, cube, baris_berubah, basis baru) atau None kalau grid menyusut (-> proses penuh)
+    removed = [i for i in basis.file_ids if i not in file_ids]
+
+    with profiler.stage('diff_partisi') as s:
+        ringkasan = {i: r for i, r in basis.ringkasan.items() if i not in removed}
+        ringkasan.update({i: _ringkasan(a) for i, a in acts_baru.items() if len(a)})
+        names_lama, start_lama, end_lama = _grid_range(basis.file_ids, basis.ringkasan)
+        names_baru, start, end = _grid_range(file_ids, ringkasan)
+        # File yang dibuang menghilangkan karyawan / memperpendek rentang -> grid lama tidak berlaku
+        if pd.isna(start) or start > start_lama or end < end_lama or not names_lama.isin(names_baru).all():
+            return None
+
+        names = names_lama.append(names_baru.difference(names_lama, sort=False))
+        dates = pd.date_range(start, end)
+        n_days = len(dates)
+
+        def kode(nama, tanggal):
+            return (_nama_idx(names, nama) * n_days
+                    + ((tanggal - start) // pd.Timedelta(days=1)).to_numpy())
+
+        # Sel yang berubah: isi file baru / file yang hilang + sel grid baru
+        disentuh = [kode(a['Nama'], a['Tanggal']) for a in list(acts_baru.values()) + [basis.acts[i] for i in removed]]
+        hari_lama = np.flatnonzero((dates >= start_lama) & (dates <= end_lama))
+        hari_baru = np.setdiff1d(np.arange(n_days), hari_lama)
+        n_lama = len(names_lama)
+        grid_baru = [
+            (np.arange(n_lama, len(names))[:, None] * n_days + np.arange(n_days)).ravel(),
+            (np.arange(n_lama)[:, None] * n_days + hari_baru).ravel(),
+        ]
+        affected = np.unique(np.concatenate(disentuh + grid_baru))
+        s['baris_keluar'] = len(affected)
+
+    with profiler.stage('grid_delta', len(affected)) as s:
+        # Activity sel itu dari semua file (urutan upload), keep='last' sama dengan build_master_grid
+        acts = {**{i: basis.acts[i] for i in basis.file_ids if i not in removed}, **acts_baru}
+        parts = []
+        for i in file_ids:
+            a = acts[i]
+            k = kode(a['Nama'], a['Tanggal'])
+            parts.append(a[np.isin(k, affected)])
+        act = pd.concat(parts, ignore_index=True).drop_duplicates(subset=['Nama', 'Tanggal'], keep='last')
+        pos = kode(act['Nama'], act['Tanggal'])
+
+        cells = affected
+        if masa_kerja is not None and not masa_kerja.empty:
+            mulai, selesai = masa_kerja_bounds(masa_kerja, names, start)
+            hari, nama = cells % n_days, cells // n_days
+            cells = cells[((hari >= mulai[nama]) & (hari <= selesai[nama])) | np.isin(cells, pos)]
+
+        grid = act.drop(columns=['Nama', 'Tanggal']).set_axis(pos, axis=0).reindex(cells)
+        grid.insert(0, 'Nama', names.take(cells // n_days).to_numpy())
+        grid.insert(1, 'Tanggal', dates.take(cells % n_days))
+        grid = grid.reset_index(drop=True)
+        s['baris_keluar'] = len(grid)
+
+    part = process_grid(grid, masa_kerja, hemat_memori=hemat_memori, profiler=profiler, **(proses or {}))
+
+    with profiler.stage('splice', len(basis.df)) as s:
+        lama = basis.df
+        df = pd.concat([lama[~np.isin(kode(lama['Nama'], lama['Tanggal']), affected)], part],
+                       ignore_index=True)
+        if hemat_memori:
+            # Kategori disamakan dengan hasil proses penuh (hanya nilai yang ada, urut)
+            df = compact_frame(df)
+            df = df.astype({c: pd.CategoricalDtype(sorted(df[c].dropna().unique()))
+                            for c in KOLOM_KATEGORI if c in df})
+        df = sort_for_slicer(df)
+        s['baris_keluar'] = len(df)
+
+    with profiler.stage('cube_delta', len(basis.cube)) as s:
+        # Bucket cube (Nama x Tahun/Bulan/Minggu) yang memuat sel berubah dihitung ulang
+        # (pakai Nama x Tahun x Minggu_Ke: bucket bulan di minggu yang sama ikut dihitung ulang)
+        tgl = dates.take(affected % n_days)
+        bucket = np.unique((affected // n_days) * 10**6 + tgl.year.to_numpy() * 100
+                           + tgl.isocalendar()['week'].to_numpy(dtype='int64'))
+
+        def di_bucket(frame):
+            kunci = (_nama_idx(names, frame['Nama']) * 10**6 + frame['Tahun'].to_numpy(dtype='int64') * 100
+                     + frame['Minggu_Ke'].to_numpy(dtype='int64'))
+            return np.isin(kunci, bucket)
+
+        cube = pd.concat([basis.cube[~di_bucket(basis.cube)], build_cube(df[di_bucket(df)])], ignore_index=True)
+        # Concat kategori yang beda isi jadi teks -> dtype key disamakan dengan build_cube(df)
+        cube = cube.astype({c: df[c].dtype for c in CUBE_KEYS if isinstance(df[c].dtype, pd.CategoricalDtype)})
+        s['baris_keluar'] = len(cube)
+
+    basis_baru = ProcessedBasis(basis.settings_key, file_ids, acts, df, cube)
+    return df, cube, part, basis_baru
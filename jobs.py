@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from profiling import PipelineProfiler
+
+# --- JOB PROSES DI BACKGROUND ---
+# "Proses Dashboard" jalan di thread pool milik server (bukan di script run Streamlit), jadi
+# rerun karena widget lain tidak memotong proses. Tiap stage profiler = titik laporan progress
+# sekaligus titik cek pembatalan. Thread (bukan process): data & hasil tidak perlu di-pickle,
+# parse file tetap paralel lewat proses per file di load_many.
+# Job proses & job export punya pool sendiri (batas dihitung untuk semua sesi), jadi dua proses
+# berat dari sesi lain tidak membuat export kecil ikut antri.
+JOB_WORKERS = int(os.environ.get('HRIS_JOB_WORKERS', 2))
+EXPORT_WORKERS = int(os.environ.get('HRIS_EXPORT_WORKERS', 2))
+ANTRIAN = {'proses': JOB_WORKERS, 'export': EXPORT_WORKERS}
+MAX_JOBS = 32  # riwayat job yang disimpan (yang sudah selesai dibuang paling dulu)
+# Hasil job (df, cube, basis) di luar budget cache hasil: sesi melepasnya begitu dipakai,
+# hasil yang tidak pernah diambil (sesi sudah ditutup) dilepas setelah sekian detik
+JOB_RESULT_TTL = int(os.environ.get('HRIS_JOB_RESULT_TTL', 1800))
+
+ANTRI, JALAN, SELESAI, GAGAL, BATAL = 'antri', 'jalan', 'selesai', 'gagal', 'batal'
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobProfiler(PipelineProfiler):
+    def __init__(self, job, **kwargs):
+        super().__init__(run_id=job.id, **kwargs)
+        self.job = job
+
+    @contextmanager
+    def stage(self, name, baris_masuk=None):
+        self.job.check_cancel()
+        self.job.stage = name
+        with super().stage(name, baris_masuk) as info:
+            yield info
+
+
+class Job:
+    def __init__(self, label='', tahap=()):
+        self.id = uuid.uuid4().hex[:8]
+        self.label = label
+        self.tahap = list(tahap)  # stage yang diharapkan, untuk menghitung progress
+        self.status = ANTRI
+        self.stage = None
+        self.result = None
+        self.error = None
+        self.partial = {}  # hasil antara yang sudah jadi (mis. jumlah file ter-load)
+        self.dibuat = time.time()
+        self.mulai = self.selesai = None
+        self.profiler = JobProfiler(self, label=label)
+        self._cancel = threading.Event()
+
+    @property
+    def aktif(self):
+        return self.status in (ANTRI, JALAN)
+
+    @property
+    def progress(self):
+        if self.status == SELESAI:
+            return 1.0
+        if 'progress' in self.partial:
+            # Job tanpa daftar stage (mis. export) melapor progress sendiri (0-1)
+            return min(self.partial['progress'], 0.99)
+        if not self.tahap:
+            return 0.0
+        done = {r['stage'] for r in self.profiler.records}
+        return min(sum(t in done for t in self.tahap) / len(self.tahap), 0.99)
+
+    def detik(self):
+        if self.mulai is None:
+            return 0.0
+        return (self.selesai or time.time()) - self.mulai
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check_cancel(self):
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+
+class JobManager:
+    def __init__(self, antrian=ANTRIAN):
+        # antrian: nama -> jumlah thread; tiap antrian satu pool
+        self._pools = {nama: ThreadPoolExecutor(max_workers=n, thread_name_prefix=f'hris-{nama}')
+                       for nama, n in antrian.items()}
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, label='', tahap=(), antrian='proses', **kwargs):
+        # fn(job, *args, **kwargs) -> hasil; job dipakai fn untuk profiler & cek pembatalan
+        pool = self._pools[antrian]
+        job = Job(label, tahap)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.mulai = time.time()
+        job.status = JALAN
+        try:
+            job.check_cancel()
+            job.result = fn(job, *args, **kwargs)
+            job.status = SELESAI
+        except JobCancelled:
+            job.status = BATAL
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = GAGAL
+        finally:
+            job.selesai = time.time()
+
+    def _prune(self):
+        batas = time.time() - JOB_RESULT_TTL
+        for j in self._jobs.values():
+            if not j.aktif and j.selesai is not None and j.selesai < batas:
+                j.result = None
+        selesai = [k for k, j in self._jobs.items() if not j.aktif]
+        while len(self._jobs) > MAX_JOBS and selesai:
+            del self._jobs[selesai.pop(0)]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+from lokasi import clean_text
+
+# --- KALENDER LIBUR (MULTI TAHUN) ---
+# Tabel libur nasional / cuti bersama / perusahaan (+ override per cabang) dikompilasi
+# sekali jadi array tanggal terurut & np.busdaycalendar. Flag libur, weekend dan jumlah
+# hari kerja untuk range tanggal berapa pun jadi operasi array, bukan cek per baris.
+WEEKMASK = '1111100'      # Senin - Jumat
+JENIS_DEFAULT = 'Nasional'
+JENIS_MASUK = 'MASUK'     # baris cabang dengan Jenis "Masuk" = hari libur yang tetap kerja
+KOLOM_KALENDER = {
+    'Tanggal': ['TANGGAL', 'DATE', 'TGL'],
+    'Keterangan': ['KETERANGAN', 'LIBUR', 'NAMA', 'HOLIDAY', 'DESC'],
+    'Jenis': ['JENIS', 'TIPE', 'TYPE', 'KATEGORI'],
+    'Cabang': ['CABANG', 'BRANCH', 'KANTOR', 'SITE'],
+}
+
+
+def to_days(dates):
+    return np.asarray(pd.to_datetime(pd.Series(dates)).to_numpy()).astype('datetime64[D]')
+
+
+def _isin_sorted(days, sorted_days):
+    if len(sorted_days) == 0:
+        return np.zeros(len(days), dtype=bool)
+    idx = np.searchsorted(sorted_days, days).clip(max=len(sorted_days) - 1)
+    return sorted_days[idx] == days
+
+
+def _cari_kolom(cols, keys):
+    # Header yang persis sama dengan keyword menang, lalu yang memuat keyword (urut prioritas keyword)
+    return (next((k for x in keys for k in cols if k == x), None)
+            or next((k for x in keys for k in cols if x in k), None))
+
+
+class HolidayCalendar:
+    def __init__(self, libur, weekmask=WEEKMASK):
+        # libur: DataFrame Tanggal, Keterangan, Jenis, Cabang ('' = berlaku semua cabang)
+        libur = pd.DataFrame({
+            'Tanggal': pd.to_datetime(libur['Tanggal'], errors='coerce').dt.normalize(),
+            'Keterangan': libur['Keterangan'].fillna("").astype(str) if 'Keterangan' in libur else "",
+            'Jenis': libur['Jenis'].fillna(JENIS_DEFAULT).astype(str) if 'Jenis' in libur else JENIS_DEFAULT,
+            'Cabang': clean_text(libur['Cabang']) if 'Cabang' in libur else "",
+        }).dropna(subset=['Tanggal'])
+        self.libur = libur.sort_values('Tanggal', kind='stable').reset_index(drop=True)
+        self.weekmask = weekmask
+
+        masuk = self.libur['Jenis'].str.strip().str.upper() == JENIS_MASUK
+        umum = self.libur[(self.libur['Cabang'] == "") & ~masuk]
+        self.holidays = np.unique(to_days(umum['Tanggal']))
+        self.tahun = sorted(set(umum['Tanggal'].dt.year))
+
+        # Override cabang: libur tambahan & hari libur umum yang tetap masuk
+        self.cabang_holidays = {}
+        for cabang, rows in self.libur[self.libur['Cabang'] != ""].groupby('Cabang'):
+            is_masuk = masuk[rows.index].to_numpy()
+            hari = np.union1d(self.holidays, to_days(rows.loc[~is_masuk, 'Tanggal']))
+            self.cabang_holidays[cabang] = np.setdiff1d(hari, to_days(rows.loc[is_masuk, 'Tanggal']))
+
+        self._busdaycal = {None: np.busdaycalendar(weekmask, holidays=self.holidays)}
+        for cabang, hari in self.cabang_holidays.items():
+            self._busdaycal[cabang] = np.busdaycalendar(weekmask, holidays=hari)
+
+    @classmethod
+    def from_dict(cls, libur_dict, jenis=JENIS_DEFAULT):
+        return cls(pd.DataFrame({'Tanggal': list(libur_dict), 'Keterangan': list(libur_dict.values()),
+                                 'Jenis': jenis}))
+
+    @classmethod
+    def from_file(cls, file, base=None):
+        # Kolom: Tanggal, Keterangan, Jenis (Nasional / Cuti Bersama / Perusahaan / Masuk), Cabang (opsional)
+        try:
+            df = pd.read_excel(file)
+        except Exception:
+            if hasattr(file, 'seek'):
+                file.seek(0)
+            df = pd.read_csv(file, sep=None, engine='python')
+        cols = {str(c).strip().upper(): c for c in df.columns}
+
+        # Kolom dicocokkan berurutan (Tanggal dulu); kolom yang sudah terpakai tidak ikut dicocokkan
+        # lagi, jadi header "Tanggal Libur" tidak sekaligus terbaca sebagai Keterangan
+        libur = pd.DataFrame(index=df.index)
+        for field, keys in KOLOM_KALENDER.items():
+            k = _cari_kolom(cols, keys)
+            if k is not None:
+                libur[field] = df[cols.pop(k)]
+        if 'Tanggal' not in libur:
+            raise ValueError("Kolom Tanggal tidak ditemukan di file kalender libur.")
+        if base is not None:
+            libur = pd.concat([base.libur, libur], ignore_index=True)
+        return cls(libur)
+
+    def __contains__(self, tgl):
+        # Supaya get_status (referensi row-wise) tetap bisa `tgl in libur_nasional`
+        return bool(_isin_sorted(to_days([tgl]), self.holidays)[0])
+
+    def _per_cabang(self, days, cabang, fn):
+        # fn(days_subset, cabang_key) dipanggil sekali per cabang unik
+        if cabang is None:
+            return fn(days, None)
+        codes, uniq = pd.factorize(clean_text(pd.Series(cabang)))
+        hasil = np.zeros(len(days), dtype=bool)
+        for i, c in enumerate(uniq):
+            pilih = codes == i
+            hasil[pilih] = fn(days[pilih], c if c in self._busdaycal else None)
+        return hasil
+
+    def is_weekend(self, dates):
+        return ~np.is_busday(to_days(dates), weekmask=self.weekmask)
+
+    def is_holiday(self, dates, cabang=None):
+        holidays = lambda c: self.holidays if c is None else self.cabang_holidays[c]
+        return self._per_cabang(to_days(dates), cabang, lambda d, c: _isin_sorted(d, holidays(c)))
+
+    def is_business_day(self, dates, cabang=None):
+        return self._per_cabang(to_days(dates), cabang,
+                                lambda d, c: np.is_busday(d, busdaycal=self._busdaycal[c]))
+
+    def business_days(self, start, end, cabang=None):
+        # Jumlah hari kerja inklusif [start, end]
+        return np.busday_count(to_days(start), to_days(end) + 1, busdaycal=self._busdaycal[cabang])
+
+    def nama_libur(self, dates):
+        nama = self.libur.drop_duplicates('Tanggal').set_index('Tanggal')['Keterangan']
+        return pd.Series(pd.to_datetime(pd.Series(dates)).dt.normalize().map(nama).to_numpy())
+
+    def tahun_belum_ada(self, dates):
+        # Tahun di data yang belum punya satu pun libur umum di kalender
+        return sorted(set(pd.DatetimeIndex(pd.unique(pd.Series(dates))).year) - set(self.tahun))
+
+
+def as_calendar(libur):
+    return libur if isinstance(libur, HolidayCalendar) else HolidayCalendar.from_dict(libur)
@@ -0,0 +1,313 @@
+import io
+import os
+import csv
+import hashlib
+import multiprocessing
+import time
+from itertools import islice
+from multiprocessing.connection import wait
+import pandas as pd
+from openpyxl import load_workbook
+from engine import DailyLastReducer
+
+# --- FUNGSI SMART LOAD (SINGLE PASS) ---
+HEADER_SCAN_ROWS = 10
+SNIFF_BYTES = 64 * 1024
+LOAD_TIMEOUT = 120
+CHUNK_ROWS = 200_000
+
+
+def file_digest(data):
+    # Digest isi file untuk key cache (bukan objek UploadedFile-nya)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def source_signature(source):
+    # Identitas isi sumber untuk key cache: digest untuk upload/bytes, (path, ukuran, mtime)
+    # untuk file di server supaya file besar tidak perlu dibaca ulang
+    if source is None:
+        return None
+    if isinstance(source, (str, os.PathLike)):
+        st = os.stat(source)
+        return [os.path.abspath(source), st.st_size, st.st_mtime_ns]
+    return file_digest(read_bytes(source))
+
+
+def write_parquet(df, path):
+    # Kolom object campuran (mis. teks mentah Excel) disamakan jadi string dulu
+    obj = [c for c in df.columns if df[c].dtype == object]
+    df.astype({c: 'string' for c in obj}).to_parquet(path, index=False)
+
+
+def read_bytes(source):
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read()
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+
+def is_header_row(values):
+    txt = " ".join(str(v) for v in values).upper()
+    return "NAMA" in txt and ("MASUK" in txt or "ABSEN" in txt)
+
+
+def find_header_idx(rows):
+    for i, row in enumerate(rows[:HEADER_SCAN_ROWS]):
+        if is_header_row(row):
+            return i
+    return 0
+
+
+def header_names(values):
+    # Sama dengan penamaan pandas: header kosong -> "Unnamed: i", duplikat -> "X.1"
+    names, seen = [], {}
+    for i, v in enumerate(values):
+        name = f"Unnamed: {i}" if v is None or str(v).strip() == "" else str(v)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def is_excel(data, name=None):
+    if name and name.lower().endswith(('.xlsx', '.xlsm')):
+        return True
+    if name and name.lower().endswith('.csv'):
+        return False
+    return data[:4] == b'PK\x03\x04'
+
+
+def read_excel_single_pass(data):
+    # Cursor read-only openpyxl: baris header dicari sambil streaming, tanpa baca ulang file
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= HEADER_SCAN_ROWS:
+                break
+        header_idx = find_header_idx(buffer)
+
+        header = header_names(buffer[header_idx]) if buffer else []
+        body = buffer[header_idx + 1:]
+        body.extend(rows)
+    finally:
+        wb.close()
+
+    n = len(header)
+    records = [tuple(r[:n]) + (None,) * (n - len(r)) for r in body if any(v is not None for v in r)]
+    return pd.DataFrame.from_records(records, columns=header)
+
+
+def sniff_delimiter(lines):
+    sample = "\n".join(lines)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        # Fallback: delimiter yang paling sering muncul di baris header
+        return max(",;\t|", key=lambda d: lines[0].count(d)) if lines else ","
+
+
+def read_csv_single_pass(data):
+    # Header dicari dari teks baris mentah, delimiter di-sniff mulai dari baris header
+    # (baris judul di atasnya sering bikin Sniffer salah tebak), lalu parse sekali pakai engine C
+    lines = data[:SNIFF_BYTES].decode('utf-8-sig', errors='ignore').splitlines()
+    header_idx = find_header_idx([[line] for line in lines])
+    sep = sniff_delimiter(lines[header_idx:header_idx + 20])
+    return pd.read_csv(io.BytesIO(data), sep=sep, skiprows=header_idx, header=0,
+                       encoding='utf-8-sig', engine='c')
+
+
+def load_data_smart(source, name=None):
+    data = read_bytes(source)
+    if name is None:
+        name = getattr(source, 'name', None) or (source if isinstance(source, str) else None)
+    if is_excel(data, name):
+        return read_excel_single_pass(data)
+    return read_csv_single_pass(data)
+
+
+# --- MULTI FILE (PARALEL) ---
+def load_and_normalize(data, name):
+    # Dijalankan di worker: parse + strip nama kolom sekalian
+    df = load_data_smart(data, name)
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
+
+
+def _load_worker(conn, data, name):
+    # Isi satu proses per file: hasil / pesan error dikirim lewat pipe
+    try:
+        conn.send((True, load_and_normalize(data, name)))
+    except Exception as e:
+        conn.send((False, str(e)))
+    finally:
+        conn.close()
+
+
+def load_many(files, max_workers=None, timeout=LOAD_TIMEOUT, on_result=None):
+    # files: list (key, name, data). Return (dict key -> DataFrame, list (name, pesan error))
+    # on_result(key, df) dipanggil begitu satu file selesai (mis. simpan ke cache); exception
+    # dari situ (pembatalan job) menghentikan sisa file
+    hasil, errors = {}, []
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(files)))
+
+    # Satu proses per file (maks. workers jalan bersamaan), timeout dihitung sejak proses file
+    # itu mulai. Proses yang lewat batas di-kill, jadi parse yang macet benar-benar berhenti
+    # (worker process pool tidak bisa dihentikan per tugas). Satu file / satu core juga lewat
+    # proses terpisah: parse di proses ini tidak bisa dihentikan saat timeout.
+    # spawn (bukan fork): server Streamlit multi-thread, fork di situ rawan deadlock
+    ctx = multiprocessing.get_context('spawn')
+    antri, jalan = list(files), {}  # jalan: pipe baca -> (key, name, proses, deadline)
+    try:
+        while antri or jalan:
+            while antri and len(jalan) < workers:
+                key, name, data = antri.pop(0)
+                baca, tulis = ctx.Pipe(duplex=False)
+                proc = ctx.Process(target=_load_worker, args=(tulis, data, name), daemon=True)
+                proc.start()
+                tulis.close()
+                jalan[baca] = (key, name, proc, time.monotonic() + timeout)
+
+            sisa = min(deadline for *_, deadline in jalan.values()) - time.monotonic()
+            for baca in wait(list(jalan), timeout=max(sisa, 0)):
+                key, name, proc, _ = jalan.pop(baca)
+                try:
+                    ok, isi = baca.recv()
+                except EOFError:
+                    ok, isi = False, "Proses parse berhenti tanpa hasil"
+                baca.close()
+                proc.join()
+                if not ok:
+                    errors.append((name, isi))
+                    continue
+                hasil[key] = isi
+                if on_result is not None:
+                    on_result(key, isi)
+
+            sekarang = time.monotonic()
+            for baca, (key, name, proc, deadline) in list(jalan.items()):
+                if sekarang >= deadline and not baca.poll():
+                    proc.kill()
+                    proc.join()
+                    baca.close()
+                    del jalan[baca]
+                    errors.append((name, f"Timeout, lebih dari {timeout} detik"))
+    finally:
+        # Pembatalan / error di on_result: sisa proses ikut dihentikan
+        for baca, (_, _, proc, _) in jalan.items():
+            proc.kill()
+            proc.join()
+            baca.close()
+    return hasil, errors
+
+
+# --- STREAMING CSV (FILE BESAR) ---
+def source_name(source):
+    return getattr(source, 'name', None) or os.path.basename(str(source))
+
+
+def read_head(source, n):
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source[:n])
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read(n)
+    source.seek(0)
+    head = source.read(n)
+    source.seek(0)
+    return head
+
+
+def scan_csv_header(source):
+    # Cuma baca potongan awal file: posisi header, delimiter & nama kolom.
+    # utf-8-sig: BOM dari Excel ("CSV UTF-8") tidak ikut jadi bagian nama kolom pertama
+    lines = read_head(source, SNIFF_BYTES).decode('utf-8-sig', errors='ignore').splitlines()
+    header_idx = find_header_idx([[line] for line in lines])
+    sep = sniff_delimiter(lines[header_idx:header_idx + 20])
+    values = next(csv.reader([lines[header_idx]], delimiter=sep)) if lines else []
+    columns = [c.strip() for c in header_names(values)]
+    return header_idx, sep, columns
+
+
+def scan_excel_columns(data):
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        buffer = list(islice(wb.active.iter_rows(values_only=True), HEADER_SCAN_ROWS))
+    finally:
+        wb.close()
+    if not buffer:
+        return []
+    return [c.strip() for c in header_names(buffer[find_header_idx(buffer)])]
+
+
+def scan_columns(sources):
+    # Nama kolom gabungan semua file (urutan sama dengan hasil concat) tanpa parse isi file
+    cols, errors = [], []
+    for source in sources:
+        try:
+            if is_excel(read_head(source, 4), source_name(source)):
+                columns = scan_excel_columns(read_bytes(source))
+            else:
+                columns = scan_csv_header(source)[2]
+            for c in columns:
+                if c not in cols:
+                    cols.append(c)
+        except Exception as e:
+            errors.append((source_name(source), str(e)))
+    return cols, errors
+
+
+def iter_csv_chunks(source, mapping, chunksize=CHUNK_ROWS):
+    # Yield chunk berisi kolom hasil mapping saja (kolom lain tidak pernah dimaterialisasi)
+    header_idx, sep, columns = scan_csv_header(source)
+    missing = [c for c in mapping if c not in columns]
+    if missing:
+        raise ValueError(f"Kolom {missing} tidak ada di {source_name(source)}")
+
+    posisi = sorted({columns.index(c) for c in mapping})
+    src = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    reader = pd.read_csv(src, sep=sep, skiprows=header_idx + 1, header=None, usecols=posisi,
+                         dtype=str, chunksize=chunksize, encoding='utf-8-sig', engine='c')
+    with reader:
+        for chunk in reader:
+            chunk.columns = [columns[i] for i in chunk.columns]
+            yield chunk
+
+
+def stream_activity(sources, mapping, chunksize=CHUNK_ROWS, reducer=None):
+    # Tiap chunk di-parse & dilipat ke reducer berjalan (DailyLastReducer / PunchReducer)
+    reducer = reducer or DailyLastReducer()
+    for source in sources:
+        for chunk in iter_csv_chunks(source, mapping, chunksize):
+            reducer.add(chunk, mapping)
+    return reducer.result()
+
+
+# --- DATA KARYAWAN (TANGGAL JOIN / RESIGN) ---
+def load_masa_kerja(source, name=None):
+    # Return DataFrame Nama, Mulai, Selesai (NaT = tidak dibatasi), Cabang ('' = tanpa override libur)
+    df = load_and_normalize(read_bytes(source), name or source_name(source))
+
+    def pick(keys, default=pd.NaT):
+        for c in df.columns:
+            if any(k in c.upper() for k in keys):
+                return df[c]
+        return pd.Series(default, index=df.index)
+
+    masa_kerja = pd.DataFrame({
+        'Nama': pick(['NAMA', 'NAME']),
+        'Mulai': pd.to_datetime(pick(['JOIN', 'MULAI', 'HIRE', 'BERGABUNG', 'MASUK']), errors='coerce').dt.normalize(),
+        'Selesai': pd.to_datetime(pick(['RESIGN', 'KELUAR', 'SELESAI', 'EXIT', 'BERHENTI']), errors='coerce').dt.normalize(),
+        'Cabang': pick(['CABANG', 'BRANCH', 'SITE'], default="").fillna("").astype(str).str.strip().str.upper(),
+    })
+    return masa_kerja.dropna(subset=['Nama'])
@@ -0,0 +1,151 @@
+import re
+import threading
+from itertools import islice
+import numpy as np
+import pandas as pd
+
+# --- KLASIFIKASI LOKASI (WFO / WFH) ---
+METER_PER_DERAJAT = 111_320
+RADIUS_DEFAULT_M = 150
+# Registry dipakai bersama semua sesi (st.cache_resource): memo dibatasi supaya tidak tumbuh terus
+MAX_MEMO_LOKASI = 100_000
+
+# "lat, long" di kolom Lokasi (contoh: "-6.2567, 106.6145" dari aplikasi mobile)
+COORD_PATTERN = r'(-?\d{1,2}\.\d+)\s*[,;]\s*(-?\d{1,3}\.\d+)'
+
+
+def contains_any(s, keywords):
+    # Sama dengan any(k in x for k in keywords), tapi sekali jalan per kolom
+    if len(keywords) == 0:
+        return np.zeros(len(s), dtype=bool)
+    pattern = "|".join(re.escape(k) for k in keywords)
+    return s.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+
+
+def clean_text(s):
+    return s.fillna("").astype(str).str.strip().str.upper()
+
+
+def parse_coords(s):
+    # Return (lat, lon) float array; NaN kalau bukan koordinat valid
+    ext = s.str.extract(COORD_PATTERN).astype(float)
+    lat, lon = ext[0].to_numpy(), ext[1].to_numpy()
+    valid = (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+    lat = np.where(valid, lat, np.nan)
+    lon = np.where(valid, lon, np.nan)
+    return lat, lon
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6_371_000 * np.arcsin(np.sqrt(a))
+
+
+class GeofenceIndex:
+    # Grid index sederhana: tiap kantor didaftarkan ke sel grid-nya. Sel minimal
+    # selebar radius geofence terbesar, jadi cukup cek 3x3 sel di sekitar titik.
+    def __init__(self, geofences):
+        self.fences = geofences.reset_index(drop=True)
+        lat = self.fences['Lat'].to_numpy(dtype=float)
+        radius = self.fences['Radius'].to_numpy(dtype=float)
+        cos_lat = np.maximum(np.cos(np.radians(lat)), 0.01)
+        self.cell = float(np.max(radius / (METER_PER_DERAJAT * cos_lat)))
+        self.cells = pd.DataFrame({
+            'cx': np.floor(lat / self.cell).astype(np.int64),
+            'cy': np.floor(self.fences['Long'].to_numpy(dtype=float) / self.cell).astype(np.int64),
+            'fence': np.arange(len(self.fences)),
+        })
+
+    def contains(self, lat, lon):
+        hasil = np.zeros(len(lat), dtype=bool)
+        ok = ~np.isnan(lat) & ~np.isnan(lon)
+        if not ok.any():
+            return hasil
+
+        pt = np.flatnonzero(ok)
+        cx = np.floor(lat[pt] / self.cell).astype(np.int64)
+        cy = np.floor(lon[pt] / self.cell).astype(np.int64)
+        tetangga = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+        kandidat = pd.concat(
+            [pd.DataFrame({'pt': pt, 'cx': cx + dx, 'cy': cy + dy}) for dx, dy in tetangga],
+            ignore_index=True
+        ).merge(self.cells, on=['cx', 'cy'])
+        if kandidat.empty:
+            return hasil
+
+        f = self.fences.loc[kandidat['fence'].to_numpy()]
+        jarak = haversine_m(lat[kandidat['pt']], lon[kandidat['pt']],
+                            f['Lat'].to_numpy(dtype=float), f['Long'].to_numpy(dtype=float))
+        inside = kandidat.loc[jarak <= f['Radius'].to_numpy(dtype=float), 'pt'].unique()
+        hasil[inside] = True
+        return hasil
+
+
+class KantorRegistry:
+    # Daftar kantor (nama + geofence opsional) dengan memo: tiap string Lokasi
+    # cukup diklasifikasi sekali, lalu hasilnya di-broadcast ke semua baris.
+    def __init__(self, kantor_list, geofences=None):
+        self.kantor_list = [str(k).strip().upper() for k in kantor_list if str(k).strip()]
+        self.geo_index = None
+        if geofences is not None and not geofences.empty:
+            self.geo_index = GeofenceIndex(geofences)
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, file, kantor_list=()):
+        # Kolom: Kantor, Lat, Long, Radius (meter, opsional)
+        try:
+            df = pd.read_excel(file)
+        except Exception:
+            if hasattr(file, 'seek'):
+                file.seek(0)
+            df = pd.read_csv(file, sep=None, engine='python')
+        df.columns = [str(c).strip().upper() for c in df.columns]
+
+        nama = df['KANTOR'].dropna().astype(str).tolist() if 'KANTOR' in df else []
+        geofences = None
+        if 'LAT' in df and 'LONG' in df:
+            geofences = pd.DataFrame({
+                'Kantor': df['KANTOR'] if 'KANTOR' in df else "",
+                'Lat': pd.to_numeric(df['LAT'], errors='coerce'),
+                'Long': pd.to_numeric(df['LONG'], errors='coerce'),
+                'Radius': pd.to_numeric(df['RADIUS'], errors='coerce') if 'RADIUS' in df else RADIUS_DEFAULT_M,
+            })
+            geofences['Radius'] = geofences['Radius'].fillna(RADIUS_DEFAULT_M)
+            geofences = geofences.dropna(subset=['Lat', 'Long'])
+        return cls(list(kantor_list) + nama, geofences)
+
+    def _classify_unique(self, uniq):
+        s = pd.Series(uniq, dtype=object).astype(str)
+        is_wfo = contains_any(s, self.kantor_list)
+        if self.geo_index is not None:
+            lat, lon = parse_coords(s)
+            is_wfo = is_wfo | self.geo_index.contains(lat, lon)
+        return is_wfo
+
+    def classify(self, lokasi):
+        codes, uniq = pd.factorize(clean_text(lokasi))
+        uniq = np.asarray(uniq, dtype=object)
+
+        with self._lock:
+            baru = [u for u in uniq if u not in self._memo]
+        hasil_baru = dict(zip(baru, self._classify_unique(baru))) if baru else {}
+
+        with self._lock:
+            # Entri yang sempat dibuang sesi lain di antara dua lock diklasifikasi ulang
+            hilang = [u for u in uniq if u not in hasil_baru and u not in self._memo]
+            if hilang:
+                hasil_baru.update(zip(hilang, self._classify_unique(hilang)))
+            hasil_unik = np.array([hasil_baru[u] if u in hasil_baru else self._memo[u] for u in uniq], dtype=bool)
+            self._memo.update(hasil_baru)
+            # Lewat batas -> entri terlama dibuang (string lokasi itu nanti diklasifikasi ulang)
+            lebih = len(self._memo) - MAX_MEMO_LOKASI
+            for u in list(islice(self._memo, max(lebih, 0))):
+                del self._memo[u]
+        return hasil_unik[codes]
+
+
+def as_registry(kantor):
+    return kantor if isinstance(kantor, KantorRegistry) else KantorRegistry(kantor)
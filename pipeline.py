@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+from appraisal import TARGET_JAM
+from cube import build_cube
+from arrow_backend import BACKEND_DEFAULT, process_grid_arrow
+from engine import (build_master_grid, cabang_per_baris, compact_frame, compute_status, kantor_list,
+                    libur_nasional, prepare_activity, PunchReducer, reduce_punch_log)
+from kalender import as_calendar
+from loader import stream_activity
+from profiling import NULL_PROFILER
+from slicer import SlicerIndex, sort_for_slicer
+
+# --- PIPELINE PROSES DASHBOARD ---
+# Langkah "Proses Dashboard" tanpa UI, dipakai app.py, benchmark.py & CLI batch.
+# Tiap langkah dicatat lewat profiler (lihat profiling.py).
+
+
+def tahap_proses(streaming=False, punch=False, hemat_memori=True, backend=BACKEND_DEFAULT):
+    # Nama stage yang akan dicatat profiler, berurutan (dipakai progress job background)
+    if streaming:
+        ingest = ['stream_csv']
+    elif punch:
+        ingest = ['file_load', 'reduce_punch']
+    else:
+        ingest = ['file_load', 'cleaning', 'parsing_tanggal', 'auto_checkout']
+    if backend == 'arrow':
+        proses = ['cross_join', 'arrow_plan', 'arrow_exec', 'merge']
+    else:
+        proses = ['cross_join', 'merge', 'status', 'durasi_performa', 'ekstraksi_waktu']
+    proses += ['compact_frame'] if hemat_memori else []
+    return ingest + proses + ['sort_slicer', 'build_cube', 'slicer_index']
+
+
+def ingest_activity(mapping, df_raw=None, sources=None, punch=False, profiler=NULL_PROFILER):
+    # 1-2. Cleaning, Parsing Date & Auto Checkout. sources = file CSV untuk mode streaming
+    if sources is not None:
+        with profiler.stage('stream_csv') as s:
+            df_act = stream_activity(sources, mapping, reducer=PunchReducer() if punch else None)
+            s['baris_keluar'] = len(df_act)
+        return df_act
+    if punch:
+        with profiler.stage('reduce_punch', len(df_raw)) as s:
+            df_act = reduce_punch_log(df_raw, mapping)
+            s['baris_keluar'] = len(df_act)
+        return df_act
+    return prepare_activity(df_raw, mapping, profiler)
+
+
+def cek_performa(durasi, target_jam=TARGET_JAM):
+    # "-" kalau tidak ada durasi, Under kalau di bawah target, selain itu On Track
+    label = np.select([durasi == 0, durasi < target_jam], ["-", "Under"], default="On Track")
+    return pd.Series(label.astype(object), index=durasi.index)
+
+
+def process_activity(df_act, masa_kerja=None, libur=libur_nasional, kantor=kantor_list,
+                     target_jam=TARGET_JAM, hemat_memori=True, profiler=NULL_PROFILER, backend=BACKEND_DEFAULT):
+    # backend 'arrow': langkah 3-4 + ekstraksi waktu sebagai satu plan Acero (hasil identik)
+    if backend == 'arrow':
+        df_final = process_grid_arrow(df_act, masa_kerja, libur, kantor, target_jam, profiler)
+        return finish_frame(df_final, hemat_memori, profiler)
+    # 3. Cross Join (Master Data)
+    df_final = build_master_grid(df_act, masa_kerja, profiler)
+    return process_grid(df_final, masa_kerja, libur, kantor, target_jam, hemat_memori, profiler)
+
+
+def process_grid(df_final, masa_kerja=None, libur=libur_nasional, kantor=kantor_list,
+                 target_jam=TARGET_JAM, hemat_memori=True, profiler=NULL_PROFILER):
+    # Langkah 4 dst. per baris grid (Nama x Tanggal); dipakai juga untuk sebagian grid (inkremental)
+
+    # --- 4. LOGIKA STATUS ---
+    with profiler.stage('status', len(df_final)) as s:
+        kalender = as_calendar(libur)
+        cabang = cabang_per_baris(df_final['Nama'], masa_kerja)
+        df_final['Status'] = compute_status(df_final, libur_nasional=kalender, kantor_list=kantor, cabang=cabang)
+        df_final['Hari_Kerja'] = kalender.is_business_day(df_final['Tanggal'], cabang)
+        s['baris_keluar'] = len(df_final)
+
+    # Hitung Durasi & Performa
+    with profiler.stage('durasi_performa', len(df_final)) as s:
+        df_final['Durasi'] = (df_final['Absen Keluar'] - df_final['Absen Masuk']).dt.total_seconds() / 3600
+        df_final['Durasi'] = df_final['Durasi'].fillna(0).round(2)
+        df_final['Performa'] = cek_performa(df_final['Durasi'], target_jam)
+        s['baris_keluar'] = len(df_final)
+
+    # --- EKSTRAKSI WAKTU UNTUK SLICER ---
+    # Tanggal sudah datetime64 dari master grid, tidak perlu salinan Tanggal_DT
+    with profiler.stage('ekstraksi_waktu', len(df_final)) as s:
+        df_final['Tahun'] = df_final['Tanggal'].dt.year
+        df_final['Bulan'] = df_final['Tanggal'].dt.month_name()
+        df_final['Bulan_Angka'] = df_final['Tanggal'].dt.month
+        df_final['Minggu_Ke'] = df_final['Tanggal'].dt.isocalendar().week
+        s['baris_keluar'] = len(df_final)
+    return finish_frame(df_final, hemat_memori, profiler)
+
+
+def finish_frame(df_final, hemat_memori=True, profiler=NULL_PROFILER):
+    # Layout akhir df_full (sama untuk semua backend): dtype ringkas & urutan slicer
+    if hemat_memori:
+        with profiler.stage('compact_frame', len(df_final)) as s:
+            df_final = compact_frame(df_final)
+            s['baris_keluar'] = len(df_final)
+
+    with profiler.stage('sort_slicer', len(df_final)) as s:
+        df_final = sort_for_slicer(df_final)
+        s['baris_keluar'] = len(df_final)
+    return df_final
+
+
+def build_views(df_final, profiler=NULL_PROFILER, cube=None):
+    # Struktur yang dipakai visualisasi: cube agregat (kalau belum ada, mis. dari cache) & index slicer
+    if cube is None:
+        with profiler.stage('build_cube', len(df_final)) as s:
+            cube = build_cube(df_final)
+            s['baris_keluar'] = len(cube)
+    with profiler.stage('slicer_index', len(df_final)) as s:
+        slicer = SlicerIndex(df_final)
+        s['baris_keluar'] = len(df_final)
+    return cube, slicer
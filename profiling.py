@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+import pandas as pd
+
+# --- PROFILING PER STAGE ---
+# Tiap stage mencatat waktu, baris masuk/keluar & delta memori, lalu ditulis sebagai satu
+# baris log JSON (logger "hris.pipeline") supaya bisa di-scrape ops.
+LOG_LEVEL = os.environ.get('HRIS_PIPELINE_LOG', 'INFO')
+KOLOM_PROFIL = ['stage', 'detik', 'baris_masuk', 'baris_keluar', 'mem_delta_mb', 'peak_mb', 'error']
+
+logger = logging.getLogger('hris.pipeline')
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+
+def rss_mb():
+    # RSS proses saat ini (Linux); None kalau tidak tersedia
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class PipelineProfiler:
+    # memory='rss' (murah, default app) atau 'tracemalloc' (peak per stage, dipakai benchmark;
+    # tracemalloc harus sudah di-start pemanggil)
+    def __init__(self, run_id=None, memory='rss', log=True, **konteks):
+        self.run_id = run_id or uuid.uuid4().hex[:8]
+        self.memory = memory
+        self.log = log
+        self.konteks = konteks
+        self.records = []
+
+    def _mem(self):
+        if self.memory == 'tracemalloc':
+            return tracemalloc.get_traced_memory()[0] / 2**20
+        return rss_mb()
+
+    @contextmanager
+    def stage(self, name, baris_masuk=None):
+        info = {'stage': name, 'baris_masuk': baris_masuk, 'baris_keluar': None}
+        if self.memory == 'tracemalloc':
+            tracemalloc.reset_peak()
+        base = self._mem()
+        t0 = time.perf_counter()
+        try:
+            yield info
+        except Exception as e:
+            info['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            info['detik'] = round(time.perf_counter() - t0, 4)
+            akhir = self._mem()
+            if base is not None and akhir is not None:
+                info['mem_delta_mb'] = round(akhir - base, 2)
+            if self.memory == 'tracemalloc':
+                info['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20 - base, 2)
+            self.records.append(info)
+            if self.log:
+                logger.info(json.dumps({'event': 'pipeline_stage', 'run': self.run_id, **self.konteks, **info},
+                                       default=str))
+
+    def frame(self):
+        return pd.DataFrame(self.records, columns=KOLOM_PROFIL).dropna(axis=1, how='all')
+
+    def total_detik(self):
+        return sum(r['detik'] for r in self.records)
+
+
+class _NullProfiler:
+    # Dipakai kalau pemanggil tidak butuh profiling (default parameter fungsi engine)
+    @contextmanager
+    def stage(self, name, baris_masuk=None):
+        yield {}
+
+
+NULL_PROFILER = _NullProfiler()
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+import pandas as pd
+from engine import frame_memory_mb
+from loader import write_parquet
+
+# --- CACHE HASIL LINTAS SESI ---
+# Satu instance dipakai semua sesi (lewat st.cache_resource). Isi = DataFrame atau dict
+# nama -> DataFrame. Memori dibatasi budget (LRU); entri yang tergusur di-spill ke parquet
+# di disk (juga LRU, dibatasi disk_mb) dan dimuat balik saat diminta lagi.
+CACHE_BUDGET_MB = float(os.environ.get('HRIS_CACHE_MB', 1024))
+CACHE_DISK_MB = float(os.environ.get('HRIS_CACHE_DISK_MB', 8192))
+CACHE_DIR = os.environ.get('HRIS_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'hris_cache')
+_FRAME = '_frame'  # nama internal kalau isi cache satu DataFrame saja
+
+
+def result_key(*parts):
+    raw = json.dumps(parts, default=str, sort_keys=True)
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _frames(value):
+    return {_FRAME: value} if isinstance(value, pd.DataFrame) else value
+
+
+def _unframes(frames):
+    return frames[_FRAME] if list(frames) == [_FRAME] else frames
+
+
+class ResultCache:
+    def __init__(self, budget_mb=CACHE_BUDGET_MB, spill_dir=None, disk_mb=CACHE_DISK_MB):
+        self.budget_mb = budget_mb
+        self.spill_dir = spill_dir
+        self.disk_mb = disk_mb
+        self._lock = threading.RLock()
+        self._mem = OrderedDict()   # key -> (value, mb)
+        self._disk = OrderedDict()  # key -> (dict nama -> path, mb)
+        self.hits = self.disk_hits = self.misses = 0
+        if spill_dir:
+            # Spill dari proses sebelumnya tidak terindeks lagi -> dibersihkan
+            os.makedirs(spill_dir, exist_ok=True)
+            for f in os.listdir(spill_dir):
+                if f.endswith('.parquet'):
+                    self._remove({f: os.path.join(spill_dir, f)})
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._mem or key in self._disk
+
+    def get(self, key):
+        with self._lock:
+            if key in self._mem:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return self._mem[key][0]
+            if key not in self._disk:
+                self.misses += 1
+                return None
+            self._disk.move_to_end(key)
+            paths = self._disk[key][0]
+
+        # Baca parquet di luar lock: sesi lain tidak menunggu spill besar dimuat
+        try:
+            value = _unframes({n: pd.read_parquet(p) for n, p in paths.items()})
+        except Exception:
+            # File sempat tergusur / ditulis ulang oleh sesi lain saat dibaca
+            value = None
+
+        with self._lock:
+            if self._disk.get(key, (None,))[0] is paths:
+                del self._disk[key]
+                self._remove(paths)
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            if key in self._mem:
+                # Sesi lain sudah memuat / menyimpan key ini duluan
+                self._mem.move_to_end(key)
+                return self._mem[key][0]
+            self._put(key, value)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._disk:
+                self._remove(self._disk.pop(key)[0])
+            self._put(key, value)
+
+    def _put(self, key, value):
+        self._mem[key] = (value, sum(frame_memory_mb(df) for df in _frames(value).values()))
+        self._mem.move_to_end(key)
+        while self._mem and self.mem_mb() > self.budget_mb:
+            old_key, (old_value, _) = self._mem.popitem(last=False)
+            self._spill(old_key, old_value)
+
+    def _spill(self, key, value):
+        if not self.spill_dir:
+            return
+        frames = _frames(value)
+        paths = {n: os.path.join(self.spill_dir, f"{key}.{n}.parquet") for n in frames}
+        try:
+            for n, df in frames.items():
+                write_parquet(df, paths[n])
+        except Exception:
+            # Spill gagal (disk penuh, kolom tidak bisa ditulis): entri cukup dibuang
+            self._remove(paths)
+            return
+        self._disk[key] = (paths, sum(os.path.getsize(p) for p in paths.values()) / 2**20)
+        while self._disk and self.disk_usage_mb() > self.disk_mb:
+            self._remove(self._disk.popitem(last=False)[1][0])
+
+    @staticmethod
+    def _remove(paths):
+        for p in paths.values():
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+    def mem_mb(self):
+        return sum(mb for _, mb in self._mem.values())
+
+    def disk_usage_mb(self):
+        return sum(mb for _, mb in self._disk.values())
+
+    def stats(self):
+        with self._lock:
+            return {'entri_memori': len(self._mem), 'memori_mb': round(self.mem_mb(), 1),
+                    'budget_mb': self.budget_mb, 'entri_disk': len(self._disk),
+                    'disk_mb': round(self.disk_usage_mb(), 1), 'hit': self.hits,
+                    'hit_disk': self.disk_hits, 'miss': self.misses}
+
+    def clear(self):
+        with self._lock:
+            for paths, _ in self._disk.values():
+                self._remove(paths)
+            self._mem.clear()
+            self._disk.clear()
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+# --- INDEX SLICER (FILTER SIDEBAR) ---
+# df_full disimpan urut (Tahun, Minggu_Ke, Nama, Tanggal): filter Tahun + range Minggu
+# jadi potongan baris berurutan, sisanya (Bulan, Nama) cukup mengiris posisi di dalamnya.
+SORT_KEYS = ['Tahun', 'Minggu_Ke', 'Nama', 'Tanggal']
+NAMA_POS_MAX = 64  # di atas ini filter Nama pakai lookup kode, bukan gabung posisi per nama
+
+
+def sort_for_slicer(df):
+    return df.sort_values(SORT_KEYS, kind='stable', ignore_index=True)
+
+
+def _positions_by_code(codes, n_codes):
+    # posisi baris per kode (urut naik), tanpa loop per baris
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(n_codes + 1))
+    return [order[bounds[i]:bounds[i + 1]] for i in range(n_codes)]
+
+
+class SlicerIndex:
+    def __init__(self, df):
+        self.df = df
+        self.minggu = df['Minggu_Ke'].to_numpy()
+
+        # Tahun -> blok [awal, akhir)
+        tahun = df['Tahun'].to_numpy()
+        years, starts = np.unique(tahun, return_index=True)
+        ends = np.r_[starts[1:], len(df)]
+        self.tahun_blok = {int(y): (int(s), int(e)) for y, s, e in zip(years, starts, ends)}
+
+        self.bulan_codes, self.bulan_unik = pd.factorize(df['Bulan'], use_na_sentinel=False)
+        self.nama_codes, self.nama_unik = pd.factorize(df['Nama'], use_na_sentinel=False)
+        self.nama_pos = dict(zip(self.nama_unik, _positions_by_code(self.nama_codes, len(self.nama_unik))))
+
+        # Pilihan slicer sidebar, dihitung sekali
+        self.tahun_list = sorted(self.tahun_blok)
+        bulan = df[['Bulan', 'Bulan_Angka']].drop_duplicates().sort_values('Bulan_Angka')
+        self.bulan_list = bulan['Bulan'].tolist()
+        self.nama_list = sorted(self.nama_unik)
+        self.minggu_range = (int(self.minggu.min()), int(self.minggu.max())) if len(df) else (0, 0)
+
+    def __len__(self):
+        return len(self.df)
+
+    def _ranges(self, sel_tahun, sel_minggu):
+        ranges = []
+        for y in sorted({int(t) for t in sel_tahun}):
+            if y not in self.tahun_blok:
+                continue
+            s, e = self.tahun_blok[y]
+            lo = s + np.searchsorted(self.minggu[s:e], sel_minggu[0], side='left')
+            hi = s + np.searchsorted(self.minggu[s:e], sel_minggu[1], side='right')
+            if lo >= hi:
+                continue
+            if ranges and ranges[-1][1] == lo:
+                ranges[-1] = (ranges[-1][0], hi)
+            else:
+                ranges.append((lo, hi))
+        return ranges
+
+    def _lookup(self, unik, selected):
+        ok = np.zeros(len(unik), dtype=bool)
+        idx = pd.Index(unik).get_indexer(list(selected))
+        ok[idx[idx >= 0]] = True
+        return ok
+
+    def filter(self, sel_tahun, sel_bulan, sel_minggu, sel_nama):
+        ranges = self._ranges(sel_tahun, sel_minggu)
+        all_bulan = set(self.bulan_unik) <= set(sel_bulan)
+        all_nama = set(self.nama_unik) <= set(sel_nama)
+
+        if not ranges:
+            return self.df.iloc[0:0]
+        if all_bulan and all_nama and len(ranges) == 1:
+            # Potongan berurutan -> view, tanpa salinan
+            return self.df.iloc[ranges[0][0]:ranges[0][1]]
+
+        if not all_nama and len(sel_nama) <= NAMA_POS_MAX:
+            # Sedikit nama: gabung posisi per nama lalu iris dengan range tahun/minggu
+            pos = [self.nama_pos[n] for n in sel_nama if n in self.nama_pos]
+            pos = np.sort(np.concatenate(pos)) if pos else np.array([], dtype=np.intp)
+            los = np.array([r[0] for r in ranges])
+            his = np.array([r[1] for r in ranges])
+            k = np.searchsorted(los, pos, side='right') - 1
+            pos = pos[(k >= 0) & (pos < his[np.maximum(k, 0)])]
+        else:
+            pos = np.concatenate([np.arange(lo, hi) for lo, hi in ranges])
+            if not all_nama:
+                pos = pos[self._lookup(self.nama_unik, sel_nama)[self.nama_codes[pos]]]
+
+        if not all_bulan:
+            pos = pos[self._lookup(self.bulan_unik, sel_bulan)[self.bulan_codes[pos]]]
+        return self.df.take(pos)
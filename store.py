@@ -0,0 +1,173 @@
+import os
+import sqlite3
+from contextlib import closing
+import pandas as pd
+from cube import CUBE_KEYS
+from engine import STATUS_LIST, compact_frame
+from slicer import SORT_KEYS
+
+# --- STORE RIWAYAT ABSENSI (SQLITE) ---
+# Hasil proses harian di-upsert per (Nama, Tanggal) ke satu file database lokal, jadi bulan
+# berikutnya HR cukup upload file baru. Tabel cube (agregat Nama x Tahun/Bulan/Minggu) ikut
+# di-update untuk bucket yang tersentuh; filter sidebar jadi WHERE ber-index, dan Tab 1 cukup
+# memuat slice cube + slice data harian hasil filter.
+STORE_PATH = os.environ.get('HRIS_STORE')
+MAX_PARAM_IN = 500  # di atas ini filter Nama lewat tabel sementara, bukan IN (?, ?, ...)
+
+KOLOM_STORE = {
+    'Nama': 'TEXT NOT NULL', 'Tanggal': 'TEXT NOT NULL', 'Tahun': 'INTEGER', 'Bulan': 'TEXT',
+    'Bulan_Angka': 'INTEGER', 'Minggu_Ke': 'INTEGER', 'Lokasi': 'TEXT', 'Catatan': 'TEXT',
+    'Absen Masuk': 'TEXT', 'Absen Keluar': 'TEXT', 'Status': 'TEXT', 'Hari_Kerja': 'INTEGER',
+    'Durasi': 'REAL', 'Performa': 'TEXT',
+}
+KOLOM_WAKTU = ['Absen Masuk', 'Absen Keluar']
+KOLOM_CUBE_NILAI = STATUS_LIST + ['Baris', 'Durasi_Total', 'Durasi_Hadir', 'Hari_Durasi', 'Under']
+
+
+def _q(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _cols(names, prefix=''):
+    return ", ".join(prefix + _q(c) for c in names)
+
+
+# Agregat sama persis dengan cube.build_cube, dihitung di SQL
+_AGREGAT_CUBE = ", ".join(
+    [f"SUM(Status = '{s}') AS {_q(s)}" for s in STATUS_LIST] + [
+        "COUNT(*) AS Baris",
+        "SUM(Durasi) AS Durasi_Total",
+        "SUM(CASE WHEN Durasi > 0 THEN Durasi ELSE 0 END) AS Durasi_Hadir",
+        "SUM(Durasi > 0) AS Hari_Durasi",
+        "SUM(Performa = 'Under') AS Under",
+    ])
+
+
+class AttendanceStore:
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        with closing(self._connect()) as con, con:
+            con.execute(f"CREATE TABLE IF NOT EXISTS harian ("
+                        f"{', '.join(f'{_q(c)} {t}' for c, t in KOLOM_STORE.items())}, "
+                        f"PRIMARY KEY (Nama, Tanggal))")
+            con.execute(f"CREATE TABLE IF NOT EXISTS cube ("
+                        f"Nama TEXT, Tahun INTEGER, Bulan TEXT, Bulan_Angka INTEGER, Minggu_Ke INTEGER, "
+                        f"{', '.join(f'{_q(c)} REAL' for c in KOLOM_CUBE_NILAI)}, "
+                        f"PRIMARY KEY (Tahun, Minggu_Ke, Nama, Bulan_Angka))")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_harian_slicer ON harian (Tahun, Minggu_Ke, Nama)")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_cube_nama ON cube (Nama)")
+            # Key hasil proses yang sudah masuk (supaya hasil dari cache tidak di-append dua kali)
+            con.execute("CREATE TABLE IF NOT EXISTS sumber (key TEXT PRIMARY KEY, disimpan TEXT, baris INTEGER)")
+
+    def _connect(self):
+        # Koneksi per operasi: sesi Streamlit & thread job masing-masing jalan di thread sendiri
+        con = sqlite3.connect(self.path, timeout=60)
+        con.execute("PRAGMA journal_mode=WAL")
+        return con
+
+    # --- TULIS ---
+    def has_sumber(self, key):
+        with closing(self._connect()) as con:
+            return con.execute("SELECT 1 FROM sumber WHERE key = ?", (key,)).fetchone() is not None
+
+    def append(self, df, key=None):
+        # Upsert per (Nama, Tanggal): upload ulang periode yang sama menimpa data lama
+        rows = df[list(KOLOM_STORE)].copy()
+        rows['Tanggal'] = rows['Tanggal'].dt.strftime('%Y-%m-%d')
+        for c in KOLOM_WAKTU:
+            # Teks ISO presisi ns (jam auto checkout bisa pecahan detik), NULL untuk NaT
+            waktu = pd.to_datetime(rows[c])
+            rows[c] = waktu.astype(str).where(waktu.notna(), None)
+        rows['Hari_Kerja'] = rows['Hari_Kerja'].astype('int8')
+        rows = rows.astype(object).where(rows.notna(), None)
+
+        kunci = ", ".join(CUBE_KEYS)
+        with closing(self._connect()) as con, con:
+            con.execute("CREATE TEMP TABLE baru AS SELECT * FROM harian WHERE 0")
+            con.executemany(f"INSERT INTO baru VALUES ({', '.join('?' * len(KOLOM_STORE))})",
+                            rows.itertuples(index=False, name=None))
+            con.execute("INSERT OR REPLACE INTO harian SELECT * FROM baru")
+
+            # Bucket cube yang tersentuh dihitung ulang dari tabel harian
+            con.execute(f"CREATE TEMP TABLE bucket AS SELECT DISTINCT {kunci} FROM baru")
+            con.execute(f"DELETE FROM cube WHERE ({kunci}) IN (SELECT {kunci} FROM bucket)")
+            con.execute(f"INSERT INTO cube SELECT {_cols(CUBE_KEYS, 'h.')}, {_AGREGAT_CUBE} "
+                        f"FROM harian h JOIN bucket USING ({kunci}) GROUP BY {_cols(CUBE_KEYS, 'h.')}")
+            if key is not None:
+                con.execute("INSERT OR REPLACE INTO sumber VALUES (?, datetime('now'), ?)", (key, len(rows)))
+            con.execute("DROP TABLE baru")
+            con.execute("DROP TABLE bucket")
+
+    # --- BACA (FILTER DI-PUSH KE SQL) ---
+    def _where(self, con, tahun, bulan, minggu, nama):
+        where = [f"Tahun IN ({', '.join('?' * len(tahun))})",
+                 f"Bulan IN ({', '.join('?' * len(bulan))})",
+                 "Minggu_Ke BETWEEN ? AND ?"]
+        params = [int(t) for t in tahun] + [str(b) for b in bulan] + [int(minggu[0]), int(minggu[1])]
+        if nama is not None:
+            if len(nama) <= MAX_PARAM_IN:
+                where.append(f"Nama IN ({', '.join('?' * len(nama))})")
+                params += [str(n) for n in nama]
+            else:
+                con.execute("CREATE TEMP TABLE IF NOT EXISTS pilih_nama (Nama TEXT PRIMARY KEY)")
+                con.execute("DELETE FROM pilih_nama")
+                con.executemany("INSERT OR IGNORE INTO pilih_nama VALUES (?)", [(str(n),) for n in nama])
+                where.append("Nama IN (SELECT Nama FROM pilih_nama)")
+        return " AND ".join(where), params
+
+    def query(self, tahun, bulan, minggu, nama=None):
+        # Data harian hasil filter (nama=None = semua), urut & ber-dtype sama dengan df_full
+        with closing(self._connect()) as con:
+            where, params = self._where(con, tahun, bulan, minggu, nama)
+            df = pd.read_sql_query(f"SELECT {_cols(KOLOM_STORE)} FROM harian WHERE {where} "
+                                   f"ORDER BY {_cols(SORT_KEYS)}", con, params=params)
+        df['Tanggal'] = pd.to_datetime(df['Tanggal'], format='%Y-%m-%d')
+        for c in KOLOM_WAKTU:
+            df[c] = pd.to_datetime(df[c], format='ISO8601')
+        df['Hari_Kerja'] = df['Hari_Kerja'].astype(bool)
+        return compact_frame(df)
+
+    def query_cube(self, tahun, bulan, minggu, nama=None):
+        # Sama dengan slice_cube(build_cube(df_full), ...), tapi dijawab dari tabel cube
+        with closing(self._connect()) as con:
+            where, params = self._where(con, tahun, bulan, minggu, nama)
+            cube = pd.read_sql_query(f"SELECT {_cols(CUBE_KEYS + KOLOM_CUBE_NILAI)} FROM cube WHERE {where}",
+                                     con, params=params)
+        nilai = [c for c in KOLOM_CUBE_NILAI if c not in ('Durasi_Total', 'Durasi_Hadir')]
+        return cube.astype({c: 'int32' for c in nilai})
+
+    def slicer_values(self):
+        # Pilihan slicer sidebar langsung dari tabel cube (jauh lebih kecil dari data harian)
+        with closing(self._connect()) as con:
+            tahun = [r[0] for r in con.execute("SELECT DISTINCT Tahun FROM cube ORDER BY Tahun")]
+            bulan = [r[0] for r in con.execute("SELECT Bulan FROM cube GROUP BY Bulan ORDER BY MIN(Bulan_Angka)")]
+            nama = [r[0] for r in con.execute("SELECT DISTINCT Nama FROM cube ORDER BY Nama")]
+            lo, hi, baris = con.execute("SELECT MIN(Minggu_Ke), MAX(Minggu_Ke), SUM(Baris) FROM cube").fetchone()
+        return tahun, bulan, nama, (int(lo or 0), int(hi or 0)), int(baris or 0)
+
+    def info(self):
+        with closing(self._connect()) as con:
+            baris, karyawan, awal, akhir = con.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT Nama), MIN(Tanggal), MAX(Tanggal) FROM harian").fetchone()
+        return {'baris': baris, 'karyawan': karyawan, 'awal': awal, 'akhir': akhir,
+                'mb': os.path.getsize(self.path) / 2**20}
+
+
+class StoreSlicer:
+    # Antarmuka sama dengan SlicerIndex (pilihan slicer + filter), tapi tiap filter = query ke store
+    def __init__(self, store):
+        self.store = store
+        self.tahun_list, self.bulan_list, self.nama_list, self.minggu_range, self.n_baris = store.slicer_values()
+
+    def __len__(self):
+        return self.n_baris
+
+    def _nama(self, sel_nama):
+        # Semua nama terpilih -> tanpa filter Nama
+        return None if set(self.nama_list) <= set(sel_nama) else sel_nama
+
+    def filter(self, sel_tahun, sel_bulan, sel_minggu, sel_nama):
+        return self.store.query(sel_tahun, sel_bulan, sel_minggu, self._nama(sel_nama))
+
+    def cube(self, sel_tahun, sel_bulan, sel_minggu, sel_nama):
+        return self.store.query_cube(sel_tahun, sel_bulan, sel_minggu, self._nama(sel_nama))
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+from benchmark import MAPPING, generate_export
+from engine import libur_nasional
+from kalender import HolidayCalendar
+from loader import load_and_normalize
+from pipeline import ingest_activity, process_activity
+
+# --- PARITY BACKEND ARROW vs PANDAS ---
+# Hasil process_activity harus identik (nilai, dtype, urutan kolom & baris) di kedua backend,
+# termasuk masa kerja dan libur / hari masuk per cabang.
+
+
+@pytest.fixture(scope='module')
+def act():
+    return ingest_activity(MAPPING, df_raw=load_and_normalize(generate_export(30, 3, seed=2), 'absen.csv'))
+
+
+def _kalender():
+    cabang = pd.DataFrame({
+        'Tanggal': pd.to_datetime(['2025-02-03', '2025-01-01', '2025-03-10']),
+        'Keterangan': ["Libur Cabang", "Tetap Masuk", "Libur Perusahaan"],
+        'Jenis': ["Perusahaan", "Masuk", "Perusahaan"],
+        'Cabang': ["JKT", "SBY", ""],
+    })
+    return HolidayCalendar(pd.concat([HolidayCalendar.from_dict(libur_nasional).libur, cabang], ignore_index=True))
+
+
+def _masa_kerja(act):
+    names = pd.unique(act['Nama'])[:10]
+    return pd.DataFrame({
+        'Nama': names,
+        'Mulai': pd.Timestamp('2025-01-15'),
+        'Selesai': [pd.Timestamp('2025-03-10'), pd.NaT] * 5,
+        'Cabang': ["JKT", "SBY"] * 5,
+    })
+
+
+@pytest.mark.parametrize('hemat', [True, False], ids=['hemat', 'lengkap'])
+@pytest.mark.parametrize('pakai_masa_kerja', [False, True], ids=['tanpa_masa_kerja', 'masa_kerja'])
+def test_backend_arrow_sama_dengan_pandas(act, hemat, pakai_masa_kerja):
+    masa_kerja = _masa_kerja(act) if pakai_masa_kerja else None
+    kalender = _kalender()
+    hasil = {backend: process_activity(act.copy(), masa_kerja, libur=kalender, hemat_memori=hemat, backend=backend)
+             for backend in ['pandas', 'arrow']}
+    pd.testing.assert_frame_equal(hasil['arrow'], hasil['pandas'])
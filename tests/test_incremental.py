@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+from benchmark import MAPPING, generate_export
+from cube import CUBE_KEYS
+from incremental import ProcessedBasis, apply_delta, ingest_files, plan_delta
+from loader import load_and_normalize
+from pipeline import build_views, process_activity
+
+# --- PARITY PROSES INKREMENTAL vs PROSES PENUH ---
+# Tiap skenario: hasil proses penuh atas file lama -> apply_delta dengan daftar file baru
+# harus sama persis (df & cube) dengan proses penuh atas daftar file baru.
+SETTINGS = 'pengaturan'
+
+
+@pytest.fixture(scope='module')
+def raw():
+    return load_and_normalize(generate_export(12, 2, seed=1), 'absen.csv')
+
+
+def _files(raw):
+    masuk = pd.to_datetime(raw['Absen Masuk'])
+    awal = raw[masuk < '2025-01-25']
+    akhir = raw[masuk >= '2025-01-20']  # overlap 5 hari dengan awal
+    genap = raw[masuk.dt.isocalendar().week.to_numpy() % 2 == 0]
+    revisi = raw[masuk.between('2025-01-10', '2025-01-31')].copy()
+    revisi['Lokasi'] = 'RUMAH'  # sel yang sama dengan isi lain
+    return {'awal': awal, 'akhir': akhir, 'genap': genap, 'revisi': revisi, 'semua': raw}
+
+
+def _ingest(ids, files, streaming):
+    if streaming:
+        sources = [files[i].to_csv(index=False).encode('utf-8') for i in ids]
+        return ingest_files(ids, MAPPING, sources=sources)
+    return ingest_files(ids, MAPPING, dfs=[files[i] for i in ids])
+
+
+def _penuh(ids, files, streaming, hemat):
+    act, acts = _ingest(ids, files, streaming)
+    df = process_activity(act, hemat_memori=hemat)
+    cube, _ = build_views(df)
+    return df, cube, ProcessedBasis(SETTINGS, ids, acts, df, cube)
+
+
+def _urut_cube(cube):
+    return cube.sort_values(CUBE_KEYS, key=lambda s: s.astype(str)).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('streaming', [False, True], ids=['standar', 'streaming'])
+@pytest.mark.parametrize('hemat', [True, False], ids=['hemat', 'lengkap'])
+@pytest.mark.parametrize('lama, baru', [
+    (['awal'], ['awal', 'akhir']),               # append: periode baru di belakang
+    (['akhir'], ['awal', 'akhir']),              # prepend: periode baru di depan
+    (['awal', 'akhir'], ['awal', 'genap', 'akhir']),  # sisip di tengah, sel tumpang tindih
+    (['semua', 'revisi'], ['semua']),            # cuma membuang file
+], ids=['append', 'prepend', 'sisip', 'hapus'])
+def test_apply_delta_sama_dengan_proses_penuh(raw, lama, baru, streaming, hemat):
+    files = _files(raw)
+    _, _, basis = _penuh(lama, files, streaming, hemat)
+
+    tambah, _ = plan_delta(basis, SETTINGS, baru)
+    _, acts_baru = _ingest(tambah, files, streaming)
+    hasil = apply_delta(basis, baru, acts_baru, hemat_memori=hemat)
+    assert hasil is not None
+    df, cube, _, basis_baru = hasil
+
+    df_penuh, cube_penuh, _ = _penuh(baru, files, streaming, hemat)
+    pd.testing.assert_frame_equal(df, df_penuh)
+    pd.testing.assert_frame_equal(_urut_cube(cube), _urut_cube(cube_penuh))
+    assert basis_baru.file_ids == baru
@@ -0,0 +1,32 @@
+import io
+import pandas as pd
+import pytest
+from engine import prepare_activity
+from loader import load_data_smart, scan_columns, stream_activity
+
+# --- CSV DENGAN BOM ("CSV UTF-8" dari Excel) ---
+MAPPING = ['Nama', 'Absen Masuk', 'Absen Keluar', 'Lokasi', 'Catatan']
+CSV = ("LAPORAN KEHADIRAN\n"
+       "Nama;Absen Masuk;Absen Keluar;Lokasi;Catatan\n"
+       "Budi;2025-03-03 08:00:00;2025-03-03 17:00:00;SCIENTIA;\n"
+       "Sari;2025-03-03 09:00:00;2025-03-03 18:30:00;RUMAH;WFH\n")
+
+
+@pytest.mark.parametrize('baris_judul', [False, True])
+def test_csv_bom_kolom_sama_dengan_hasil_parse(baris_judul):
+    isi = CSV if baris_judul else CSV.split('\n', 1)[1]
+    data = ('\ufeff' + isi).encode('utf-8')
+    kolom, errors = scan_columns([data])
+    assert errors == []
+    assert kolom == MAPPING
+
+    df_raw = load_data_smart(data, 'absen.csv')
+    assert list(df_raw.columns) == kolom
+    df_act = prepare_activity(df_raw, kolom)
+    assert list(df_act['Nama']) == ['Budi', 'Sari']
+
+
+def test_csv_bom_streaming():
+    data = ('\ufeff' + CSV).encode('utf-8')
+    df_act = stream_activity([io.BytesIO(data)], MAPPING)
+    assert sorted(df_act['Nama']) == ['Budi', 'Sari']
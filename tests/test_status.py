@@ -0,0 +1,75 @@
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+from engine import compute_status, get_status, kantor_list, libur_nasional
+from kalender import HolidayCalendar
+
+# --- PARITY compute_status (kolomnar) vs get_status (referensi per baris) ---
+# Grid kecil yang mencakup libur nasional, libur / hari masuk per cabang, weekend,
+# lokasi WFO / WFH / Rumah / kosong dan catatan kerja / cuti / dinas.
+TANGGAL = pd.to_datetime([
+    '2025-03-28',  # Jumat biasa
+    '2025-03-29',  # Sabtu + Nyepi
+    '2025-03-30',  # Minggu
+    '2025-03-31',  # Senin, Idul Fitri
+    '2025-04-07',  # Senin biasa (libur khusus cabang SURABAYA)
+    '2025-04-18',  # Jumat Agung (cabang BALI tetap masuk)
+])
+LOKASI = ["SCIENTIA", " bsd city ", "Rumah", "RUMAH SAKIT BINONG", "", None]
+CATATAN = ["", None, "WFH", "Cuti Tahunan", "CUTI", "Dinas Luar Kota", "sakit", "-"]
+MASUK = [pd.Timestamp('2025-01-01 08:00'), pd.NaT]
+CABANG = ["", "SURABAYA", "BALI"]
+
+
+def _kalender():
+    libur = pd.DataFrame({'Tanggal': list(libur_nasional), 'Keterangan': list(libur_nasional.values())})
+    cabang = pd.DataFrame({
+        'Tanggal': pd.to_datetime(['2025-04-07', '2025-04-18']),
+        'Keterangan': ["Libur Cabang", "Tetap Masuk"],
+        'Jenis': ["Perusahaan", "Masuk"],
+        'Cabang': ["Surabaya", "Bali"],
+    })
+    return HolidayCalendar(pd.concat([libur, cabang], ignore_index=True))
+
+
+def _grid():
+    rows = itertools.product(TANGGAL, LOKASI, CATATAN, MASUK, CABANG)
+    grid = pd.DataFrame(rows, columns=['Tanggal', 'Lokasi', 'Catatan', 'Absen Masuk', 'Cabang'])
+    grid['Absen Masuk'] = grid['Tanggal'] + (grid['Absen Masuk'] - pd.Timestamp('2025-01-01'))
+    return grid
+
+
+def _referensi(grid, kalender):
+    # get_status cuma kenal satu set libur -> set libur cabang baris itu
+    libur_cabang = {c: set(pd.to_datetime(h).date) for c, h in kalender.cabang_holidays.items()}
+    libur_cabang[""] = set(pd.to_datetime(kalender.holidays).date)
+    return grid.apply(lambda row: get_status(row, libur_cabang[row['Cabang'].upper()], kantor_list), axis=1)
+
+
+@pytest.mark.parametrize('dengan_cabang', [False, True])
+def test_compute_status_sama_dengan_get_status(dengan_cabang):
+    grid = _grid()
+    kalender = _kalender()
+    if dengan_cabang:
+        hasil = compute_status(grid, kalender, kantor_list, cabang=grid['Cabang'])
+        referensi = _referensi(grid, kalender)
+    else:
+        hasil = compute_status(grid, libur_nasional, kantor_list)
+        referensi = grid.apply(get_status, axis=1)
+
+    beda = grid.assign(hasil=hasil, referensi=referensi)
+    beda = beda[beda['hasil'] != beda['referensi']]
+    assert beda.empty, beda.to_string()
+    # Grid memang mencakup semua cabang if di get_status (kecuali Cuti, lihat keywords_kerja)
+    assert set(referensi) >= {
+        "Lembur Libur (WFO)", "Lembur Libur (WFH)", "Libur Nasional", "Lembur Weekend (WFO)",
+        "Lembur Weekend (WFH)", "Libur Akhir Pekan", "WFO", "WFH", "Alpha",
+    }
+
+
+def test_compute_status_index_ikut_grid():
+    grid = _grid().sample(frac=1, random_state=0)
+    hasil = compute_status(grid, libur_nasional, kantor_list)
+    assert hasil.index.equals(grid.index)
+    np.testing.assert_array_equal(hasil.to_numpy(), grid.apply(get_status, axis=1).to_numpy())